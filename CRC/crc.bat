@@ -0,0 +1,3 @@
+@echo off
+REM CRC工具统一入口，例如: crc flow / crc compute --config CRC-32 313233343536373839
+python python_model/scr/crc_cli.py %*
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+CRC计算吞吐量基准测试
+比较逐位通用实现(CRC.calculate_crc)、查表模型(CrcModel.compute)和按配置特化的内核
+"""
+import os
+import sys
+import time
+import argparse
+
+
+def measure(func, data, repeat):
+    """返回多次运行中最快一次的耗时(秒)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def backends(model, include_bitwise=True):
+    """返回参与比较的实现 [(名称, 函数)]"""
+    from CRC import calculate_crc
+    from crc_kernel import get_kernel
+
+    result = []
+    if include_bitwise:
+        result.append(("generic", lambda data: calculate_crc(
+            data, model.width, model.poly, model.init, model.refin, model.refout, model.xorout)))
+    result.append(("table", model.compute))
+    for unroll in (4, 8):
+        result.append((f"kernel-x{unroll}", get_kernel(model, unroll)))
+    return result
+
+
+def run_benchmark(models, size, repeat, include_bitwise=True):
+    """对每个模型运行基准测试，返回结果列表"""
+    data = os.urandom(size)
+    results = []
+    for model in models:
+        rows = []
+        expected = model.compute(data)
+        for name, func in backends(model, include_bitwise):
+            if func(data) != expected:
+                raise AssertionError(f"{name} 与查表模型结果不一致: {model!r}")
+            elapsed = measure(func, data, repeat)
+            rows.append({'backend': name, 'seconds': elapsed,
+                         'mb_per_s': size / elapsed / 1e6 if elapsed else float('inf')})
+        # 以通用实现(或查表模型)为基准计算加速比
+        base = rows[0]['seconds']
+        for row in rows:
+            row['speedup'] = base / row['seconds'] if row['seconds'] else float('inf')
+        results.append({'model': model, 'rows': rows})
+    return results
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='CRC计算吞吐量基准测试')
+    parser.add_argument('configs', nargs='*',
+                        default=['CRC-8', 'CRC-16/XMODEM', 'CRC-16/MODBUS', 'CRC-32', 'CRC-32/BZIP2',
+                                 'CRC-64/XZ', 'CRC-82/DARC'],
+                        help='配置文件路径或标准模型名称')
+    parser.add_argument('--size', type=int, default=64 * 1024, help='每次计算的数据字节数')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数(取最快一次)')
+    parser.add_argument('--no-generic', action='store_true', help='不测试逐位通用实现(较慢)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from crc_config import get_model
+    args = parse_args(argv)
+    models = [get_model(spec) for spec in args.configs]
+
+    print(f"CRC吞吐量基准测试: 数据 {args.size} 字节, 重复 {args.repeat} 次")
+    results = run_benchmark(models, args.size, args.repeat, not args.no_generic)
+    for result in results:
+        model = result['model']
+        print(f"\n{model.name or repr(model)} (width={model.width}, refin={model.refin}, refout={model.refout})")
+        for row in result['rows']:
+            print(f"  {row['backend']:<10} {row['mb_per_s']:8.2f} MB/s  x{row['speedup']:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
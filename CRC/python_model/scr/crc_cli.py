@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+CRC工具统一入口
+子命令对应各个脚本的 main(argv)，在分发时才导入对应模块，启动时只导入 sys；
+flow 子命令在一个进程中依次运行 run_validation.bat 的四个步骤，
+生成步骤写出的配置模型和测试向量留在内存中(按路径和修改时间校验)，RTL比较步骤不再重新解析，
+各步骤也共享已导入的模块
+"""
+import sys
+
+# 冷启动时间预算(毫秒)，startup 子命令测量 compute 的启动时间并与之比较
+STARTUP_BUDGET_MS = 100
+
+# 子命令 -> (模块, 函数, 说明)；模块为 None 时为本文件中的函数
+COMMANDS = {
+    'generate': ('crc_rtl_generator', 'main', '生成RTL配置和测试数据'),
+    'generate-model': ('crc_model_generator', 'main', '生成软件配置和测试数据'),
+    'validate-model': ('crc_model_validator', 'main', '验证软件模型与标准库的一致性'),
+    'simulate': ('crc_sim_runner', 'main', '并行运行RTL仿真'),
+    'validate-rtl': ('crc_rtl_validator', 'main', '比较RTL仿真结果与软件模型'),
+    'compute': (None, 'compute_main', '计算十六进制数据或文件的CRC'),
+    'bench': ('crc_bench', 'main', 'CRC计算吞吐量基准测试'),
+    'flow-bench': ('crc_flow_bench', 'main', '端到端验证流程的规模基准测试'),
+    'fuzz': ('crc_fuzz', 'main', '差分模糊测试并保存最小回归向量'),
+    'sum': ('crc_sum', 'main', '并行批量计算文件CRC，生成或校验清单'),
+    'flow': (None, 'flow_main', '在一个进程中运行完整的四步验证流程'),
+    'startup': (None, 'startup_main', '测量冷启动时间并检查是否超出预算'),
+}
+
+# 大于该字节数的输入使用特化内核计算
+KERNEL_BYTES = 64 * 1024
+
+
+def run_command(name, argv):
+    """导入子命令对应的模块并运行，返回退出码"""
+    module_name, func_name, _ = COMMANDS[name]
+    if module_name is None:
+        func = globals()[func_name]
+    else:
+        import importlib
+        func = getattr(importlib.import_module(module_name), func_name)
+    try:
+        code = func(argv)
+    except SystemExit as e:
+        # argparse 出错或 --help 时以 SystemExit 退出
+        code = e.code
+    if code is None:
+        return 0
+    return code if isinstance(code, int) else 1
+
+
+def compute_main(argv=None):
+    """crc compute --config <配置> [十六进制数据 ...] [--file 文件 ...]"""
+    import argparse
+    import crc_profile
+    parser = argparse.ArgumentParser(prog='crc compute', description='计算十六进制数据或文件的CRC')
+    parser.add_argument('--config', required=True, help='配置文件路径或标准模型名称')
+    parser.add_argument('data', nargs='*', help='十六进制数据')
+    parser.add_argument('--file', nargs='+', default=[], help='数据文件')
+    crc_profile.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if not args.data and not args.file:
+        parser.error("需要十六进制数据或 --file")
+
+    crc_profile.start(args)
+    try:
+        compute_inputs(args)
+    finally:
+        crc_profile.finish(args)
+    return 0
+
+
+def compute_inputs(args):
+    """计算并打印每个输入的CRC"""
+    from crc_config import get_model
+    from crc_profile import span, count
+    with span('load'):
+        model = get_model(args.config)
+        inputs = [(text, bytes.fromhex(text)) for text in args.data]
+        for path in args.file:
+            with open(path, 'rb') as f:
+                inputs.append((path, f.read()))
+    digits = (model.width + 3) // 4
+    for label, data in inputs:
+        count('bytes', len(data))
+        with span('compute', bytes=len(data)):
+            if len(data) >= KERNEL_BYTES:
+                from crc_kernel import get_kernel
+                count('backend.kernel')
+                crc = get_kernel(model, 8)(data)
+            else:
+                count('backend.table')
+                crc = model.compute(data)
+        print(f"0x{crc:0{digits}X}  {label}")
+
+
+def flow_main(argv=None):
+    """依次运行生成、软件模型验证、RTL仿真和RTL比较四个步骤"""
+    import time
+    import argparse
+    from crc_vector_engine import share_vectors
+    parser = argparse.ArgumentParser(prog='crc flow', description='在一个进程中运行完整的四步验证流程')
+    parser.add_argument('--n-configs', type=int, default=1, help='每种反转类型的配置数量')
+    parser.add_argument('--n-tests', type=int, default=4, help='每个配置要生成的测试数量')
+    parser.add_argument('--min-length', type=int, default=5, help='测试数据最小长度(字节)')
+    parser.add_argument('--max-length', type=int, default=20, help='测试数据最大长度(字节)')
+    parser.add_argument('--seed', type=int, default=None, help='随机数种子')
+    parser.add_argument('--simulator', type=str, default='iverilog', help='crc_sim_runner 的预置仿真器')
+    parser.add_argument('--jobs', type=int, default=None, help='并发仿真任务数')
+    parser.add_argument('--verbose', action='store_true', help='显示详细信息')
+    args = parser.parse_args(argv)
+
+    generate_argv = ['--n-configs', str(args.n_configs), '--n-tests', str(args.n_tests),
+                     '--min-length', str(args.min_length), '--max-length', str(args.max_length)]
+    if args.seed is not None:
+        generate_argv += ['--seed', str(args.seed)]
+    simulate_argv = ['--simulator', args.simulator]
+    if args.jobs:
+        simulate_argv += ['--jobs', str(args.jobs)]
+    verbose_argv = ['--verbose'] if args.verbose else []
+    steps = [
+        ('生成CRC测试数据', 'generate', generate_argv),
+        ('验证软件模型正确性', 'validate-model', ['--verbose']),
+        ('运行RTL仿真', 'simulate', simulate_argv + verbose_argv),
+        ('比较RTL与软件模型结果', 'validate-rtl', ['--verbose']),
+    ]
+
+    print("==== CRC算法验证流程 ====")
+    results = []
+    # 仿真器在独立进程中读取文件，生成步骤仍然写出全部文件
+    share_vectors()
+    try:
+        for index, (title, name, step_argv) in enumerate(steps, 1):
+            print(f"\n[{index}/{len(steps)}] {title}...")
+            start = time.perf_counter()
+            code = run_command(name, step_argv)
+            results.append((title, code, time.perf_counter() - start))
+    finally:
+        share_vectors(False)
+
+    print("\n==== 验证流程完成 ====")
+    for index, (title, code, elapsed) in enumerate(results, 1):
+        status = "✓" if code == 0 else f"✗ (返回码 {code})"
+        print(f"  [{index}/{len(steps)}] {title}: {status} {elapsed:.2f}s")
+    return 0 if all(code == 0 for _, code, _ in results) else 1
+
+
+def startup_main(argv=None):
+    """多次启动新进程运行 compute，报告启动时间的中位数和最大值"""
+    import time
+    import argparse
+    import subprocess
+    parser = argparse.ArgumentParser(prog='crc startup', description='测量冷启动时间并检查是否超出预算')
+    parser.add_argument('--runs', type=int, default=10, help='启动次数')
+    parser.add_argument('--budget', type=float, default=STARTUP_BUDGET_MS, help='中位数预算(毫秒)')
+    parser.add_argument('--config', type=str, default='CRC-32', help='compute 使用的配置')
+    args = parser.parse_args(argv)
+
+    command = [sys.executable, __file__, 'compute', '--config', args.config, '313233343536373839']
+    baseline = [sys.executable, '-c', 'pass']
+
+    def measure(cmd):
+        times = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+            times.append((time.perf_counter() - start) * 1000)
+        return sorted(times)
+
+    interpreter = measure(baseline)
+    times = measure(command)
+    median = times[len(times) // 2]
+    print(f"解释器空启动: 中位数 {interpreter[len(interpreter) // 2]:.1f} ms")
+    print(f"crc compute: 中位数 {median:.1f} ms, 最大 {times[-1]:.1f} ms (预算 {args.budget:.0f} ms)")
+    if median > args.budget:
+        print("✗ 冷启动时间超出预算")
+        return 1
+    print("✓ 冷启动时间在预算内")
+    return 0
+
+
+def usage():
+    lines = ["用法: crc <子命令> [参数...]", "", "子命令:"]
+    lines.extend(f"  {name:<16}{help_text}" for name, (_, _, help_text) in COMMANDS.items())
+    lines.append("")
+    lines.append("使用 crc <子命令> --help 查看子命令的参数")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0 if argv else 1
+    name, rest = argv[0], argv[1:]
+    if name not in COMMANDS:
+        print(f"错误: 未知子命令 {name}\n")
+        print(usage())
+        return 1
+    return run_command(name, rest)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+统一的CRC配置加载与模型对象
+同一个加载器读取 .vh(RTL) 和 .json(软件) 配置，生成不可修改的 CrcModel 对象，
+预先计算掩码、最高位、反转多项式、查找表、校验值和余数(位宽 8-128，查找表以 array('Q') 紧凑存放)；
+配置按文件路径和修改时间缓存，重复加载不再重新解析；
+另外内置一组标准CRC模型及其校验值
+"""
+import os
+import sys
+from array import array
+from CRC import reverse_bits
+from crc_profile import count
+
+# 标准校验值使用的输入
+CHECK_INPUT = b"123456789"
+
+# 支持的最大CRC位宽；查找表按64位分段存放，超过64位时分为高低两段
+MAX_WIDTH = 128
+LIMB_MASK = (1 << 64) - 1
+
+# 内置标准模型：名称 -> (位宽, 多项式, 初始值, 输入反转, 输出反转, 结果异或值, 校验值)
+CATALOGUE = {
+    "CRC-8":              (8, 0x07, 0x00, False, False, 0x00, 0xF4),
+    "CRC-8/MAXIM-DOW":    (8, 0x31, 0x00, True, True, 0x00, 0xA1),
+    "CRC-8/ROHC":         (8, 0x07, 0xFF, True, True, 0x00, 0xD0),
+    "CRC-16/ARC":         (16, 0x8005, 0x0000, True, True, 0x0000, 0xBB3D),
+    "CRC-16/IBM-3740":    (16, 0x1021, 0xFFFF, False, False, 0x0000, 0x29B1),
+    "CRC-16/XMODEM":      (16, 0x1021, 0x0000, False, False, 0x0000, 0x31C3),
+    "CRC-16/KERMIT":      (16, 0x1021, 0x0000, True, True, 0x0000, 0x2189),
+    "CRC-16/MODBUS":      (16, 0x8005, 0xFFFF, True, True, 0x0000, 0x4B37),
+    "CRC-16/GENIBUS":     (16, 0x1021, 0xFFFF, False, False, 0xFFFF, 0xD64E),
+    "CRC-16/RIELLO":      (16, 0x1021, 0xB2AA, True, True, 0x0000, 0x63D0),
+    "CRC-32/ISO-HDLC":    (32, 0x04C11DB7, 0xFFFFFFFF, True, True, 0xFFFFFFFF, 0xCBF43926),
+    "CRC-32/ISCSI":       (32, 0x1EDC6F41, 0xFFFFFFFF, True, True, 0xFFFFFFFF, 0xE3069283),
+    "CRC-32/BZIP2":       (32, 0x04C11DB7, 0xFFFFFFFF, False, False, 0xFFFFFFFF, 0xFC891918),
+    "CRC-32/MPEG-2":      (32, 0x04C11DB7, 0xFFFFFFFF, False, False, 0x00000000, 0x0376E6E7),
+    "CRC-40/GSM":         (40, 0x0004820009, 0x0, False, False, 0xFFFFFFFFFF, 0xD4164FC646),
+    "CRC-64/ECMA-182":    (64, 0x42F0E1EBA9EA3693, 0x0, False, False, 0x0, 0x6C40DF5F0B497347),
+    "CRC-64/XZ":          (64, 0x42F0E1EBA9EA3693, 0xFFFFFFFFFFFFFFFF, True, True,
+                           0xFFFFFFFFFFFFFFFF, 0x995DC9BBDF1939FA),
+    "CRC-64/WE":          (64, 0x42F0E1EBA9EA3693, 0xFFFFFFFFFFFFFFFF, False, False,
+                           0xFFFFFFFFFFFFFFFF, 0x62EC59E3F1A4F00A),
+    "CRC-64/GO-ISO":      (64, 0x000000000000001B, 0xFFFFFFFFFFFFFFFF, True, True,
+                           0xFFFFFFFFFFFFFFFF, 0xB90956C775A41001),
+    "CRC-82/DARC":        (82, 0x0308C0111011401440411, 0x0, True, True, 0x0,
+                           0x09EA83F625023801FD612),
+}
+
+# 常用别名
+ALIASES = {
+    "CRC-32": "CRC-32/ISO-HDLC",
+    "CRC-32C": "CRC-32/ISCSI",
+    "CRC-16/CCITT-FALSE": "CRC-16/IBM-3740",
+    "CRC-64": "CRC-64/ECMA-182",
+}
+
+_REFLECT8 = tuple(reverse_bits(b, 8) for b in range(256))
+
+
+def build_table(width, poly, refin):
+    """生成逐字节查找表；refin 时为反转寄存器(LSB优先)形式"""
+    mask = (1 << width) - 1
+    table = []
+    if refin:
+        rpoly = reverse_bits(poly & mask, width)
+        for byte in range(256):
+            crc = byte
+            for _ in range(8):
+                crc = (crc >> 1) ^ rpoly if crc & 1 else crc >> 1
+            table.append(crc)
+    else:
+        top = 1 << (width - 1)
+        for byte in range(256):
+            crc = byte << (width - 8)
+            for _ in range(8):
+                crc = ((crc << 1) ^ poly) & mask if crc & top else (crc << 1) & mask
+            table.append(crc)
+    return array('Q', table) if width <= 64 else WideTable(table)
+
+
+class WideTable:
+    """位宽超过64位的查找表：高低64位分别存放在两个 array('Q') 中，取值时合成整数"""
+
+    __slots__ = ('high', 'low')
+
+    def __init__(self, values):
+        self.high = array('Q', (v >> 64 for v in values))
+        self.low = array('Q', (v & LIMB_MASK for v in values))
+
+    def __len__(self):
+        return len(self.low)
+
+    def __getitem__(self, index):
+        return (self.high[index] << 64) | self.low[index]
+
+    def __iter__(self):
+        return ((h << 64) | l for h, l in zip(self.high, self.low))
+
+
+class CrcModel:
+    """不可修改的CRC模型对象，所有派生参数在构造时预先计算"""
+
+    __slots__ = ('name', 'width', 'poly', 'init', 'refin', 'refout', 'xorout',
+                 'mask', 'topbit', 'poly_reflected', 'table', 'check', 'residue')
+
+    def __init__(self, width, poly, init, refin, refout, xorout, name=None):
+        if not 8 <= width <= MAX_WIDTH:
+            raise ValueError(f"不支持的CRC位宽: {width}")
+        mask = (1 << width) - 1
+        values = {
+            'name': name,
+            'width': width,
+            'poly': poly & mask,          # 去掉隐式最高位
+            'init': init & mask,
+            'refin': bool(refin),
+            'refout': bool(refout),
+            'xorout': xorout & mask,
+            'mask': mask,
+            'topbit': 1 << (width - 1),
+            'poly_reflected': reverse_bits(poly & mask, width),
+            'table': build_table(width, poly, refin),
+        }
+        for slot, value in values.items():
+            object.__setattr__(self, slot, value)
+        object.__setattr__(self, 'check', self.compute(CHECK_INPUT))
+        object.__setattr__(self, 'residue', self._residue())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CrcModel 对象不可修改")
+
+    def __delattr__(self, name):
+        raise AttributeError("CrcModel 对象不可修改")
+
+    def __reduce__(self):
+        # 只序列化基本参数，派生数据在目标进程中重新计算
+        return (CrcModel, (self.width, self.poly, self.init, self.refin,
+                           self.refout, self.xorout, self.name))
+
+    def key(self):
+        """配置参数元组，可用于比较和字典键"""
+        return (self.width, self.poly, self.init, self.refin, self.refout, self.xorout)
+
+    def __eq__(self, other):
+        return isinstance(other, CrcModel) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        digits = (self.width + 3) // 4
+        label = f"{self.name} " if self.name else ""
+        return (f"<CrcModel {label}width={self.width} poly=0x{self.poly:0{digits}x} "
+                f"init=0x{self.init:0{digits}x} refin={self.refin} refout={self.refout} "
+                f"xorout=0x{self.xorout:0{digits}x}>")
+
+    def params(self):
+        """返回整数参数字典（与 normalize_config 的格式一致）"""
+        return {
+            'width': self.width,
+            'poly': self.poly,
+            'init': self.init,
+            'refin': self.refin,
+            'refout': self.refout,
+            'xorout': self.xorout,
+        }
+
+    def compute(self, data):
+        """查表计算CRC，结果与 CRC.calculate_crc 一致"""
+        table = self.table
+        if self.refin:
+            # 寄存器保持反转形式，避免逐字节反转输入
+            crc = reverse_bits(self.init, self.width)
+            for byte in data:
+                crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+            if not self.refout:
+                crc = reverse_bits(crc, self.width)
+        else:
+            shift = self.width - 8
+            mask = self.mask
+            crc = self.init
+            for byte in data:
+                crc = ((crc << 8) & mask) ^ table[((crc >> shift) ^ byte) & 0xFF]
+            if self.refout:
+                crc = reverse_bits(crc, self.width)
+        return crc ^ self.xorout
+
+    def _residue(self):
+        """有效码字(消息+CRC)处理后、结果异或前的寄存器值；
+        输入输出反转方式不同或位宽不是整字节时没有固定余数"""
+        if self.refin != self.refout or self.width % 8:
+            return None
+        order = 'little' if self.refout else 'big'
+        codeword = self.compute(b"").to_bytes(self.width // 8, order)
+        return self.compute(codeword) ^ self.xorout
+
+
+def from_params(params, name=None):
+    """由参数字典创建模型，支持JSON配置的单个 rev 参数和 refin/refout 参数"""
+    def as_int(value):
+        return int(value, 16) if isinstance(value, str) else int(value)
+
+    refin = params['refin'] if 'refin' in params else params['rev']
+    refout = params['refout'] if 'refout' in params else params['rev']
+    return CrcModel(int(params['width']), as_int(params['poly']), as_int(params['init']),
+                    refin, refout, as_int(params['xorout']), name=name)
+
+
+def _parse_verilog_number(text):
+    """解析 'd16、'h1021、33'h1021、16 等Verilog数值"""
+    if "'" not in text:
+        return int(text)
+    base_value = text.split("'", 1)[1].lower().lstrip('s')
+    base, digits = base_value[0], base_value[1:].replace('_', '')
+    radix = {'d': 10, 'h': 16, 'b': 2, 'o': 8}.get(base)
+    if radix is None:
+        raise ValueError(f"无法解析的Verilog数值: {text}")
+    return int(digits, radix)
+
+
+_VH_NAMES = {
+    'CRC_WIDTH': 'width',
+    'CRC_POLY': 'poly',
+    'CRC_INIT': 'init',
+    'CRC_REFIN': 'refin',
+    'CRC_REFOUT': 'refout',
+    'CRC_XOROUT': 'xorout',
+}
+
+
+def parse_vh(path):
+    """解析RTL配置头文件，返回整数参数字典"""
+    params = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split('//', 1)[0].split()
+            if len(parts) >= 3 and parts[0] == '`define' and parts[1] in _VH_NAMES:
+                params[_VH_NAMES[parts[1]]] = _parse_verilog_number(parts[2])
+    missing = [name for name in _VH_NAMES.values() if name not in params]
+    if missing:
+        raise ValueError(f"缺少必要参数: {', '.join(missing)}")
+    params['refin'] = params['refin'] == 1
+    params['refout'] = params['refout'] == 1
+    return params
+
+
+def parse_json(path):
+    """解析JSON配置，返回参数字典"""
+    import json
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# 已解析配置缓存：绝对路径 -> (修改时间, 文件大小, 模型)
+_config_cache = {}
+
+
+def load_config(path):
+    """加载 .vh 或 .json 配置文件，按路径和修改时间缓存解析结果"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    cached = _config_cache.get(path)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        count('config_cache.hit')
+        return cached[2]
+    count('config_cache.miss')
+    if path.endswith('.vh'):
+        params = parse_vh(path)
+    elif path.endswith('.json'):
+        params = parse_json(path)
+    else:
+        raise ValueError(f"不支持的配置文件类型: {path}")
+    model = from_params(params, name=os.path.basename(path))
+    _config_cache[path] = (stat.st_mtime_ns, stat.st_size, model)
+    return model
+
+
+def catalogue_model(name):
+    """按名称(不区分大小写，支持别名)获取内置标准模型"""
+    key = name.upper()
+    key = ALIASES.get(key, key)
+    if key not in CATALOGUE:
+        raise KeyError(f"未知的标准CRC模型: {name}")
+    width, poly, init, refin, refout, xorout, _ = CATALOGUE[key]
+    return CrcModel(width, poly, init, refin, refout, xorout, name=key)
+
+
+def get_model(spec):
+    """spec 可以是 CrcModel、标准模型名称或配置文件路径"""
+    if isinstance(spec, CrcModel):
+        return spec
+    if os.path.exists(spec):
+        return load_config(spec)
+    return catalogue_model(spec)
+
+
+def verify_catalogue():
+    """检查全部内置模型的校验值，返回不一致的模型名称列表"""
+    return [name for name, entry in CATALOGUE.items()
+            if catalogue_model(name).check != entry[6]]
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    import argparse
+    parser = argparse.ArgumentParser(description='CRC配置加载与标准模型目录')
+    parser.add_argument('configs', nargs='*', help='配置文件路径或标准模型名称(为空时列出标准模型)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.configs:
+        failed = verify_catalogue()
+        for name in CATALOGUE:
+            model = catalogue_model(name)
+            digits = (model.width + 3) // 4
+            status = "✗" if name in failed else "✓"
+            residue = "-" if model.residue is None else f"0x{model.residue:0{digits}X}"
+            print(f"{status} {name:<18} check=0x{model.check:0{digits}X} residue={residue}")
+        return 1 if failed else 0
+    for spec in args.configs:
+        model = get_model(spec)
+        digits = (model.width + 3) // 4
+        print(model)
+        print(f"  check=0x{model.check:0{digits}X}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
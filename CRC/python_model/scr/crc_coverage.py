@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+CRC数据通路覆盖率模型与最小测试向量生成
+覆盖点：查找表索引命中(256个)、寄存器每一位的 0->1/1->0 翻转、数据长度区间、反转模式；
+生成器利用CRC的线性性求解能把寄存器驱动到指定状态的输入字节，
+用尽可能少的测试向量达到全覆盖
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+from CRC import crc_process_byte, reverse_bits
+from crc_gf2 import solve_linear
+from crc_config import load_config
+from crc_vector_engine import LAYOUTS, test_filename, format_vector
+
+# 四种反转模式，与 crc_rtl_generator 的配置类型一致
+REFLECTION_MODES = {
+    (False, False): "standard",
+    (True, False): "mixed_one",
+    (False, True): "mixed_two",
+    (True, True): "reflect",
+}
+
+_REFLECT8 = [reverse_bits(b, 8) for b in range(256)]
+
+
+def length_class(length):
+    """长度区间按2的幂划分：1、2-3、4-7、8-15 ..."""
+    return length.bit_length()
+
+
+def length_class_name(cls):
+    low, high = 1 << (cls - 1), (1 << cls) - 1
+    return str(low) if low == high else f"{low}-{high}"
+
+
+def length_classes(min_length, max_length):
+    """返回 [min_length, max_length] 范围内需要覆盖的长度区间"""
+    return list(range(length_class(min_length), length_class(max_length) + 1))
+
+
+class Coverage:
+    """单个CRC配置的数据通路覆盖率"""
+
+    def __init__(self, config, min_length=1, max_length=1024):
+        self.config = config
+        self.width = config['width']
+        self.mask = (1 << self.width) - 1
+        self.shift = self.width - 8
+        self.mode = REFLECTION_MODES[(config['refin'], config['refout'])]
+        self.min_length = min_length
+        self.max_length = max_length
+        self.index_hits = [0] * 256
+        self.rises = 0   # 出现过 0->1 翻转的寄存器位
+        self.falls = 0   # 出现过 1->0 翻转的寄存器位
+        self.lengths = set()
+        self.vectors = 0
+
+    def step(self, crc, byte):
+        """处理一个字节并记录覆盖点，返回新的寄存器值"""
+        c = self.config
+        data = _REFLECT8[byte] if c['refin'] else byte
+        self.index_hits[((crc >> self.shift) ^ data) & 0xFF] += 1
+        new_crc = crc_process_byte(crc, byte, c['poly'], self.width, c['refin'])
+        self.rises |= ~crc & new_crc & self.mask
+        self.falls |= crc & ~new_crc & self.mask
+        return new_crc
+
+    def sample(self, data):
+        """记录一个完整测试向量的覆盖情况"""
+        crc = self.config['init']
+        for byte in data:
+            crc = self.step(crc, byte)
+        self.lengths.add(length_class(len(data)))
+        self.vectors += 1
+        return crc
+
+    def missing(self):
+        """返回尚未覆盖的覆盖点"""
+        return {
+            'table_index': [i for i, hits in enumerate(self.index_hits) if not hits],
+            'rise': [b for b in range(self.width) if not (self.rises >> b) & 1],
+            'fall': [b for b in range(self.width) if not (self.falls >> b) & 1],
+            'length': [c for c in length_classes(self.min_length, self.max_length)
+                       if c not in self.lengths],
+        }
+
+    def complete(self):
+        return not any(self.missing().values())
+
+    def report(self):
+        """返回覆盖率摘要字典"""
+        missing = self.missing()
+        classes = length_classes(self.min_length, self.max_length)
+        return {
+            'mode': self.mode,
+            'vectors': self.vectors,
+            'table_index': f"{256 - len(missing['table_index'])}/256",
+            'toggle': f"{2 * self.width - len(missing['rise']) - len(missing['fall'])}/{2 * self.width}",
+            'length': f"{len(classes) - len(missing['length'])}/{len(classes)}",
+            'missing_length': [length_class_name(c) for c in missing['length']],
+            'complete': self.complete(),
+        }
+
+
+class StateSolver:
+    """利用CRC线性性求解把寄存器从当前状态驱动到目标状态的输入字节"""
+
+    def __init__(self, config):
+        self.config = config
+        self.width = config['width']
+        self.n_bytes = (self.width + 7) // 8
+        # 寄存器对(已反转的)输入字节是线性的：从0状态处理单位向量得到各列
+        self.columns = []
+        for bit in range(8 * self.n_bytes):
+            data = [0] * self.n_bytes
+            data[bit // 8] = 1 << (bit % 8)
+            self.columns.append(self._run(0, data))
+
+    def _run(self, crc, data):
+        c = self.config
+        for byte in data:
+            crc = crc_process_byte(crc, byte, c['poly'], self.width, False)
+        return crc
+
+    def solve(self, crc, target):
+        """返回把寄存器从 crc 驱动到 target 的输入字节(原始字节序)，无解时返回 None"""
+        offset = self._run(crc, [0] * self.n_bytes)
+        x = solve_linear(self.columns, target ^ offset)
+        if x is None:
+            return None
+        data = [(x >> (8 * i)) & 0xFF for i in range(self.n_bytes)]
+        if self.config['refin']:
+            data = [_REFLECT8[b] for b in data]
+        return data
+
+
+def plan_lengths(min_length, max_length, body_length):
+    """为每个长度区间选择一个向量长度，保证最长的向量能容纳全部定向字节"""
+    lengths = []
+    for cls in length_classes(min_length, max_length):
+        lengths.append(min(max((1 << cls) - 1, min_length), max_length))
+    lengths.sort(reverse=True)
+    # 定向字节放不进现有向量时，追加最长长度的向量
+    while sum(lengths) < body_length:
+        lengths.insert(0, max_length)
+    return lengths
+
+
+def generate_minimal(config, min_length, max_length):
+    """生成覆盖全部覆盖点的最小测试向量集合，返回 (向量列表, 覆盖率对象)"""
+    coverage = Coverage(config, min_length, max_length)
+    solver = StateSolver(config)
+    mask, shift = coverage.mask, coverage.shift
+    # 最多需要三次状态驱动(全0->全1->全0)加256个索引字节
+    lengths = plan_lengths(min_length, max_length, 256 + 3 * solver.n_bytes)
+
+    vectors = []
+    for length in lengths:
+        data = []
+        crc = config['init']
+        while len(data) < length:
+            missing_rise = mask & ~coverage.rises
+            missing_fall = mask & ~coverage.falls
+            chunk = None
+            if (missing_rise or missing_fall) and length - len(data) >= solver.n_bytes:
+                # 需要翻转的位先驱动到相反状态，再驱动到目标状态
+                if missing_rise:
+                    target = 0 if crc & missing_rise else mask
+                else:
+                    target = mask if ~crc & missing_fall & mask else 0
+                chunk = solver.solve(crc, target)
+            if chunk is None:
+                unhit = [i for i, hits in enumerate(coverage.index_hits) if not hits]
+                if unhit:
+                    # 选择使查找表索引等于未命中值的字节
+                    byte = unhit[0] ^ ((crc >> shift) & 0xFF)
+                    chunk = [_REFLECT8[byte] if config['refin'] else byte]
+                else:
+                    chunk = [0]
+            for byte in chunk:
+                crc = coverage.step(crc, byte)
+            data.extend(chunk)
+        vectors.append(data)
+
+    # 用独立的覆盖率对象重新统计生成结果
+    verified = Coverage(config, min_length, max_length)
+    for data in vectors:
+        verified.sample(data)
+    return vectors, verified
+
+
+def load_configs(config_dir):
+    """加载目录中全部配置，返回 {配置ID: 配置}"""
+    configs = {}
+    for path in sorted(glob.glob(os.path.join(config_dir, 'crc_config_*.*'))):
+        config_id = os.path.basename(path).split('_')[2].split('.')[0]
+        if path.endswith(('.json', '.vh')) and config_id.isdigit():
+            configs[int(config_id)] = load_config(path).params()
+    return configs
+
+
+def read_vector(path):
+    """读取两种数据集格式的测试向量"""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.read().strip().split('\n')
+    hex_line = lines[1] if path.endswith('_input.dat') and len(lines) > 1 else lines[0]
+    return [int(x, 16) for x in hex_line.split()]
+
+
+def print_report(config_id, report):
+    status = "完全覆盖" if report['complete'] else "未完全覆盖"
+    print(f"配置 #{config_id} ({report['mode']}): {report['vectors']} 个向量, {status}")
+    print(f"  查找表索引: {report['table_index']}")
+    print(f"  寄存器位翻转: {report['toggle']}")
+    print(f"  长度区间: {report['length']}")
+    if report['missing_length']:
+        print(f"  缺少长度区间: {', '.join(report['missing_length'])}")
+
+
+def print_mode_summary(configs):
+    modes = {REFLECTION_MODES[(c['refin'], c['refout'])] for c in configs.values()}
+    print(f"\n反转模式覆盖: {len(modes)}/4 ({', '.join(sorted(modes))})")
+    missing = sorted(set(REFLECTION_MODES.values()) - modes)
+    if missing:
+        print(f"  缺少反转模式: {', '.join(missing)}")
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='CRC数据通路覆盖率与最小测试向量生成')
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('measure', '统计现有测试向量的覆盖率'),
+                            ('generate', '生成达到全覆盖的最小测试向量集合')):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('--config-dir', type=str, default='./rtl_model/settings', help='配置目录(.vh或.json)')
+        p.add_argument('--min-length', type=int, default=1, help='测试数据最小长度(字节)')
+        p.add_argument('--max-length', type=int, default=1024, help='测试数据最大长度(字节)')
+        p.add_argument('--json', action='store_true', help='以JSON格式输出覆盖率')
+        if name == 'measure':
+            p.add_argument('--input-dir', type=str, default='./dataset/Test_Model/input', help='测试数据目录')
+        else:
+            p.add_argument('--output-dir', type=str, required=True, help='输出目录')
+            p.add_argument('--layout', choices=LAYOUTS, default='model', help='输出文件布局')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configs = load_configs(args.config_dir)
+    if not configs:
+        print(f"错误: 未在 {args.config_dir} 中找到配置")
+        return 1
+
+    reports = {}
+    for config_id, config in configs.items():
+        if args.command == 'measure':
+            coverage = Coverage(config, args.min_length, args.max_length)
+            for path in sorted(glob.glob(os.path.join(args.input_dir, f'test_data_c{config_id}_t*.dat'))):
+                coverage.sample(read_vector(path))
+        else:
+            vectors, coverage = generate_minimal(config, args.min_length, args.max_length)
+            os.makedirs(args.output_dir, exist_ok=True)
+            for test_id, data in enumerate(vectors, 1):
+                path = os.path.join(args.output_dir, test_filename(config_id, test_id, args.layout))
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(format_vector(bytes(data), args.layout))
+        reports[config_id] = coverage.report()
+
+    if args.json:
+        print(json.dumps(reports, indent=2, ensure_ascii=False))
+    else:
+        for config_id, report in reports.items():
+            print_report(config_id, report)
+        print_mode_summary(configs)
+        if args.command == 'generate':
+            total = sum(r['vectors'] for r in reports.values())
+            print(f"\n共生成 {total} 个测试向量，保存在: {args.output_dir}")
+    return 0 if all(r['complete'] for r in reports.values()) else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
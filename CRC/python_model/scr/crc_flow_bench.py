@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+端到端验证流程的规模基准测试
+在临时工作目录中按不同数据集规模和长度分布运行完整流程：两个生成器，以及两个验证脚本的
+实际代码路径(冷缓存、热结果缓存和 --stream 流水线)，记录各阶段耗时、峰值内存和文件数。
+每个测量点重复运行 --repeat 次，取最小耗时，用双对数坐标下的拟合斜率判断各阶段的扩展性，
+斜率明显大于1的阶段标记为超线性，有效测量点不足两个的阶段报告为数据不足
+"""
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import subprocess
+
+# 测试数据长度分布 -> (最小长度, 最大长度)，单位字节
+DISTRIBUTIONS = {
+    'short': (3, 16),
+    'medium': (16, 256),
+    'long': (256, 2048),
+}
+
+# 默认数据集规模(每个套件的向量数)，完整扫描可以用 --sizes 100 1000 10000 100000 1000000
+DEFAULT_SIZES = [100, 1000, 10000]
+
+# 软件模型套件的配置数；RTL套件每种反转类型一个配置，共四个
+N_CONFIGS = 4
+
+# 拟合斜率超过该值的阶段视为超线性
+MAX_SLOPE = 1.2
+
+# 耗时低于该值(秒)的测量点不参与斜率拟合(报告中标出)，避免固定开销和计时噪声的影响
+MIN_SECONDS = 0.01
+
+# 每个测量点的默认重复次数，拟合使用各阶段的最小耗时
+DEFAULT_REPEAT = 3
+
+# 使用仿真器时每个仿真分片的测试数量
+SIM_SHARD_SIZE = 256
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存(MB)，平台不支持时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位为KB，macOS 上为字节
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def count_files(directory, pattern):
+    from crc_pipeline import iter_files
+    return sum(1 for _ in iter_files(directory, pattern))
+
+
+def run_flow(workspace, size, min_length, max_length, seed, workers, simulator=None):
+    """在 workspace 中运行一次完整流程，返回 (各阶段记录, 失败的阶段列表)
+
+    验证阶段直接调用两个验证脚本的 main()，依次测量冷缓存、热结果缓存和 --stream 流水线；
+    每个阶段的函数返回 (返回码, 文件数)，阶段内的打印输出被丢弃，
+    峰值内存是阶段结束时进程的内存高水位
+    """
+    import crc_model_generator
+    import crc_rtl_generator
+    import crc_model_validator
+    import crc_rtl_validator
+
+    algorithm_dir = os.path.join(workspace, 'dataset', 'Test_Algorithm')
+    algorithm_input = os.path.join(algorithm_dir, 'input')
+    algorithm_output = os.path.join(algorithm_dir, 'output')
+    model_input = os.path.join(workspace, 'dataset', 'Test_Model', 'input')
+    model_output = os.path.join(workspace, 'dataset', 'Test_Model', 'model_data')
+    rtl_output = os.path.join(workspace, 'dataset', 'Test_Model', 'rtl_data')
+    python_settings = os.path.join(workspace, 'python_model', 'settings')
+    rtl_settings = os.path.join(workspace, 'rtl_model', 'settings')
+    cache = os.path.join(workspace, 'dataset', '.cache', 'result_cache.sqlite')
+    n_tests = max(1, math.ceil(size / N_CONFIGS))
+    lengths = ['--n-tests', str(n_tests), '--min-length', str(min_length),
+               '--max-length', str(max_length), '--seed', str(seed), '--workers', str(workers)]
+    stages = []
+    failed = []
+
+    def stage(name, func):
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+            code, files = func()
+        stages.append({'stage': name, 'seconds': time.perf_counter() - start,
+                       'peak_rss_mb': peak_rss_mb(), 'files': files})
+        if code:
+            failed.append(name)
+
+    # 软件模型套件(crc_model_generator 把配置写到当前目录下的 python_model/settings)
+    def generate_model():
+        code = crc_model_generator.main(['--n-configs', str(N_CONFIGS), '--output-dir', algorithm_dir] + lengths)
+        return code, count_files(algorithm_input, 'test_data_*.dat')
+
+    def validate_model(*options):
+        def run():
+            code = crc_model_validator.main(['--config-dir', python_settings, '--input-dir', algorithm_input,
+                                             '--output-dir', algorithm_output, '--cache', cache] + list(options))
+            return code, count_files(algorithm_output, '*')
+        return run
+
+    stage('generate-model', generate_model)
+    stage('validate-model', validate_model())
+    stage('validate-model-cached', validate_model())
+    stage('validate-model-stream', validate_model('--stream', '--no-cache'))
+
+    # RTL套件：没有仿真器时RTL结果目录指向软件模型输出目录，验证脚本先写出软件模型结果再读回比较
+    def generate_rtl():
+        code = crc_rtl_generator.main(['--n-configs', '1', '--config-dir', rtl_settings,
+                                       '--output-dir', model_input] + lengths)
+        return code, count_files(model_input, '*_input.dat')
+
+    def simulate():
+        from crc_sim_runner import main as sim_main
+        code = sim_main(['--rtl-setting-dir', rtl_settings, '--input-dir', model_input,
+                         '--rtl-output-dir', rtl_output, '--work-dir', os.path.join(workspace, 'work'),
+                         '--simulator', simulator, '--shard-size', str(SIM_SHARD_SIZE)])
+        return code, count_files(rtl_output, '*_output.dat')
+
+    def validate_rtl(*options):
+        def run():
+            code = crc_rtl_validator.main(['--rtl-setting-dir', rtl_settings, '--input-dir', model_input,
+                                           '--rtl-output-dir', rtl_output if simulator else model_output,
+                                           '--model-output-dir', model_output, '--cache', cache]
+                                          + list(options))
+            return code, count_files(model_output, '*_output.dat')
+        return run
+
+    stage('generate-rtl', generate_rtl)
+    if simulator:
+        stage('simulate', simulate)
+    stage('validate-rtl', validate_rtl())
+    stage('validate-rtl-cached', validate_rtl())
+    stage('validate-rtl-stream', validate_rtl('--stream', '--no-cache'))
+    return stages, failed
+
+
+def scaling_slope(points, min_seconds=MIN_SECONDS):
+    """双对数坐标下 耗时-规模 的最小二乘斜率，返回 (斜率, 被排除的规模列表)；
+    耗时低于 min_seconds 的点被排除，有效测量点少于两个时斜率为 None"""
+    used = [(math.log(n), math.log(t)) for n, t in points if t >= min_seconds]
+    excluded = [n for n, t in points if t < min_seconds]
+    if len(used) < 2:
+        return None, excluded
+    mean_x = sum(x for x, _ in used) / len(used)
+    mean_y = sum(y for _, y in used) / len(used)
+    var = sum((x - mean_x) ** 2 for x, _ in used)
+    if var == 0:
+        return None, excluded
+    return sum((x - mean_x) * (y - mean_y) for x, y in used) / var, excluded
+
+
+def analyse(runs, max_slope=MAX_SLOPE, min_seconds=MIN_SECONDS):
+    """按 (分布, 阶段) 拟合扩展斜率，返回 {分布: {阶段: {'slope', 'flagged', 'excluded'}}}"""
+    analysis = {}
+    for run in runs:
+        for record in run['stages']:
+            curve = analysis.setdefault(run['distribution'], {}).setdefault(record['stage'], [])
+            curve.append((run['size'], record['seconds']))
+    for distribution, curves in analysis.items():
+        for name, points in curves.items():
+            slope, excluded = scaling_slope(points, min_seconds)
+            curves[name] = {'slope': slope, 'flagged': slope is not None and slope > max_slope,
+                            'excluded': excluded}
+    return analysis
+
+
+def run_child(spec):
+    """子进程入口：每次测量在新进程中运行，峰值内存和进程内缓存互不影响"""
+    os.chdir(spec['workspace'])
+    stages, failed = run_flow(spec['workspace'], spec['size'], spec['min_length'], spec['max_length'],
+                              spec['seed'], spec['workers'], spec.get('simulator'))
+    print(json.dumps({'stages': stages, 'failed': failed}))
+    return 0
+
+
+def measure_once(size, distribution, args):
+    """在新的临时工作目录和子进程中运行一次流程"""
+    min_length, max_length = DISTRIBUTIONS[distribution]
+    workspace = tempfile.mkdtemp(prefix='crc_flow_bench_', dir=args.work_dir)
+    spec = {'workspace': workspace, 'size': size, 'min_length': min_length, 'max_length': max_length,
+            'seed': args.seed, 'workers': args.workers, 'simulator': args.simulator}
+    try:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', json.dumps(spec)],
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"测量点 {distribution}/{size} 运行失败:\n{proc.stderr}")
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+    finally:
+        if not args.keep_work:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+
+def measure(size, distribution, args):
+    """运行一个测量点 args.repeat 次，各阶段取最小耗时(同时记录中位数和最大值)"""
+    repeats = [measure_once(size, distribution, args) for _ in range(args.repeat)]
+    stages = []
+    for index, record in enumerate(repeats[0]['stages']):
+        samples = sorted(repeat['stages'][index]['seconds'] for repeat in repeats)
+        stages.append({
+            'stage': record['stage'],
+            'seconds': samples[0],
+            'median_seconds': samples[len(samples) // 2],
+            'max_seconds': samples[-1],
+            'samples': samples,
+            'peak_rss_mb': max((repeat['stages'][index]['peak_rss_mb'] or 0) for repeat in repeats) or None,
+            'files': record['files'],
+        })
+    failed = sorted({name for repeat in repeats for name in repeat['failed']})
+    return {'distribution': distribution, 'size': size, 'repeat': args.repeat, 'stages': stages, 'failed': failed}
+
+
+def print_report(runs, analysis, sizes, min_seconds=MIN_SECONDS):
+    for distribution, curves in analysis.items():
+        min_length, max_length = DISTRIBUTIONS[distribution]
+        rows = {run['size']: run for run in runs if run['distribution'] == distribution}
+        print(f"\n分布 {distribution} ({min_length}-{max_length} 字节)  每向量耗时(µs，{runs[0]['repeat']} 次中的最小值)")
+        print(f"  {'阶段':<20}" + ''.join(f"{size:>12}" for size in sizes) + "     斜率")
+        for name, result in curves.items():
+            cells = []
+            for size in sizes:
+                record = next(r for r in rows[size]['stages'] if r['stage'] == name)
+                mark = '*' if size in result['excluded'] else ' '
+                cells.append(f"{record['seconds'] / size * 1e6:>11.2f}{mark}")
+            slope_text = f"{result['slope']:8.2f}" if result['slope'] is not None else "  数据不足"
+            print(f"  {name:<22}" + ''.join(cells) + slope_text + ("  ← 超线性" if result['flagged'] else ""))
+        totals = [sum(r['seconds'] for r in rows[size]['stages']) for size in sizes]
+        peaks = [max((r['peak_rss_mb'] or 0) for r in rows[size]['stages']) for size in sizes]
+        files = [sum(r['files'] for r in rows[size]['stages']) for size in sizes]
+        print(f"  {'总耗时(秒)':<18}" + ''.join(f"{t:>12.2f}" for t in totals))
+        print(f"  {'峰值内存(MB)':<18}" + ''.join(f"{p:>12.1f}" for p in peaks))
+        print(f"  {'文件数':<19}" + ''.join(f"{f:>12}" for f in files))
+    print(f"\n  * 耗时低于 {min_seconds}s，不参与斜率拟合")
+
+
+def write_csv(path, runs):
+    """写出扩展曲线数据，每行一个 (分布, 规模, 阶段) 测量点"""
+    import csv
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['distribution', 'size', 'stage', 'seconds', 'median_seconds', 'max_seconds',
+                         'us_per_vector', 'peak_rss_mb', 'files'])
+        for run in runs:
+            for record in run['stages']:
+                writer.writerow([run['distribution'], run['size'], record['stage'], f"{record['seconds']:.6f}",
+                                 f"{record['median_seconds']:.6f}", f"{record['max_seconds']:.6f}",
+                                 f"{record['seconds'] / run['size'] * 1e6:.3f}", record['peak_rss_mb'],
+                                 record['files']])
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='端到端验证流程的规模基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='数据集规模(每个套件的向量数)')
+    parser.add_argument('--distributions', nargs='+', choices=sorted(DISTRIBUTIONS),
+                        default=list(DISTRIBUTIONS), help='测试数据长度分布')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='每个测量点的重复次数(取最小耗时)')
+    parser.add_argument('--seed', type=int, default=0, help='随机数种子')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='生成测试数据的并行进程数')
+    parser.add_argument('--simulator', type=str, default=None,
+                        help='运行 crc_sim_runner 的预置仿真器(如 stub)，默认读回软件模型输出代替RTL结果')
+    parser.add_argument('--max-slope', type=float, default=MAX_SLOPE, help='超线性判定的斜率阈值')
+    parser.add_argument('--min-seconds', type=float, default=MIN_SECONDS, help='参与斜率拟合的最小耗时(秒)')
+    parser.add_argument('--work-dir', type=str, default=None, help='临时工作目录的父目录')
+    parser.add_argument('--keep-work', action='store_true', help='保留临时工作目录')
+    parser.add_argument('--json', type=str, default=None, help='保存全部测量结果的JSON文件')
+    parser.add_argument('--csv', type=str, default=None, help='保存扩展曲线数据的CSV文件')
+    parser.add_argument('--child', type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat 至少为1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        return run_child(json.loads(args.child))
+
+    sizes = sorted(set(args.sizes))
+    print(f"端到端流程基准测试: 规模 {sizes}, 分布 {args.distributions}, 每点 {args.repeat} 次, "
+          f"{'仿真器 ' + args.simulator if args.simulator else '不运行仿真'}")
+    runs = []
+    for distribution in args.distributions:
+        for size in sizes:
+            run = measure(size, distribution, args)
+            runs.append(run)
+            total = sum(r['seconds'] for r in run['stages'])
+            peak = max((r['peak_rss_mb'] or 0) for r in run['stages'])
+            print(f"  {distribution:<7} n={size:<8} {total:8.2f}s  峰值内存 {peak:.1f} MB")
+            if run['failed']:
+                print(f"  警告: 阶段 {', '.join(run['failed'])} 返回失败")
+
+    analysis = analyse(runs, args.max_slope, args.min_seconds)
+    print_report(runs, analysis, sizes, args.min_seconds)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'sizes': sizes, 'repeat': args.repeat, 'runs': runs, 'analysis': analysis},
+                      f, indent=2, ensure_ascii=False)
+    if args.csv:
+        write_csv(args.csv, runs)
+
+    flagged = [f"{d}/{name}" for d, curves in analysis.items() for name, r in curves.items() if r['flagged']]
+    undetermined = [f"{d}/{name}" for d, curves in analysis.items() for name, r in curves.items()
+                    if r['slope'] is None]
+    code = 0
+    if flagged:
+        print(f"\n✗ 超线性增长的阶段(斜率 > {args.max_slope}): {', '.join(flagged)}")
+        code = 1
+    if undetermined:
+        print(f"\n? 数据不足，无法判断扩展性的阶段(耗时不低于 {args.min_seconds}s 的规模少于两个，"
+              f"可增大 --sizes 或减小 --min-seconds): {', '.join(undetermined)}")
+        code = 1
+    if any(run['failed'] for run in runs):
+        print("\n✗ 部分阶段返回失败(结果不匹配或运行出错)")
+        code = 1
+    if code == 0:
+        print(f"\n✓ 所有阶段的扩展斜率不超过 {args.max_slope}")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+无进位乘法折叠(PCLMUL类)与Barrett约简常数生成
+为每个CRC配置计算 x^k mod P 折叠常数和Barrett μ，输出为Verilog `define 和Python字面量；
+同时提供按128位分块、4路并行折叠的纯Python参考实现，并与 CRC.calculate_crc 对照检查。
+所有常数均为正常位序(MSB优先)；反转配置在参考实现中逐字节反转输入，
+反转形式的引擎可使用同时输出的 *_REFLECTED 常数
+"""
+import os
+import re
+import sys
+import glob
+import random
+import argparse
+from CRC import calculate_crc, reverse_bits
+from crc_gf2 import clmul, poly_xpow_mod, poly_divmod
+
+# 128位分块，每块拆成高低两个64位半块做无进位乘法
+BLOCK_BITS = 128
+HALF_BITS = 64
+HALF_MASK = (1 << HALF_BITS) - 1
+FOLD_WAYS = 4
+
+# 折叠距离(位)：4路并行折叠为512，合并4路时为384/256/128，逐块折叠为128
+FOLD_DISTANCES = (512, 384, 256, 128)
+
+_REFLECT8 = [reverse_bits(b, 8) for b in range(256)]
+
+
+def fold_constants(model):
+    """计算折叠和Barrett约简常数，返回 {名称: 值} 有序字典
+
+    X<k> = x^k mod P；每个折叠距离 D 需要 X<D+64>(高半块) 和 X<D>(低半块)；
+    最后一步把128位余量乘 x^W 时使用 X<64+W>；
+    MU = floor(x^(64+W) / P) 用于把 64+W 位的结果约简为 W 位；POLY 为含最高位的生成多项式
+    """
+    width, poly = model.width, model.poly
+    if width > HALF_BITS:
+        raise ValueError(f"折叠常数只支持64位及以下的CRC: width={width}")
+    constants = {}
+    for distance in FOLD_DISTANCES:
+        for exponent in (distance + HALF_BITS, distance):
+            constants[f'X{exponent}'] = poly_xpow_mod(exponent, poly, width)
+    constants[f'X{HALF_BITS + width}'] = poly_xpow_mod(HALF_BITS + width, poly, width)
+    full_poly = poly | (1 << width)
+    constants['MU'] = poly_divmod(1 << (HALF_BITS + width), full_poly)[0]
+    constants['POLY'] = full_poly
+    return constants
+
+
+def constant_bits(name, width):
+    """常数的位数：余式为 width 位，MU 为65位，POLY 为 width+1 位"""
+    if name == 'MU':
+        return HALF_BITS + 1
+    if name == 'POLY':
+        return width + 1
+    return width
+
+
+def reflected_constants(constants, width):
+    """反转形式的常数(按各自位数反转)"""
+    return {name: reverse_bits(value, constant_bits(name, width))
+            for name, value in constants.items()}
+
+
+def _fold(block, hi_constant, lo_constant):
+    """把128位块向后移动折叠距离：高半块乘 X<D+64>，低半块乘 X<D>"""
+    return clmul(block >> HALF_BITS, hi_constant) ^ clmul(block & HALF_MASK, lo_constant)
+
+
+def fold_crc(model, data, constants=None):
+    """4路128位折叠计算CRC的参考实现，结果与 calculate_crc 一致"""
+    width = model.width
+    c = constants or fold_constants(model)
+    data = bytes(data)
+    if model.refin:
+        data = bytes(_REFLECT8[b] for b in data)
+    n_bits = 8 * len(data)
+    message = int.from_bytes(data, 'big')
+    if n_bits < width:
+        # 报文短于CRC位宽时直接约简 init·x^n + M·x^W
+        crc = poly_divmod((model.init << n_bits) ^ (message << width), c['POLY'])[1]
+        return _finish(model, crc)
+    # 初始值等价于异或到报文的前 width 位
+    message ^= model.init << (n_bits - width)
+
+    # 按128位分块(高位补零不改变多项式的值)，首块为最高次项
+    n_blocks = max(1, -(-n_bits // BLOCK_BITS))
+    blocks = [(message >> (BLOCK_BITS * (n_blocks - 1 - i))) & ((1 << BLOCK_BITS) - 1)
+              for i in range(n_blocks)]
+
+    if n_blocks >= FOLD_WAYS:
+        # 4路并行折叠：每一路向后折叠 512 位后与下一组对应的块异或
+        acc = blocks[:FOLD_WAYS]
+        index = FOLD_WAYS
+        while n_blocks - index >= FOLD_WAYS:
+            acc = [_fold(a, c['X576'], c['X512']) ^ blocks[index + i] for i, a in enumerate(acc)]
+            index += FOLD_WAYS
+        # 合并4路：前三路分别折叠 384/256/128 位
+        value = (_fold(acc[0], c['X448'], c['X384']) ^ _fold(acc[1], c['X320'], c['X256'])
+                 ^ _fold(acc[2], c['X192'], c['X128']) ^ acc[3])
+    else:
+        value, index = blocks[0], 1
+    for block in blocks[index:]:
+        value = _fold(value, c['X192'], c['X128']) ^ block
+
+    # value ≡ 报文 (mod P)，乘 x^W 得到 64+W 位的结果，再用Barrett约简
+    product = clmul(value >> HALF_BITS, c[f'X{HALF_BITS + width}']) ^ ((value & HALF_MASK) << width)
+    quotient = clmul(product >> width, c['MU']) >> HALF_BITS
+    crc = (product ^ clmul(quotient, c['POLY'])) & model.mask
+    return _finish(model, crc)
+
+
+def _finish(model, crc):
+    """输出反转并异或 xorout"""
+    if model.refout:
+        crc = reverse_bits(crc, model.width)
+    return crc ^ model.xorout
+
+
+def check_model(model, trials=200, max_length=600, seed=0):
+    """随机长度的数据与 calculate_crc 对照，返回不一致的数据长度列表"""
+    rng = random.Random(seed)
+    constants = fold_constants(model)
+    lengths = list(range(0, 70)) + [rng.randrange(max_length) for _ in range(trials)]
+    failed = []
+    for length in lengths:
+        data = bytes(rng.getrandbits(8) for _ in range(length))
+        expected = calculate_crc(data, model.width, model.poly, model.init,
+                                 model.refin, model.refout, model.xorout)
+        if fold_crc(model, data, constants) != expected:
+            failed.append(length)
+    return failed
+
+
+def format_verilog(model, constants, prefix='CRC_FOLD'):
+    """输出为Verilog `define(带位宽的常量)"""
+    lines = [f"// 自动生成的CRC折叠常数: {model!r}"]
+    for suffix, values in (('', constants), ('_REFLECTED', reflected_constants(constants, model.width))):
+        for name, value in values.items():
+            bits = constant_bits(name, model.width)
+            lines.append(f"`define {prefix}_{name}{suffix} {bits}'h{value:x}")
+    return '\n'.join(lines) + '\n'
+
+
+def format_python(model, constants, name='FOLD_CONSTANTS'):
+    """输出为Python字典字面量"""
+    lines = [f"# 自动生成的CRC折叠常数: {model!r}"]
+    for suffix, values in (('', constants), ('_REFLECTED', reflected_constants(constants, model.width))):
+        lines.append(f"{name}{suffix} = {{")
+        for key, value in values.items():
+            digits = (constant_bits(key, model.width) + 3) // 4
+            lines.append(f"    '{key}': 0x{value:0{digits}X},")
+        lines.append("}")
+    return '\n'.join(lines) + '\n'
+
+
+def expand_specs(specs):
+    """展开配置参数：目录中的 crc_config_*.json/.vh、配置文件或标准模型名称"""
+    expanded = []
+    for spec in specs:
+        if os.path.isdir(spec):
+            expanded.extend(sorted(glob.glob(os.path.join(spec, 'crc_config_*.json')) +
+                                   glob.glob(os.path.join(spec, 'crc_config_*.vh'))))
+        else:
+            expanded.append(spec)
+    return expanded
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='生成CRC折叠/Barrett常数并检查折叠参考实现')
+    parser.add_argument('configs', nargs='*',
+                        default=['./python_model/settings', './rtl_model/settings'],
+                        help='配置目录、配置文件或标准模型名称')
+    parser.add_argument('--output-dir', type=str, help='保存 <配置名>_fold.vh 和 <配置名>_fold.py 的目录')
+    parser.add_argument('--check', type=int, default=200, help='与 calculate_crc 对照的随机测试数(0为不检查)')
+    parser.add_argument('--quiet', action='store_true', help='不打印常数')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from crc_config import get_model
+    args = parse_args(argv)
+    failed = 0
+    for spec in expand_specs(args.configs):
+        model = get_model(spec)
+        label = model.name or spec
+        if model.width > HALF_BITS:
+            print(f"跳过 {label}: 折叠常数只支持64位及以下的CRC")
+            continue
+        constants = fold_constants(model)
+        if args.check:
+            mismatches = check_model(model, args.check)
+            status = "✓" if not mismatches else f"✗ 长度 {mismatches[:5]} 不一致"
+            failed += bool(mismatches)
+            print(f"{label}: 折叠参考实现 {status}")
+        if not args.quiet:
+            print(format_verilog(model, constants))
+            print(format_python(model, constants))
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+            base = os.path.join(args.output_dir, re.sub(r'[^0-9A-Za-z]+', '_', label) + '_fold')
+            with open(base + '.vh', 'w', encoding='utf-8') as f:
+                f.write(format_verilog(model, constants))
+            with open(base + '.py', 'w', encoding='utf-8') as f:
+                f.write(format_python(model, constants))
+            print(f"常数已保存: {base}.vh, {base}.py")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+CRC差分模糊测试
+随机抽取配置(位宽、多项式、初始值、结果异或值和四种反转组合)和随机数据，
+在多个进程中按批次比较查表模型(CrcModel.compute)、逐位通用实现(CRC.calculate_crc)
+与参考实现：crcmod 支持的位宽以 crcmod 为参考，其他位宽以逐位通用实现为参考。
+每批共用一个配置，配置的构造开销分摊到整批用例上；批次的随机数只由 (种子, 批次序号) 决定，
+任何失败都可以用同一种子复现。发现不一致时先把配置和数据收缩为最小复现用例，
+再按 Test_Algorithm 的格式(JSON配置 + test_data_c*_t*.dat)保存为回归向量，
+被测实现和参考结果记录在 fuzz_summary.json 中，用 --replay <目录> 以同样的实现重新检查
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from CRC import calculate_crc
+from crc_config import CrcModel, MAX_WIDTH
+from crc_model_validator import CRCMOD_WIDTHS, reference_crc_function, parse_test_file
+from crc_vector_engine import format_vector
+
+# 可参与比较的实现
+BACKENDS = ('table', 'generic')
+
+# 每批的用例数(每批共用一个随机配置)
+DEFAULT_BATCH_SIZE = 2000
+
+# 每批最多返回的失败用例数
+BATCH_FAILURE_LIMIT = 4
+
+# 收缩时最多尝试的候选次数
+SHRINK_BUDGET = 20000
+
+# 回归向量输出目录，用 crc_fuzz --replay <目录> 重放
+DEFAULT_OUTPUT_DIR = './dataset/Test_Regression'
+
+
+def random_config(rng, widths):
+    """随机配置参数；初始值和结果异或值偏向全0和全1这两个常见取值"""
+    width = rng.choice(widths)
+    mask = (1 << width) - 1
+
+    def value():
+        kind = rng.randrange(4)
+        return 0 if kind == 0 else mask if kind == 1 else rng.getrandbits(width)
+
+    refin, refout = rng.choice(((False, False), (True, True), (True, False), (False, True)))
+    return {
+        'width': width,
+        'poly': rng.getrandbits(width) | 1,
+        'init': value(),
+        'refin': refin,
+        'refout': refout,
+        'xorout': value(),
+    }
+
+
+def make_model(params):
+    return CrcModel(params['width'], params['poly'], params['init'],
+                    params['refin'], params['refout'], params['xorout'])
+
+
+def oracle_name(width):
+    """参考实现名称：crcmod 支持的位宽以 crcmod 为参考，其他位宽以逐位通用实现为参考"""
+    return 'crcmod' if width in CRCMOD_WIDTHS else 'generic'
+
+
+def make_backends(model, backends):
+    """返回 (参考名称, 参考函数, [(名称, 函数)])"""
+    def generic(data):
+        return calculate_crc(data, model.width, model.poly, model.init,
+                             model.refin, model.refout, model.xorout)
+
+    functions = {'table': model.compute, 'generic': generic}
+    if oracle_name(model.width) == 'crcmod':
+        oracle = ('crcmod', reference_crc_function(model))
+    else:
+        oracle = ('generic', generic)
+    checks = [(name, functions[name]) for name in backends if name != oracle[0]] or [('table', model.compute)]
+    return oracle[0], oracle[1], checks
+
+
+def check_case(params, data, backends):
+    """比较各实现的结果，一致时返回 None，否则返回失败描述 {'kind', 'results'}"""
+    try:
+        model = make_model(params)
+        oracle_name, oracle, checks = make_backends(model, backends)
+        results = {oracle_name: oracle(data)}
+        for name, func in checks:
+            results[name] = func(data)
+    except Exception as e:
+        return {'kind': type(e).__name__, 'error': str(e), 'results': {}}
+    if len(set(results.values())) == 1:
+        return None
+    return {'kind': 'mismatch', 'results': results}
+
+
+def fuzz_batch(task):
+    """在工作进程中运行一批用例，返回 (用例数, 字节数, 失败列表)"""
+    seed, index, batch_size, widths, min_length, max_length, backends = task
+    rng = random.Random(f"{seed}:{index}")
+    params = random_config(rng, widths)
+    try:
+        model = make_model(params)
+        oracle_name, oracle, checks = make_backends(model, backends)
+    except Exception as e:
+        return 1, 0, [{'params': params, 'data': '', 'batch': index,
+                       'kind': type(e).__name__, 'error': str(e), 'results': {}}]
+    failures = []
+    total_bytes = 0
+    for _ in range(batch_size):
+        data = rng.randbytes(rng.randint(min_length, max_length))
+        total_bytes += len(data)
+        try:
+            expected = oracle(data)
+            bad = [name for name, func in checks if func(data) != expected]
+        except Exception as e:
+            bad = [type(e).__name__]
+        if bad and len(failures) < BATCH_FAILURE_LIMIT:
+            failure = check_case(params, data, backends) or {'kind': 'flaky', 'results': {}}
+            failure.update(params=params, data=data.hex(), batch=index)
+            failures.append(failure)
+    return batch_size, total_bytes, failures
+
+
+class _Shrinker:
+    """在候选次数预算内判断候选用例是否仍以同样的方式失败"""
+
+    def __init__(self, kind, backends, budget):
+        self.kind = kind
+        self.backends = backends
+        self.budget = budget
+
+    def fails(self, params, data):
+        if self.budget <= 0:
+            return False
+        self.budget -= 1
+        failure = check_case(params, data, self.backends)
+        return failure is not None and failure['kind'] == self.kind
+
+
+def config_candidates(params, widths):
+    """比当前配置更简单的候选配置：参数清零、取消反转、减少多项式项数、缩小位宽"""
+    candidates = []
+
+    def variant(**changes):
+        candidate = dict(params, **changes)
+        if candidate != params:
+            candidates.append(candidate)
+
+    variant(init=0)
+    variant(xorout=0)
+    variant(refin=False)
+    variant(refout=False)
+    variant(refin=params['refout'])
+    for name in ('init', 'xorout'):
+        value = params[name]
+        while value:
+            value &= value - 1          # 依次去掉最低的置位
+            variant(**{name: value})
+    for bit in range(params['width'] - 1, 0, -1):
+        if params['poly'] >> bit & 1:
+            variant(poly=params['poly'] & ~(1 << bit))
+    for width in sorted(w for w in widths if w < params['width']):
+        mask = (1 << width) - 1
+        variant(width=width, poly=params['poly'] & mask | 1, init=params['init'] & mask,
+                xorout=params['xorout'] & mask)
+    return candidates
+
+
+def shrink_data(params, data, shrinker):
+    """删除尽可能多的字节块，再把剩余字节的取值尽量减小"""
+    chunk = max(1, len(data) // 2)
+    while data and chunk >= 1:
+        i = 0
+        while i < len(data):
+            candidate = data[:i] + data[i + chunk:]
+            if shrinker.fails(params, candidate):
+                data = candidate
+            else:
+                i += chunk
+        chunk //= 2
+    data = bytearray(data)
+    for i in range(len(data)):
+        for value in [0] + [data[i] & ~(1 << bit) for bit in range(8) if data[i] >> bit & 1]:
+            if value == data[i]:
+                continue
+            previous, data[i] = data[i], value
+            if shrinker.fails(params, bytes(data)):
+                break
+            data[i] = previous
+    return bytes(data)
+
+
+def shrink(params, data, kind, backends, widths, budget=SHRINK_BUDGET):
+    """把失败用例收缩为最小复现用例，返回 (配置, 数据, 尝试次数)"""
+    shrinker = _Shrinker(kind, backends, budget)
+    changed = True
+    while changed and shrinker.budget > 0:
+        changed = False
+        smaller = shrink_data(params, data, shrinker)
+        if smaller != data:
+            data, changed = smaller, True
+        for candidate in config_candidates(params, widths):
+            if shrinker.fails(candidate, data):
+                params, changed = candidate, True
+                break
+    return params, data, budget - shrinker.budget
+
+
+def save_regression(params, data, failure, output_dir, backends):
+    """按 Test_Algorithm 格式保存回归向量，返回配置ID；被测实现、参考结果和失败的实现记录在摘要中"""
+    settings_dir = os.path.join(output_dir, 'settings')
+    input_dir = os.path.join(output_dir, 'input')
+    os.makedirs(settings_dir, exist_ok=True)
+    os.makedirs(input_dir, exist_ok=True)
+    existing = [int(name[len('crc_config_'):-len('.json')]) for name in os.listdir(settings_dir)
+                if name.startswith('crc_config_') and name.endswith('.json')
+                and name[len('crc_config_'):-len('.json')].isdigit()]
+    config_id = max(existing, default=0) + 1
+
+    # 与 crc_model_generator.save_json_config 的字段一致，输入输出反转不同时分别保存
+    config = {'width': params['width'], 'poly': params['poly'], 'init': params['init']}
+    if params['refin'] == params['refout']:
+        config['rev'] = params['refin']
+    else:
+        config['refin'] = params['refin']
+        config['refout'] = params['refout']
+    config['xorout'] = params['xorout']
+    with open(os.path.join(settings_dir, f"crc_config_{config_id}.json"), 'w') as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
+    with open(os.path.join(input_dir, f"test_data_c{config_id}_t1.dat"), 'w') as f:
+        f.write(format_vector(data, 'algorithm'))
+
+    summary_path = os.path.join(output_dir, 'fuzz_summary.json')
+    summary = []
+    if os.path.exists(summary_path):
+        with open(summary_path, 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+    oracle = oracle_name(params['width'])
+    results = failure['results']
+    summary.append({
+        'config_id': config_id,
+        'kind': failure['kind'],
+        'backends': list(backends),
+        'oracle': {'name': oracle, 'value': results.get(oracle)},
+        'failing': [name for name, value in results.items() if name != oracle and value != results.get(oracle)],
+        'results': results,
+        'error': failure.get('error'),
+        'original': {'params': failure['params'], 'data': failure['data'], 'batch': failure['batch']},
+    })
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    return config_id
+
+
+def load_regression_params(path):
+    """读取回归向量的JSON配置(save_regression 的格式)，不构造模型，构造失败的用例也能重放"""
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    refin = config['refin'] if 'refin' in config else config['rev']
+    refout = config['refout'] if 'refout' in config else config['rev']
+    return {'width': config['width'], 'poly': config['poly'], 'init': config['init'],
+            'refin': refin, 'refout': refout, 'xorout': config['xorout']}
+
+
+def oracle_result(params, data):
+    """参考实现对用例的结果，配置无法构造时返回 None"""
+    try:
+        model = make_model(params)
+        return make_backends(model, ())[1](data)
+    except Exception:
+        return None
+
+
+def replay(output_dir):
+    """用保存时的被测实现重新检查回归向量，仍然失败时返回1"""
+    summary_path = os.path.join(output_dir, 'fuzz_summary.json')
+    if not os.path.exists(summary_path):
+        print(f"错误: 找不到回归向量摘要 {summary_path}")
+        return 1
+    with open(summary_path, 'r', encoding='utf-8') as f:
+        summary = json.load(f)
+    failed = 0
+    for entry in summary:
+        config_id = entry['config_id']
+        params = load_regression_params(os.path.join(output_dir, 'settings', f"crc_config_{config_id}.json"))
+        test = parse_test_file(os.path.join(output_dir, 'input', f"test_data_c{config_id}_t1.dat"))
+        backends = entry.get('backends', ['table'])
+        failure = check_case(params, test['raw_data'], backends)
+        label = f"c{config_id}_t1 [{entry['kind']}] {format_params(params)}, {len(test['raw_data'])} 字节"
+        if failure is None:
+            print(f"✓ {label}: 实现 {backends} 与参考一致")
+        else:
+            failed += 1
+            results = ', '.join(f'{name}=0x{value:x}' for name, value in failure['results'].items())
+            print(f"✗ {label}: 仍然失败 ({failure['kind']}) {results or failure.get('error', '')}")
+        oracle = entry.get('oracle') or {}
+        current = oracle_result(params, test['raw_data'])
+        if oracle.get('value') is not None and current is not None and current != oracle['value']:
+            print(f"  注意: 参考实现 {oracle['name']} 的结果已变化 "
+                  f"(保存时 0x{oracle['value']:x}，现在 0x{current:x})")
+    print(f"\n重放 {len(summary)} 个回归向量: 通过 {len(summary) - failed}, 仍然失败 {failed}")
+    return 1 if failed else 0
+
+
+def format_params(params):
+    digits = (params['width'] + 3) // 4
+    return (f"width={params['width']} poly=0x{params['poly']:0{digits}x} init=0x{params['init']:0{digits}x} "
+            f"refin={params['refin']} refout={params['refout']} xorout=0x{params['xorout']:0{digits}x}")
+
+
+def run_fuzz(args):
+    """按批次分发到进程池，返回 (用例数, 字节数, 失败列表, 耗时)"""
+    widths = tuple(args.widths)
+    deadline = time.perf_counter() + args.seconds if args.seconds else None
+    n_batches = -(-args.cases // args.batch_size)
+    total = total_bytes = 0
+    failures = []
+    start = time.perf_counter()
+    next_index = 0
+    pending = set()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        while True:
+            # 保持每个进程有几个批次在途，时间预算用完或失败数达到上限时不再提交
+            stop = (len(failures) >= args.max_failures
+                    or (deadline is not None and time.perf_counter() >= deadline))
+            while not stop and next_index < n_batches and len(pending) < args.workers * 4:
+                task = (args.seed, next_index, args.batch_size, widths,
+                        args.min_length, args.max_length, tuple(args.backends))
+                pending.add(executor.submit(fuzz_batch, task))
+                next_index += 1
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                count, nbytes, batch_failures = future.result()
+                total += count
+                total_bytes += nbytes
+                failures.extend(batch_failures)
+    return total, total_bytes, failures[:args.max_failures], time.perf_counter() - start
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='CRC差分模糊测试')
+    parser.add_argument('--cases', type=int, default=1000000, help='用例总数')
+    parser.add_argument('--seconds', type=float, default=None, help='时间预算(秒)，到时后不再提交新批次')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='每批用例数(每批一个随机配置)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='并行进程数')
+    parser.add_argument('--seed', type=int, default=None, help='随机数种子(可选，未指定时随机选取并打印)')
+    parser.add_argument('--widths', type=int, nargs='+', default=list(CRCMOD_WIDTHS),
+                        help='随机选择的CRC位宽(8-128)，crcmod 不支持的位宽以逐位通用实现为参考')
+    parser.add_argument('--min-length', type=int, default=0, help='数据最小长度(字节)')
+    parser.add_argument('--max-length', type=int, default=64, help='数据最大长度(字节)')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=['table'],
+                        help='与参考实现比较的实现(generic 较慢)')
+    parser.add_argument('--max-failures', type=int, default=10, help='失败用例数达到该值时停止')
+    parser.add_argument('--shrink-budget', type=int, default=SHRINK_BUDGET, help='每个失败用例收缩时的最大尝试次数')
+    parser.add_argument('--output-dir', type=str, default=DEFAULT_OUTPUT_DIR, help='回归向量输出目录')
+    parser.add_argument('--replay', type=str, default=None, metavar='DIR',
+                        help='重放该目录中保存的回归向量(使用保存时的被测实现)，不进行模糊测试')
+    args = parser.parse_args(argv)
+    invalid = [w for w in args.widths if not 8 <= w <= MAX_WIDTH]
+    if invalid:
+        parser.error(f"不支持的CRC位宽 {invalid}，位宽范围为 8-{MAX_WIDTH}")
+    if not 0 <= args.min_length <= args.max_length:
+        parser.error("数据长度范围无效")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.replay:
+        return replay(args.replay)
+    if args.seed is None:
+        args.seed = random.randrange(2**32)
+    print(f"使用随机种子: {args.seed}")
+    print(f"差分模糊测试: 位宽 {args.widths}, 数据 {args.min_length}-{args.max_length} 字节, "
+          f"实现 {args.backends}, {args.workers} 个进程")
+
+    total, total_bytes, failures, elapsed = run_fuzz(args)
+    rate = total / elapsed if elapsed else 0.0
+    print(f"完成 {total} 个用例 ({total_bytes} 字节), {elapsed:.2f}s, "
+          f"{rate:.0f} 用例/秒 ({rate * 60 / 1e6:.2f} 百万用例/分钟)")
+    if not failures:
+        print("✓ 未发现不一致")
+        return 0
+
+    print(f"\n✗ 发现 {len(failures)} 个失败用例，开始收缩...")
+    saved = set()
+    for failure in failures:
+        data = bytes.fromhex(failure['data'])
+        params, data, tries = shrink(failure['params'], data, failure['kind'], args.backends,
+                                     args.widths, args.shrink_budget)
+        # 多个失败收缩成同一个最小用例时只保存一次
+        key = (tuple(sorted(params.items())), data)
+        if key in saved:
+            print(f"\n  [{failure['kind']}] 批次 #{failure['batch']}: 与已保存的回归向量相同")
+            continue
+        saved.add(key)
+        final = check_case(params, data, args.backends) or failure
+        config_id = save_regression(params, data, dict(failure, results=final['results']), args.output_dir,
+                                    args.backends)
+        print(f"\n  [{failure['kind']}] 批次 #{failure['batch']}: {len(failure['data']) // 2} 字节 -> "
+              f"{len(data)} 字节 ({tries} 次尝试)")
+        print(f"    配置: {format_params(params)}")
+        print(f"    数据: {data.hex(' ').upper() or '(空)'}")
+        if final['results']:
+            print(f"    结果: {', '.join(f'{name}=0x{value:x}' for name, value in final['results'].items())}")
+        if final.get('error'):
+            print(f"    错误: {final['error']}")
+        print(f"    已保存为回归向量 c{config_id}_t1")
+    print(f"\n回归向量保存在: {args.output_dir}")
+    print(f"重放: python python_model/scr/crc_fuzz.py --replay {args.output_dir}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
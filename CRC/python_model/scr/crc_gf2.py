@@ -0,0 +1,114 @@
+"""
+GF(2) 运算工具
+CRC 对输入是仿射的，覆盖率求解、参数逆向等工具都基于这里的线性代数和多项式运算
+"""
+
+
+def solve_linear(columns, target):
+    """求解 GF(2) 线性方程组
+
+    columns[i] 为第 i 个未知位对应的列向量(整数位图)，返回掩码 x，
+    使 columns 中 x 置位的列异或结果等于 target；无解时返回 None
+    """
+    basis = {}  # 主元位 -> (向量, 组合掩码)
+    for i, column in enumerate(columns):
+        vector, combo = column, 1 << i
+        while vector:
+            pivot = vector.bit_length() - 1
+            if pivot not in basis:
+                basis[pivot] = (vector, combo)
+                break
+            vector ^= basis[pivot][0]
+            combo ^= basis[pivot][1]
+
+    vector, combo = target, 0
+    while vector:
+        pivot = vector.bit_length() - 1
+        if pivot not in basis:
+            return None
+        vector ^= basis[pivot][0]
+        combo ^= basis[pivot][1]
+    return combo
+
+
+def clmul(a, b):
+    """无进位乘法(GF(2)多项式乘法)"""
+    if a.bit_length() < b.bit_length():
+        a, b = b, a
+    result = 0
+    while b:
+        if b & 1:
+            result ^= a
+        a <<= 1
+        b >>= 1
+    return result
+
+
+def poly_mulmod(a, b, poly, width):
+    """计算 a(x)·b(x) mod P(x)，P 为去掉隐式最高位 x^width 的生成多项式"""
+    top = 1 << width
+    mask = top - 1
+    result = 0
+    for bit in range(b.bit_length() - 1, -1, -1):
+        # 先乘 x 再按位累加(Horner法)
+        result <<= 1
+        if result & top:
+            result = (result ^ poly) & mask
+        if (b >> bit) & 1:
+            result ^= a
+    return result
+
+
+def poly_xpow_mod(exponent, poly, width):
+    """计算 x^exponent mod P(x)(平方-乘法)"""
+    result = 1
+    base = 2  # x mod P (width > 1)
+    while exponent:
+        if exponent & 1:
+            result = poly_mulmod(result, base, poly, width)
+        base = poly_mulmod(base, base, poly, width)
+        exponent >>= 1
+    return result
+
+
+def rank(vectors):
+    """返回 GF(2) 向量组(整数位图)的秩"""
+    basis = {}
+    for vector in vectors:
+        while vector:
+            pivot = vector.bit_length() - 1
+            if pivot not in basis:
+                basis[pivot] = vector
+                break
+            vector ^= basis[pivot]
+    return len(basis)
+
+
+def poly_mod(a, b):
+    """多项式取余 a(x) mod b(x)，系数在 GF(2) 上，最高位不隐含"""
+    degree = b.bit_length() - 1
+    if degree < 0:
+        raise ZeroDivisionError("多项式除数为0")
+    while a.bit_length() - 1 >= degree:
+        a ^= b << (a.bit_length() - 1 - degree)
+    return a
+
+
+def poly_divmod(a, b):
+    """多项式带余除法，返回 (商, 余式)"""
+    degree = b.bit_length() - 1
+    if degree < 0:
+        raise ZeroDivisionError("多项式除数为0")
+    quotient = 0
+    while a.bit_length() - 1 >= degree:
+        shift = a.bit_length() - 1 - degree
+        quotient |= 1 << shift
+        a ^= b << shift
+    return quotient, a
+
+
+def poly_gcd(a, b):
+    """多项式最大公因式"""
+    while b:
+        a, b = b, poly_mod(a, b)
+    return a
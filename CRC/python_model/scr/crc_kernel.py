@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+按配置特化的CRC计算内核
+根据 CrcModel 生成专用的Python函数源码：位宽、掩码、移位量和反转方向都作为常量内联，
+主循环按4或8字节展开(切片查表，每次循环读取一个字)，不再在逐字节循环中判断 refin 或重新计算掩码；
+生成的源码按配置缓存在磁盘上，之后的进程直接导入(同时复用 .pyc)
+"""
+import os
+import re
+import sys
+import hashlib
+import argparse
+import importlib.util
+from array import array
+from pathlib import Path
+from crc_profile import count
+
+# 生成器版本，修改生成的源码格式时递增，旧缓存自动失效
+KERNEL_VERSION = 2
+
+# 支持的展开次数(每次循环处理的字节数)及对应的 array 类型码
+UNROLLS = (1, 4, 8)
+_WORD_CODES = {4: 'I' if array('I').itemsize == 4 else 'L', 8: 'Q'}
+
+# 默认缓存目录，可用环境变量 CRC_KERNEL_CACHE 覆盖
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent.absolute() / '.kernel_cache'
+
+# 进程内缓存：(模型参数, 展开次数) -> 函数
+_kernels = {}
+
+
+def slicing_tables(model, count):
+    """返回 count 张切片查找表：第 k 张表为单字节后接 k 个零字节的寄存器贡献(取自共享表存储)"""
+    from crc_table_store import default_store
+    return [tuple(table) for table in default_store().get(model, count).tables]
+
+
+def _byte_step(model):
+    """返回单字节更新的语句"""
+    if model.width == 8:
+        return "crc = t0[crc ^ b]"
+    if model.refin:
+        return "crc = (crc >> 8) ^ t0[(crc ^ b) & 0xFF]"
+    return f"crc = ((crc << 8) & {model.mask:#x}) ^ t0[(crc >> {model.width - 8}) ^ b]"
+
+
+def _word_step(model, unroll):
+    """返回一次处理 unroll 个字节(一个字)的语句"""
+    width, bits = model.width, 8 * unroll
+    lines = []
+    terms = []
+    if model.refin:
+        # 小端字：第 j 个字节位于第 8j 位，使用第 unroll-1-j 张表
+        lines.append("v = crc ^ w")
+        if width > bits:
+            terms.append(f"(v >> {bits})")
+        for j in range(unroll):
+            index = f"v >> {8 * j}" if j else "v"
+            if j < unroll - 1 or width > bits:
+                index = f"({index}) & 0xFF" if j else "v & 0xFF"
+            terms.append(f"t{unroll - 1 - j}[{index}]")
+    else:
+        # 大端字：第 j 个字节位于最高端，寄存器与字左对齐后异或
+        if width > bits:
+            lines.append(f"v = (crc >> {width - bits}) ^ w")
+            terms.append(f"((crc << {bits}) & {model.mask:#x})")
+        elif width < bits:
+            lines.append(f"v = (crc << {bits - width}) ^ w")
+        else:
+            lines.append("v = crc ^ w")
+        for j in range(unroll):
+            shift = 8 * (unroll - 1 - j)
+            index = f"v >> {shift}" if shift else "v"
+            if j:
+                index = f"({index}) & 0xFF" if shift else "v & 0xFF"
+            terms.append(f"t{unroll - 1 - j}[{index}]")
+    lines.append("crc = " + " ^ ".join(terms))
+    return lines
+
+
+def kernel_source(model, unroll=4):
+    """生成特化内核的源码；unroll 为每次循环处理的字节数(切片查表)"""
+    if unroll not in UNROLLS:
+        raise ValueError(f"不支持的展开次数: {unroll}")
+    width = model.width
+    # refin 时寄存器保持反转形式
+    init = int(format(model.init, f'0{width}b')[::-1], 2) if model.refin else model.init
+    tables = slicing_tables(model, unroll)
+    lines = [
+        f'"""自动生成的CRC内核: {model!r}"""',
+        f"# 生成器版本 {KERNEL_VERSION}，请勿手工修改",
+        "import sys",
+        "from array import array",
+        "",
+    ]
+    lines.extend(f"T{k} = {table!r}" for k, table in enumerate(tables))
+    if unroll > 1:
+        # 反转模式按小端读取字，非反转模式按大端读取字
+        order = 'big' if model.refin else 'little'
+        lines.append(f"SWAP = sys.byteorder == {order!r}")
+    args = ", ".join(f"t{k}=T{k}" for k in range(unroll))
+    lines.extend([
+        "",
+        "",
+        f"def crc_kernel(data, {args}):",
+        "    data = bytes(data)",
+        f"    crc = {init:#x}",
+    ])
+    if unroll > 1:
+        lines.extend([
+            f"    end = len(data) - len(data) % {unroll}",
+            f"    words = array({_WORD_CODES[unroll]!r}, data[:end])",
+            "    if SWAP:",
+            "        words.byteswap()",
+            "    for w in words:",
+        ])
+        lines.extend(f"        {line}" for line in _word_step(model, unroll))
+        lines.append("    for b in data[end:]:")
+    else:
+        lines.append("    for b in data:")
+    lines.append(f"        {_byte_step(model)}")
+    # 最终的输出反转方向在生成时确定
+    if model.refin != model.refout:
+        lines.append(f"    crc = int(format(crc, '0{width}b')[::-1], 2)")
+    lines.append(f"    return crc ^ {model.xorout:#x}")
+    return '\n'.join(lines) + '\n'
+
+
+def kernel_key(model, unroll):
+    """缓存键：生成器版本 + 配置参数 + 展开次数"""
+    text = f"{KERNEL_VERSION}:{model.key()}:{unroll}"
+    return hashlib.sha256(text.encode()).hexdigest()[:20]
+
+
+def get_kernel(model, unroll=4, cache_dir=None):
+    """返回模型对应的特化内核函数 kernel(data) -> crc"""
+    memo_key = (model.key(), unroll)
+    kernel = _kernels.get(memo_key)
+    if kernel is not None:
+        count('kernel_cache.hit')
+        return kernel
+
+    cache_dir = Path(cache_dir or os.environ.get('CRC_KERNEL_CACHE') or DEFAULT_CACHE_DIR)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    name = f"crc_kernel_{kernel_key(model, unroll)}"
+    path = cache_dir / f"{name}.py"
+    if path.exists():
+        count('kernel_cache.disk')
+    else:
+        count('kernel_cache.miss')
+        # 先写临时文件再原子重命名，多个进程同时生成也不会读到半个文件
+        tmp_path = cache_dir / f"{name}.{os.getpid()}.tmp"
+        tmp_path.write_text(kernel_source(model, unroll), encoding='utf-8')
+        os.replace(tmp_path, path)
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    kernel = module.crc_kernel
+    _kernels[memo_key] = kernel
+    return kernel
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='生成按配置特化的CRC内核')
+    parser.add_argument('config', help='配置文件路径或标准模型名称')
+    parser.add_argument('--unroll', type=int, choices=UNROLLS, default=4, help='循环展开次数')
+    parser.add_argument('--print', action='store_true', help='打印生成的源码(不含查找表)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from crc_config import get_model
+    args = parse_args(argv)
+    model = get_model(args.config)
+    kernel = get_kernel(model, args.unroll)
+    if args.print:
+        source = kernel_source(model, args.unroll)
+        print('\n'.join(line for line in source.splitlines() if not re.match(r'T\d+ = ', line)))
+    status = "✓" if kernel(b"123456789") == model.check else "✗"
+    print(f"{status} {model!r} 展开 {args.unroll}: check=0x{kernel(b'123456789'):X}")
+    return 0 if status == "✓" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
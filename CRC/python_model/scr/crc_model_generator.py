@@ -2,22 +2,33 @@
 软件算法CRC配置和测试数据生成器
 """
 import os
+import sys
 import random
 import argparse
 import json
 from pathlib import Path
+from crc_config import MAX_WIDTH
+from crc_vector_engine import generate_vectors
 
-def parse_args():
+def parse_args(argv=None):
     """解析命令行参数"""
     parser = argparse.ArgumentParser(description='生成软件CRC配置和测试数据')
     parser.add_argument('--n-configs', type=int, default=4, help='软件配置数量')
     parser.add_argument('--n-tests', type=int, default=5, help='每个配置要生成的测试数量')
     parser.add_argument('--min-length', type=int, default=3, help='测试数据最小长度(字节)')
     parser.add_argument('--max-length', type=int, default=100, help='测试数据最大长度(字节)')
-    parser.add_argument('--seed', type=int, default=None, help='随机数种子(可选)')
+    parser.add_argument('--widths', type=int, nargs='+', default=[8, 16, 32],
+                      help='随机选择的CRC位宽(8-128)')
+    parser.add_argument('--seed', type=int, default=None, help='随机数种子(可选，未指定时随机选取并打印)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='生成测试数据的并行进程数')
+    parser.add_argument('--shard-size', type=int, default=1000, help='每个生成分片的测试数量')
     parser.add_argument('--output-dir', type=str, default='./dataset/Test_Algorithm', 
                       help='输出目录')
-    return parser.parse_args()
+    args = parser.parse_args(argv)
+    invalid = [w for w in args.widths if not 8 <= w <= MAX_WIDTH]
+    if invalid:
+        parser.error(f"不支持的CRC位宽 {invalid}，位宽范围为 8-{MAX_WIDTH}")
+    return args
 
 def generate_polynomial(width):
     """生成随机CRC多项式"""
@@ -31,10 +42,9 @@ def generate_polynomial(width):
     
     return poly
 
-def generate_software_config():
+def generate_software_config(widths=(8, 16, 32)):
     """生成软件测试用的CRC配置（使用单个rev参数）"""
-    common_widths = [8, 16, 32]
-    width = random.choice(common_widths)
+    width = random.choice(widths)
     
     polynomial = generate_polynomial(width)
     
@@ -64,27 +74,14 @@ def save_json_config(config, config_id, python_dir):
         json.dump(python_config, f, indent=2, ensure_ascii=False)
     return python_path
 
-def generate_test_data(min_length, max_length):
-    """生成随机测试数据"""
-    length = random.randint(min_length, max_length)
-    data = [random.randint(0, 255) for _ in range(length)]
-    return data
-
-def save_test_data(data, config_id, test_id, input_dir):
-    """保存测试数据为16进制格式"""
-    output_path = os.path.join(input_dir, f"test_data_c{config_id}_t{test_id}.dat")
-    # 将整数数组转换为16进制字符串并保存
-    hex_data = ' '.join([f"{byte:02X}" for byte in data])
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(hex_data)
-    return output_path
-
-def main():
-    args = parse_args()
+def main(argv=None):
+    args = parse_args(argv)
     
-    if args.seed is not None:
-        random.seed(args.seed)
-        print(f"使用随机种子: {args.seed}")
+    # 测试向量由种子确定性派生，未指定种子时随机选取一个，保证结果可以复现
+    if args.seed is None:
+        args.seed = random.randrange(2**32)
+    random.seed(args.seed)
+    print(f"使用随机种子: {args.seed}")
     
     # 确保输出目录存在
     dirs = {
@@ -108,7 +105,7 @@ def main():
         print(f"\n生成软件CRC配置 #{config_id}...")
         
         # 生成软件CRC配置
-        config = generate_software_config()
+        config = generate_software_config(args.widths)
         
         # 保存配置
         python_path = save_json_config(
@@ -130,25 +127,25 @@ def main():
             "python_config": os.path.basename(python_path)
         }
         
-        # 为配置生成测试数据
-        print(f"  生成测试数据...")
-        for test_id in range(1, args.n_tests + 1):
-            data = generate_test_data(args.min_length, args.max_length)
-            data_path = save_test_data(data, config_id, test_id, dirs["input"])
-            
-            tests.append({
-                "config_id": config_id,
-                "config_type": "software",
-                "test_id": test_id,
-                "length": len(data),
-                "file": os.path.basename(data_path)
-            })
-            
-            print(f"    测试 #{test_id}: {len(data)} 字节 -> {os.path.basename(data_path)}")
-        
         # 增加配置ID
         config_id += 1
     
+    # 按 (配置, 测试区间) 分片并行生成全部测试数据
+    print(f"\n生成测试数据 ({args.workers} 个进程)...")
+    records = generate_vectors(list(configs), args.n_tests, args.min_length, args.max_length,
+                               args.seed, dirs["input"], layout='algorithm',
+                               workers=args.workers, shard_size=args.shard_size)
+    for cid, test_id, length, filename in records:
+        tests.append({
+            "config_id": cid,
+            "config_type": "software",
+            "test_id": test_id,
+            "length": length,
+            "file": filename
+        })
+        
+        print(f"  配置 #{cid} 测试 #{test_id}: {length} 字节 -> {filename}")
+    
     # 保存摘要
     summary = {
         "configs": configs,
@@ -166,6 +163,7 @@ def main():
     print(f"摘要已保存至: {summary_path}")
     print(f"配置文件保存在: {dirs['python_config']}")
     print(f"测试数据保存在: {dirs['input']}")
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -1,18 +1,32 @@
 import os
 import glob
-import json
-import crcmod
+import sys
+import time
 import argparse
-from CRC import calculate_crc
+from CRC import calculate_crc, reverse_bits
+from crc_config import CrcModel, load_config
+from crc_result_cache import ResultCache, write_if_changed
+from crc_profile import span, timed, count, record, snapshot
+import crc_profile
 
 
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description='验证CRC计算结果')
     parser.add_argument('--config-dir', type=str, default='./python_model/settings', help='Python配置目录')
     parser.add_argument('--input-dir', type=str, default='./dataset/Test_Algorithm/input', help='输入数据目录')
     parser.add_argument('--output-dir', type=str, default='./dataset/Test_Algorithm/output', help='输出结果目录')
+    parser.add_argument('--cache', type=str, default='./dataset/.cache/result_cache.sqlite', help='结果缓存文件')
+    parser.add_argument('--cache-size', type=int, default=1000000, help='结果缓存最大条目数')
+    parser.add_argument('--no-cache', action='store_true', help='不使用结果缓存')
+    parser.add_argument('--results-db', type=str, default=None, help='将结果写入SQLite结果库(不再逐用例写文件)')
+    parser.add_argument('--export-files', action='store_true', help='使用结果库时仍导出逐用例结果文件')
+    parser.add_argument('--stream', action='store_true', help='流式验证(读取、计算和写出重叠进行，内存占用有界)')
+    parser.add_argument('--in-flight', type=int, default=4096, help='流式验证时在途用例数上限')
+    parser.add_argument('--workers', type=int, default=None, help='流式验证的计算线程/进程数')
+    parser.add_argument('--pool', choices=('thread', 'process'), default='thread', help='流式验证的计算执行器')
     parser.add_argument('--verbose', action='store_true', help='显示详细信息')
-    return parser.parse_args()
+    crc_profile.add_arguments(parser)
+    return parser.parse_args(argv)
 
 def load_configs(config_dir):
     """加载所有CRC配置文件"""
@@ -20,100 +34,164 @@ def load_configs(config_dir):
     config_files = glob.glob(os.path.join(config_dir, 'crc_config_*.json'))
     
     for cfg_file in config_files:
-        with open(cfg_file, 'r') as f:
-            config = json.load(f)
-            # 正确提取配置ID（匹配crc_config_1.json中的1）
-            config_id = os.path.basename(cfg_file).split('_')[2].split('.')[0]
-            config['id'] = config_id
-            configs.append(config)
-            print(f"加载配置: {config_id}:{config['width']}位CRC")
+        model = load_config(cfg_file)
+        # 正确提取配置ID（匹配crc_config_1.json中的1）
+        config_id = os.path.basename(cfg_file).split('_')[2].split('.')[0]
+        configs.append({'id': config_id, 'model': model})
+        print(f"加载配置: {config_id}:{model.width}位CRC")
     return configs
 
+def parse_test_file(data_file):
+    """读取一个测试数据文件，文件名格式不正确时返回 None"""
+    # 解析文件名格式: test_data_c1_t2.dat
+    filename = os.path.basename(data_file)
+    parts = filename[:-4].split('_')  # 移除.dat扩展名后分割
+    
+    # 确保格式正确且包含足够的部分
+    if len(parts) >= 4 and parts[0] == "test" and parts[1] == "data":
+        config_id = parts[2][1:]  # 提取c1中的1
+        test_id = parts[3][1:]    # 提取t2中的2
+    else:
+        print(f"警告: 跳过无效文件名格式 {filename}")
+        return None
+
+    with open(data_file, 'r', encoding='utf-8') as f:
+        # 假设文件包含用空格分隔的十六进制值
+        hex_str = f.read().strip()
+        # 解析十六进制值到整数列表
+        data = [int(x, 16) for x in hex_str.split()]
+        # 创建对应的bytes对象
+        raw_bytes = bytes(data)
+        
+    return {
+        'config_id': config_id,
+        'test_id': test_id,
+        'data': data,          # 整数列表 [1, 2, 3]
+        'raw_data': raw_bytes  # bytes对象 b'\x01\x02\x03'
+    }
+
 def load_test_data(input_dir):
     """加载所有测试数据"""
     test_cases = []
     for data_file in glob.glob(os.path.join(input_dir, 'test_data_*.dat')):
-        # 解析文件名格式: test_data_c1_t2.dat
-        filename = os.path.basename(data_file)
-        parts = filename[:-4].split('_')  # 移除.dat扩展名后分割
-        
-        # 确保格式正确且包含足够的部分
-        if len(parts) >= 4 and parts[0] == "test" and parts[1] == "data":
-            config_id = parts[2][1:]  # 提取c1中的1
-            test_id = parts[3][1:]    # 提取t2中的2
-        else:
-            print(f"警告: 跳过无效文件名格式 {filename}")
+        test_case = parse_test_file(data_file)
+        if test_case is None:
             continue
-
-        with open(data_file, 'r', encoding='utf-8') as f:
-            # 假设文件包含用空格分隔的十六进制值
-            hex_str = f.read().strip()
-            # 解析十六进制值到整数列表
-            data = [int(x, 16) for x in hex_str.split()]
-            # 创建对应的bytes对象
-            raw_bytes = bytes(data)
-            
-        test_cases.append({
-            'config_id': config_id,
-            'test_id': test_id,
-            'data': data,          # 整数列表 [1, 2, 3]
-            'raw_data': raw_bytes  # bytes对象 b'\x01\x02\x03'
-        })
-        print(f"已加载测试用例 {filename} (配置: {config_id}, 测试: {test_id}, {len(data)}字节)")
+        test_cases.append(test_case)
+        print(f"已加载测试用例 {os.path.basename(data_file)} (配置: {test_case['config_id']}, "
+              f"测试: {test_case['test_id']}, {len(test_case['data'])}字节)")
     return test_cases
 
 
-def validate_crc(config, test_case):
-    width = config['width']
-    poly = config['poly']
-    init = config['init']
-    rev = config['rev']
-    xorout = config['xorout']
+# 参考函数按模型缓存，避免每个测试都重新生成crcmod查找表
+_reference_functions = {}
+
+# crcmod支持的位宽，其他位宽(如CRC-40、CRC-82、CRC-128)使用查表模型作为参考
+CRCMOD_WIDTHS = (8, 16, 24, 32, 64)
+
+def reference_crc_function(model):
+    """创建与模型参数一致的crcmod参考函数
     
-    # 创建crcmod标准函数（使用字节数组输入）
-    crc_func = crcmod.mkCrcFun(
-        poly,
-        initCrc=init,
-        rev=rev,
-        xorOut=xorout)
+    crcmod只有一个rev参数，且initCrc表示空输入时的结果：
+    这里以 rev=refin、xorOut=0 计算，输出反转方式不同时再反转结果，最后异或xorout
+    """
+    func = _reference_functions.get(model)
+    if func is not None:
+        count('reference_cache.hit')
+        return func
+    count('reference_cache.miss')
+    if model.width not in CRCMOD_WIDTHS:
+        count('backend.reference.table')
+        func = _reference_functions[model] = model.compute
+    else:
+        count('backend.reference.crcmod')
+        # crcmod 只在需要参考函数时导入，不影响只计算CRC的命令的启动时间
+        import crcmod
+        width = model.width
+        init = reverse_bits(model.init, width) if model.refin else model.init
+        crc_func = crcmod.mkCrcFun(
+            model.poly | (1 << width),
+            initCrc=init,
+            rev=model.refin,
+            xorOut=0)
+        xorout = model.xorout
+        if model.refin == model.refout:
+            func = lambda data: crc_func(data) ^ xorout
+        else:
+            func = lambda data: reverse_bits(crc_func(data), width) ^ xorout
+        _reference_functions[model] = func
+    return func
+
+def validate_crc(config, test_case, cache=None):
+    model = config['model']
     
-    # 使用相应数据格式调用函数
-    #print(test_case['data'])
-    #print(test_case['raw_data'])
-    custom_crc = calculate_crc(test_case['data'], width, poly, init, rev, rev, xorout)
-    official_crc = crc_func(test_case['raw_data'])
+    start = time.perf_counter()
+    count('bytes', len(test_case['raw_data']))
     
-    # 生成十六进制字符串表示
-    custom_hex = f"0x{custom_crc:X}"
-    official_hex = f"0x{official_crc:X}"
+    # 先查询结果缓存，命中时跳过计算
+    cached = None
+    if cache is not None:
+        key = cache.key(model, test_case['raw_data'])
+        cached = cache.get(key)
     
+    if cached is not None and cached['reference'] is not None:
+        custom_crc = cached['model']
+        official_crc = cached['reference']
+    else:
+        # crcmod标准函数（使用字节数组输入）
+        crc_func = reference_crc_function(model)
+        
+        # 使用相应数据格式调用函数
+        if cached is not None:
+            custom_crc = cached['model']
+        else:
+            count('backend.model.generic')
+            custom_crc = timed('compute', calculate_crc, test_case['data'], model.width, model.poly,
+                               model.init, model.refin, model.refout, model.xorout)
+        official_crc = timed('reference', crc_func, test_case['raw_data'])
+        if cache is not None:
+            cache.put(key, custom_crc, official_crc)
+    
+    return make_result(test_case, custom_crc, official_crc, (time.perf_counter() - start) * 1e6)
+
+def make_result(test_case, custom_crc, official_crc, elapsed_us):
+    """生成单个用例的结果字典"""
     return {
         'config_id': test_case['config_id'],
         'test_id': test_case['test_id'],
         'custom': custom_crc,
         'official': official_crc,
-        'custom_hex': custom_hex,         # 添加十六进制字符串表示
-        'official_hex': official_hex,     # 添加十六进制字符串表示
-        'match': custom_crc == official_crc
+        'custom_hex': f"0x{custom_crc:X}",       # 十六进制字符串表示
+        'official_hex': f"0x{official_crc:X}",   # 十六进制字符串表示
+        'match': custom_crc == official_crc,
+        'length': len(test_case['data']),
+        'elapsed_us': elapsed_us
     }
 
-def save_results(results, output_dir):
-    """保存验证结果到文件"""
+def save_results(results, output_dir, per_file=True):
+    """保存验证结果到文件，per_file 为 False 时只生成总结报告"""
     os.makedirs(output_dir, exist_ok=True)
     
-    # 保存每个测试用例的结果
-    for result in results:
-        filename = f"result_c{result['config_id']}_t{result['test_id']}.dat"
-        with open(os.path.join(output_dir, filename), 'w') as f:
-            f.write(f"Custom CRC: 0x{result['custom']:X}\n")
-            f.write(f"Official CRC: 0x{result['official']:X}\n")
-            f.write(f"Match: {result['match']}\n")
+    # 保存每个测试用例的结果（内容未变化的文件不重写）
+    with span('write', files=len(results) if per_file else 0):
+        for result in results if per_file else ():
+            write_result_file(result, output_dir)
     
     # 生成总结报告
+    write_summary(output_dir, len(results), sum(1 for r in results if r['match']),
+                  [r for r in results if not r['match']])
+
+def write_result_file(result, output_dir):
+    """保存单个用例的结果文件（内容未变化时不重写）"""
+    filename = f"result_c{result['config_id']}_t{result['test_id']}.dat"
+    write_if_changed(os.path.join(output_dir, filename),
+                     f"Custom CRC: 0x{result['custom']:X}\n"
+                     f"Official CRC: 0x{result['official']:X}\n"
+                     f"Match: {result['match']}\n")
+
+def write_summary(output_dir, total, matches, mismatch_results):
+    """生成总结报告"""
     report_path = os.path.join(output_dir, 'summary_report.txt')
-    total = len(results)
-    matches = sum(1 for r in results if r['match'])
-    
     with open(report_path, 'w') as f:
         f.write("CRC Validation Summary\n")
         f.write("======================\n")
@@ -125,14 +203,183 @@ def save_results(results, output_dir):
         # 记录不匹配的用例
         if total - matches > 0:
             f.write("\nMismatch Details:\n")
-            for res in filter(lambda x: not x['match'], results):
+            for res in mismatch_results:
                 f.write(f"Config {res['config_id']} Test {res['test_id']}:\n")
                 f.write(f"  Custom: 0x{res['custom']:X}\n")
                 f.write(f"  Official: 0x{res['official']:X}\n\n")
 
-def main():
-    args = parse_args()
+def print_summary(total, matched, mismatch_results, output_dir):
+    """打印验证总结"""
+    mismatched = total - matched
+    print("\n" + "="*50)
+    print("CRC验证完成!")
+    print(f"总测试数: {total}")
+    print(f"匹配: {matched}")
+    print(f"不匹配: {mismatched}")
+    if total > 0:
+        print(f"成功率: {matched/total*100:.2f}%")
+    
+    # 如果有不匹配的结果，特别显示
+    if mismatched > 0:
+        print("\n不匹配的测试:")
+        for res in mismatch_results:
+            print(f"  配置 #{res['config_id']} 测试 #{res['test_id']}")
+            print(f"    自定义: {res['custom_hex']}")
+            print(f"    官方库: {res['official_hex']}")
+    
+    print("="*50)
+    print(f"详细结果已保存到: {output_dir}")
+
+# 流式验证时每处理该数量的用例把结果缓存写入数据库
+CACHE_FLUSH_INTERVAL = 10000
+
+# 工作进程中的模型缓存：参数元组 -> CrcModel；流水线每批只传递参数元组，
+# 模型和参考函数在每个工作进程中只创建一次
+_worker_models = {}
+
+def _worker_model(key):
+    model = _worker_models.get(key)
+    if model is None:
+        model = _worker_models[key] = CrcModel(*key)
+    return model
+
+def compute_case(keys, profile, path, test_case):
+    """流水线计算阶段：计算单个用例(可在工作进程中执行)
+    
+    keys 为 配置ID -> 模型参数元组；工作进程中的计数器和计时区间不会回到主进程，
+    profile 为真时把计时放在结果的 'timings' 中，由主进程的 collect 记录
+    """
+    start = time.perf_counter()
+    model = _worker_model(keys[test_case['config_id']])
+    custom_crc = calculate_crc(test_case['data'], model.width, model.poly,
+                               model.init, model.refin, model.refout, model.xorout)
+    computed = time.perf_counter()
+    official_crc = reference_crc_function(model)(test_case['raw_data'])
+    end = time.perf_counter()
+    result = make_result(test_case, custom_crc, official_crc, (end - start) * 1e6)
+    if profile:
+        result['timings'] = (os.getpid(), start, computed, end)
+    return result
+
+def stream_validation(args, configs):
+    """用 crc_pipeline 流式验证全部测试文件，只保留计数和不匹配的用例"""
+    from functools import partial
+    from crc_pipeline import iter_files, make_executor, run, format_stats
+    
+    by_id = {config['id']: config for config in configs}
+    keys = {config_id: config['model'].key() for config_id, config in by_id.items()}
+    per_file = not args.results_db or args.export_files
+    os.makedirs(args.output_dir, exist_ok=True)
+    cache = None if args.no_cache else ResultCache(args.cache, args.cache_size)
+    store = run_id = None
+    if args.results_db:
+        from crc_result_store import ResultStore
+        store = ResultStore(args.results_db)
+        run_id = store.start_run('algorithm')
+    counts = {'total': 0, 'matched': 0, 'unflushed': 0}
+    mismatch_results = []
+    
+    def read(path):
+        try:
+            test_case = timed('load', parse_test_file, path)
+        except Exception as e:
+            print(f"错误: 读取测试数据失败 {path}: {e}")
+            return None
+        if test_case is not None and test_case['config_id'] not in by_id:
+            print(f"  警告: 测试 {os.path.basename(path)} 没有对应的配置")
+            return None
+        return test_case
     
+    def lookup(path, test_case):
+        if cache is None:
+            return None
+        model = by_id[test_case['config_id']]['model']
+        test_case['cache_key'] = cache.key(model, test_case['raw_data'])
+        cached = cache.get(test_case['cache_key'])
+        if cached is None or cached['reference'] is None:
+            return None
+        result = make_result(test_case, cached['model'], cached['reference'], 0.0)
+        result['cached'] = True
+        return result
+    
+    def collect(records):
+        for path, test_case, result in records:
+            counts['total'] += 1
+            if result['match']:
+                counts['matched'] += 1
+            else:
+                mismatch_results.append(result)
+            if args.verbose or not result['match']:
+                status = "✓ 匹配" if result['match'] else "✗ 不匹配"
+                print(f"  配置 #{result['config_id']} 测试 #{result['test_id']}: {status}")
+            if result.get('cached'):
+                continue
+            count('bytes', result['length'])
+            count('backend.model.generic')
+            timings = result.pop('timings', None)
+            if timings is not None:
+                pid, start, computed, end = timings
+                record('compute', start, computed, pid)
+                record('reference', computed, end, pid)
+            if cache is not None:
+                cache.put(test_case['cache_key'], result['custom'], result['official'])
+        if store is not None:
+            store.add_results(run_id, ({
+                'config_id': r['config_id'],
+                'test_id': r['test_id'],
+                'length': r['length'],
+                'model_crc': r['custom'],
+                'reference_crc': r['official'],
+                'match': r['match'],
+                'elapsed_us': r['elapsed_us'],
+            } for _, _, r in records))
+        counts['unflushed'] += len(records)
+        if cache is not None and counts['unflushed'] >= CACHE_FLUSH_INTERVAL:
+            cache.flush()
+            counts['unflushed'] = 0
+    
+    def write(records):
+        with span('write', files=len(records)):
+            for _, _, result in records:
+                write_result_file(result, args.output_dir)
+    
+    print(f"\n开始流式CRC验证 (在途上限 {args.in_flight}, {args.pool} 执行器)...")
+    executor = make_executor(args.pool, args.workers)
+    try:
+        stats = run(iter_files(args.input_dir, 'test_data_*.dat'), read,
+                    partial(compute_case, keys, crc_profile.enabled()),
+                    lookup=lookup, collect=collect, write=write if per_file else None,
+                    in_flight=args.in_flight, executor=executor, workers=args.workers)
+    finally:
+        executor.shutdown()
+    print(format_stats(stats))
+    
+    if cache is not None:
+        cache.close()
+        count('result_cache.hit', cache.hits)
+        count('result_cache.miss', cache.misses)
+        print(f"\n{cache.stats()}")
+    if store is not None:
+        store.finish_run(run_id)
+        store.close()
+        print(f"\n结果已写入结果库: {args.results_db} (运行 #{run_id})")
+    if not counts['total']:
+        print("错误: 未能加载任何测试用例，请检查测试数据目录")
+        return 1
+    write_summary(args.output_dir, counts['total'], counts['matched'], mismatch_results)
+    print_summary(counts['total'], counts['matched'], mismatch_results, args.output_dir)
+    return 1 if mismatch_results else 0
+
+def main(argv=None):
+    args = parse_args(argv)
+    crc_profile.start(args)
+    try:
+        return validate(args)
+    finally:
+        crc_profile.finish(args)
+
+def validate(args):
+    """运行验证并返回退出码"""
     # 显示运行参数
     print("CRC验证工具启动")
     print(f"配置目录: {args.config_dir}")
@@ -140,17 +387,28 @@ def main():
     print(f"结果输出目录: {args.output_dir}")
     
     # 加载配置和测试数据
-    configs = load_configs(args.config_dir)
-    test_cases = load_test_data(args.input_dir)
+    with span('load', what='configs'):
+        configs = load_configs(args.config_dir)
     
     # 检查数据加载情况
     if not configs:
         print("错误: 未能加载任何配置文件，请检查配置目录")
-        return
+        return 1
+    
+    # 流式验证：边读取边计算边写出，内存占用与用例数无关
+    if args.stream:
+        with span('stream'):
+            return stream_validation(args, configs)
     
+    with span('load', what='test_data'):
+        test_cases = load_test_data(args.input_dir)
+    snapshot('load')
     if not test_cases:
         print("错误: 未能加载任何测试用例，请检查测试数据目录")
-        return
+        return 1
+    
+    # 打开结果缓存
+    cache = None if args.no_cache else ResultCache(args.cache, args.cache_size)
     
     # 执行验证
     print("\n开始CRC验证...")
@@ -169,7 +427,7 @@ def main():
         print(f"\n验证配置 #{config['id']} ({len(related_tests)}个测试):")
         
         for test in related_tests:
-            result = validate_crc(config, test)
+            result = validate_crc(config, test, cache)
             results.append(result)
             
             # 输出结果
@@ -187,30 +445,34 @@ def main():
             else:
                 mismatched += 1
     
+    snapshot('validate')
+    if cache is not None:
+        cache.close()
+        count('result_cache.hit', cache.hits)
+        count('result_cache.miss', cache.misses)
+        print(f"\n{cache.stats()}")
+    
     # 保存结果
     if results:
-        report_file = save_results(results, args.output_dir)
-    
-    # 打印总结
-    total = len(results)
-    print("\n" + "="*50)
-    print("CRC验证完成!")
-    print(f"总测试数: {total}")
-    print(f"匹配: {matched}")
-    print(f"不匹配: {mismatched}")
-    if total > 0:
-        print(f"成功率: {matched/total*100:.2f}%")
+        if args.results_db:
+            from crc_result_store import ResultStore
+            store = ResultStore(args.results_db)
+            run_id = store.write_run('algorithm', [{
+                'config_id': r['config_id'],
+                'test_id': r['test_id'],
+                'length': r['length'],
+                'model_crc': r['custom'],
+                'reference_crc': r['official'],
+                'match': r['match'],
+                'elapsed_us': r['elapsed_us'],
+            } for r in results])
+            store.close()
+            print(f"\n结果已写入结果库: {args.results_db} (运行 #{run_id})")
+        report_file = save_results(results, args.output_dir,
+                                   per_file=not args.results_db or args.export_files)
     
-    # 如果有不匹配的结果，特别显示
-    if mismatched > 0:
-        print("\n不匹配的测试:")
-        for res in filter(lambda x: not x['match'], results):
-            print(f"  配置 #{res['config_id']} 测试 #{res['test_id']}")
-            print(f"    自定义: {res['custom_hex']}")
-            print(f"    官方库: {res['official_hex']}")
-    
-    print("="*50)
-    print(f"详细结果已保存到: {args.output_dir}")
+    print_summary(len(results), matched, [r for r in results if not r['match']], args.output_dir)
+    return 1 if mismatched else 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
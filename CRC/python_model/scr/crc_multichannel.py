@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+多通道时分复用CRC引擎：RTL生成、Python周期模型和验证流程
+所有通道共用一个 crc_process_byte 数据通路，每个通道的寄存器保存在按 channel_id 寻址的状态RAM中；
+每个周期处理一个通道的一个操作(start/数据字节/finalize)，
+验证流程生成交织的多通道激励，用RTL仿真(或Python周期模型)运行后逐通道检查CRC
+"""
+import os
+import sys
+import glob
+import random
+import shutil
+import argparse
+from pathlib import Path
+from CRC import reverse_bits
+
+ROOT_DIR = Path(__file__).parent.parent.parent.absolute()
+SCRIPT_DIR = Path(__file__).parent.absolute()
+
+DEFAULT_RTL_PATH = ROOT_DIR / 'rtl_model' / 'src' / 'crc_multi.v'
+DEFAULT_TB_PATH = ROOT_DIR / 'rtl_model' / 'sim' / 'crc_multi_tb.v'
+DEFAULT_DATA_DIR = ROOT_DIR / 'dataset' / 'Test_Multi'
+
+SIMULATORS = {
+    "iverilog": {
+        "compile": "iverilog -I{config_dir} -I{src_dir} -o {binary} {tb}",
+        "run": "vvp {binary}",
+    },
+}
+
+RTL_TEMPLATE = """// 自动生成的多通道时分复用CRC引擎 ({channels} 通道)
+// 由 crc_rtl_generator.py --channels / crc_multichannel.py rtl 生成，请勿手工修改
+`define CRC_CHANNELS {channels}
+`define CRC_CHANNEL_BITS {channel_bits}
+`include "crc_process_byte.v"
+module crc_multi #(
+    parameter bits =8,
+    parameter poly =8'h33,
+    parameter init =8'hff,
+    parameter [0:0]refin =1'b0,
+    parameter [0:0]refout =1'b0,
+    parameter xorout =8'h00,
+    parameter channels ={channels},
+    parameter channel_bits ={channel_bits}
+)(
+    input clk,
+    input rst_n,
+    input [channel_bits-1:0] channel_id,  // 本周期操作的通道
+    input start,                          // 该通道开始新的计算(寄存器置为init)
+    input data_valid,                     // data_in 有效
+    input [7:0] data_in,
+    input finalize,                       // 输出该通道的CRC(包含本周期的数据)
+    output reg crc_ready,
+    output reg [channel_bits-1:0] crc_channel,
+    output reg [bits-1:0] crc_out
+);
+
+// 每个通道的CRC寄存器(状态RAM)，通道使用前必须先 start
+reg  [bits-1:0] state [0:channels-1];
+wire [bits-1:0] crc_cur;
+wire [bits-1:0] crc_next;
+wire [bits-1:0] crc_upd;
+
+// start 与数据同一周期时从 init 开始处理该字节
+assign crc_cur = start ? init : state[channel_id];
+assign crc_upd = data_valid ? crc_next : crc_cur;
+
+// 所有通道共用的字节处理数据通路
+crc_process_byte #(.bits(bits),.poly(poly)) datapath (
+    .crc_in(crc_cur),
+    .byte_in(data_in),
+    .refin_in(refin),
+    .crc_out(crc_next)
+);
+
+// 位翻转函数实现
+    function [bits-1:0] reflect;
+        input [bits-1:0] data;
+        integer i;
+        begin
+            reflect = 0;
+            for (i = 0; i < bits; i = i + 1)
+                reflect[bits-1-i] = data[i];
+        end
+    endfunction
+
+// 状态RAM写端口(不复位，便于综合为RAM)
+always @(posedge clk) begin
+    if(start || data_valid)
+        state[channel_id] <= crc_upd;
+end
+
+always @(posedge clk or negedge rst_n) begin
+    if(!rst_n) begin
+        crc_ready <= 0;
+        crc_channel <= 0;
+        crc_out <= 0;
+    end else begin
+        crc_ready <= finalize;
+        if(finalize) begin
+            crc_channel <= channel_id;
+            if(refout)
+                crc_out <= (reflect(crc_upd) ^ xorout) & {{bits{{1'b1}}}};
+            else
+                crc_out <= (crc_upd ^ xorout) & {{bits{{1'b1}}}};
+        end
+    end
+end
+
+endmodule
+"""
+
+
+def channel_bits(channels):
+    """channel_id 的位数"""
+    return max(1, (channels - 1).bit_length())
+
+
+def render_rtl(channels):
+    """生成多通道CRC模块的Verilog源码"""
+    if channels < 1:
+        raise ValueError(f"通道数必须大于0: {channels}")
+    return RTL_TEMPLATE.format(channels=channels, channel_bits=channel_bits(channels))
+
+
+def write_rtl(channels, path=DEFAULT_RTL_PATH):
+    """写出多通道CRC模块(与 rtl_model/src 中其他源文件一样使用CRLF换行)"""
+    with open(path, 'w', encoding='utf-8', newline='\r\n') as f:
+        f.write(render_rtl(channels))
+    return path
+
+
+class MultiChannelCrc:
+    """与 crc_multi.v 逐周期一致的Python模型"""
+
+    def __init__(self, model, channels):
+        self.model = model
+        self.channels = channels
+        # 寄存器保持查表模型的形式(refin 时为反转形式)
+        self.init = reverse_bits(model.init, model.width) if model.refin else model.init
+        self.state = [self.init] * channels
+
+    def _step(self, crc, byte):
+        m = self.model
+        if m.refin:
+            return (crc >> 8) ^ m.table[(crc ^ byte) & 0xFF]
+        return ((crc << 8) & m.mask) ^ m.table[((crc >> (m.width - 8)) ^ byte) & 0xFF]
+
+    def _finalize(self, crc):
+        m = self.model
+        if m.refin != m.refout:
+            crc = reverse_bits(crc, m.width)
+        return crc ^ m.xorout
+
+    def cycle(self, channel, start, valid, byte, finalize):
+        """执行一个周期；finalize 时返回该通道的CRC，否则返回 None"""
+        crc = self.init if start else self.state[channel]
+        if valid:
+            crc = self._step(crc, byte)
+        if start or valid:
+            self.state[channel] = crc
+        return self._finalize(crc) if finalize else None
+
+    def run(self, cycles):
+        """运行整个激励，返回按输出顺序排列的 [(通道, CRC)]"""
+        results = []
+        for cycle in cycles:
+            crc = self.cycle(*cycle)
+            if crc is not None:
+                results.append((cycle[0], crc))
+        return results
+
+
+def generate_stimulus(channels, messages_per_channel, min_length, max_length, rng, idle=0.05):
+    """生成交织的多通道激励
+
+    返回 (周期列表, 报文列表)：周期为 (通道, start, valid, 字节, finalize)，
+    报文按完成(finalize)的顺序排列为 (通道, 数据)
+    """
+    pending = {ch: [bytes(rng.getrandbits(8) for _ in range(rng.randint(min_length, max_length)))
+                    for _ in range(messages_per_channel)]
+               for ch in range(channels)}
+    position = {ch: 0 for ch in range(channels)}
+    cycles, messages = [], []
+    while pending:
+        if rng.random() < idle:
+            cycles.append((rng.randrange(channels), 0, 0, 0, 0))
+            continue
+        ch = rng.choice(list(pending))
+        data, pos = pending[ch][0], position[ch]
+        start = int(pos == 0)
+        if pos < len(data):
+            # 最后一个字节可以与 finalize 同一周期，也可以单独占一个周期
+            last = pos + 1 == len(data)
+            finalize = int(last and rng.random() < 0.5)
+            cycles.append((ch, start, 1, data[pos], finalize))
+            position[ch] = pos + 1
+        else:
+            # 空报文或单独的 finalize 周期
+            finalize = 1
+            cycles.append((ch, start, 0, 0, 1))
+        if finalize:
+            messages.append((ch, data))
+            pending[ch].pop(0)
+            position[ch] = 0
+            if not pending[ch]:
+                del pending[ch]
+    return cycles, messages
+
+
+def stimulus_filename(config_id):
+    return f"multi_c{config_id}_stimulus.dat"
+
+
+def expected_filename(config_id):
+    return f"multi_c{config_id}_expected.dat"
+
+
+def output_filename(config_id):
+    return f"multi_c{config_id}_output.dat"
+
+
+def write_stimulus(path, cycles):
+    """每行一个周期: 通道 start valid 字节(十六进制) finalize"""
+    with open(path, 'w') as f:
+        for ch, start, valid, byte, finalize in cycles:
+            f.write(f"{ch} {start} {valid} {byte:02x} {finalize}\n")
+
+
+def read_stimulus(path):
+    cycles = []
+    with open(path, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 5:
+                ch, start, valid, byte, finalize = parts
+                cycles.append((int(ch), int(start), int(valid), int(byte, 16), int(finalize)))
+    return cycles
+
+
+def write_results(path, results, width):
+    """每行一个输出: 通道 CRC(十六进制，与 $fdisplay("%0d %h") 相同)"""
+    digits = (width + 3) // 4
+    with open(path, 'w') as f:
+        for ch, crc in results:
+            f.write(f"{ch} {crc:0{digits}x}\n")
+
+
+def read_results(path):
+    results = []
+    with open(path, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 2:
+                results.append((int(parts[0]), int(parts[1], 16)))
+    return results
+
+
+def discover_configs(setting_dir):
+    """查找RTL配置文件，返回 {配置ID: 配置文件路径}"""
+    configs = {}
+    for path in glob.glob(os.path.join(setting_dir, 'crc_config_*.vh')):
+        config_id = os.path.basename(path)[len('crc_config_'):-len('.vh')]
+        if config_id.isdigit():
+            configs[int(config_id)] = path
+    return dict(sorted(configs.items()))
+
+
+def generate(args):
+    """为每个配置生成交织激励和期望结果(期望值由查表模型逐报文独立计算)"""
+    from crc_config import load_config
+    configs = discover_configs(args.rtl_setting_dir)
+    if not configs:
+        print(f"错误: 未在 {args.rtl_setting_dir} 中找到配置")
+        return 1
+    if args.seed is None:
+        args.seed = random.randrange(2**32)
+    print(f"使用随机种子: {args.seed}")
+    for sub in ('input', 'expected'):
+        os.makedirs(os.path.join(args.data_dir, sub), exist_ok=True)
+    for config_id, path in configs.items():
+        model = load_config(path)
+        rng = random.Random(f"{args.seed}:{config_id}")
+        cycles, messages = generate_stimulus(args.channels, args.messages, args.min_length,
+                                             args.max_length, rng)
+        write_stimulus(os.path.join(args.data_dir, 'input', stimulus_filename(config_id)), cycles)
+        expected = [(ch, model.compute(data)) for ch, data in messages]
+        write_results(os.path.join(args.data_dir, 'expected', expected_filename(config_id)),
+                      expected, model.width)
+        print(f"配置 #{config_id}: {args.channels} 通道, {len(messages)} 个报文, {len(cycles)} 个周期")
+    return 0
+
+
+def simulate(args):
+    """运行多通道仿真，结果写入 <data_dir>/rtl_data"""
+    from crc_config import load_config
+    from crc_sim_runner import render_command, run_command
+    configs = discover_configs(args.rtl_setting_dir)
+    rtl_dir = os.path.join(args.data_dir, 'rtl_data')
+    os.makedirs(rtl_dir, exist_ok=True)
+    failed = 0
+    for config_id, path in configs.items():
+        stimulus = os.path.join(args.data_dir, 'input', stimulus_filename(config_id))
+        if not os.path.exists(stimulus):
+            print(f"注意: 配置 #{config_id} 缺少激励文件 {stimulus}，跳过")
+            continue
+        cycles = read_stimulus(stimulus)
+        used = max((ch for ch, *_ in cycles), default=-1) + 1
+        if used > args.channels:
+            print(f"✗ 配置 #{config_id}: 激励使用了 {used} 个通道，超过 --channels {args.channels}")
+            failed += 1
+            continue
+        output = os.path.join(rtl_dir, output_filename(config_id))
+        if args.simulator == 'model':
+            # 没有仿真器时用Python周期模型代替RTL
+            model = load_config(path)
+            results = MultiChannelCrc(model, args.channels).run(cycles)
+            write_results(output, results, model.width)
+            print(f"配置 #{config_id}: 周期模型输出 {len(results)} 个结果")
+            continue
+
+        work = os.path.join(args.work_dir, f'multi_c{config_id}')
+        os.makedirs(work, exist_ok=True)
+        shutil.copyfile(path, os.path.join(work, 'crc_config.vh'))
+        shutil.copyfile(stimulus, os.path.join(work, 'stimulus.dat'))
+        # 按 --channels 重新生成模块：工作目录在 -I 列表的最前面，优先于 rtl_model/src 中提交的版本，
+        # 避免通道数不同时 channel_id 被截断或状态RAM大小不符
+        write_rtl(args.channels, os.path.join(work, 'crc_multi.v'))
+        values = {
+            'config_dir': work,
+            'src_dir': str(DEFAULT_RTL_PATH.parent),
+            'tb': str(DEFAULT_TB_PATH),
+            'binary': os.path.join(work, 'sim.out'),
+        }
+        preset = SIMULATORS[args.simulator]
+        for step in ('compile', 'run'):
+            cmd = render_command(preset[step], values)
+            code, elapsed = run_command(cmd, work, os.path.join(work, f'{step}.log'))
+            if code != 0:
+                print(f"✗ 配置 #{config_id} {step} 失败 (退出码 {code})，日志: {work}")
+                failed += 1
+                break
+        else:
+            shutil.copyfile(os.path.join(work, 'output.dat'), output)
+            print(f"配置 #{config_id}: 仿真完成")
+    return 1 if failed else 0
+
+
+def validate(args):
+    """逐通道比较RTL输出和期望结果"""
+    configs = discover_configs(args.rtl_setting_dir)
+    total = mismatched = 0
+    for config_id in configs:
+        expected_path = os.path.join(args.data_dir, 'expected', expected_filename(config_id))
+        output_path = os.path.join(args.data_dir, 'rtl_data', output_filename(config_id))
+        if not os.path.exists(expected_path):
+            continue
+        if not os.path.exists(output_path):
+            print(f"✗ 配置 #{config_id}: 缺少RTL输出 {output_path}")
+            mismatched += 1
+            continue
+        expected, actual = read_results(expected_path), read_results(output_path)
+        # 按通道分组比较，同一通道的报文顺序必须一致
+        channels = sorted({ch for ch, _ in expected} | {ch for ch, _ in actual})
+        bad_channels = []
+        for ch in channels:
+            exp = [crc for c, crc in expected if c == ch]
+            act = [crc for c, crc in actual if c == ch]
+            total += len(exp)
+            errors = sum(e != a for e, a in zip(exp, act)) + abs(len(exp) - len(act))
+            if errors:
+                mismatched += errors
+                bad_channels.append(f"{ch}({errors})")
+        status = "✓" if not bad_channels else f"✗ 不一致通道: {', '.join(bad_channels)}"
+        print(f"配置 #{config_id}: {len(channels)} 个通道, {len(expected)} 个报文 {status}")
+    print(f"\n多通道验证完成: 总报文数 {total}, 不一致 {mismatched}")
+    return 1 if mismatched or not total else 0
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='多通道时分复用CRC引擎的生成与验证')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('rtl', help='生成多通道CRC模块 crc_multi.v')
+    p.add_argument('--channels', type=int, default=4, help='通道数')
+    p.add_argument('--rtl', type=str, default=str(DEFAULT_RTL_PATH), help='输出Verilog文件')
+
+    for name, help_text in (('generate', '生成交织的多通道激励和期望结果'),
+                            ('simulate', '运行多通道仿真'),
+                            ('validate', '逐通道检查RTL输出'),
+                            ('flow', '依次执行 generate、simulate、validate')):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('--rtl-setting-dir', type=str,
+                       default=str(ROOT_DIR / 'rtl_model' / 'settings'), help='RTL CRC配置目录')
+        p.add_argument('--data-dir', type=str, default=str(DEFAULT_DATA_DIR),
+                       help='数据目录(input/expected/rtl_data)')
+        if name in ('generate', 'simulate', 'flow'):
+            p.add_argument('--channels', type=int, default=4, help='通道数(仿真时按该值生成 crc_multi.v)')
+        if name in ('generate', 'flow'):
+            p.add_argument('--messages', type=int, default=8, help='每个通道的报文数量')
+            p.add_argument('--min-length', type=int, default=1, help='报文最小长度(字节)')
+            p.add_argument('--max-length', type=int, default=32, help='报文最大长度(字节)')
+            p.add_argument('--seed', type=int, default=None, help='随机数种子')
+        if name in ('simulate', 'flow'):
+            p.add_argument('--simulator', choices=sorted(SIMULATORS) + ['model'], default='iverilog',
+                           help='仿真器(model 为Python周期模型)')
+            p.add_argument('--work-dir', type=str,
+                           default=str(ROOT_DIR / 'rtl_model' / 'sim' / 'work'), help='仿真工作目录')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'rtl':
+        print(f"多通道CRC模块已保存: {write_rtl(args.channels, args.rtl)}")
+        return 0
+    if args.command == 'generate':
+        return generate(args)
+    if args.command == 'simulate':
+        return simulate(args)
+    if args.command == 'validate':
+        return validate(args)
+    for step in (generate, simulate, validate):
+        code = step(args)
+        if code:
+            return code
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
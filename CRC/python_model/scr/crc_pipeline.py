@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+有界内存的 asyncio 流式处理流水线
+目录枚举和文件读取(I/O线程) -> 有界队列 -> 计算(线程池或进程池) -> 按输入顺序写出；
+任务按批次在各阶段之间传递，在途的用例数(已读取但尚未写出)由信号量限制，
+达到上限时读取端等待(背压)，因此内存占用只与在途上限有关，与数据集大小无关，
+文件读写与计算重叠进行
+"""
+import os
+import time
+import fnmatch
+import asyncio
+import itertools
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# 默认在途用例上限和每批用例数
+DEFAULT_IN_FLIGHT = 4096
+DEFAULT_BATCH_SIZE = 64
+
+# 计算执行器类型
+POOLS = ('thread', 'process')
+
+
+def iter_files(directory, pattern):
+    """逐个产生目录中匹配 pattern 的文件路径；使用 os.scandir，不一次性列出整个目录"""
+    if not os.path.isdir(directory):
+        return
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if fnmatch.fnmatchcase(entry.name, pattern) and entry.is_file():
+                yield entry.path
+
+
+def make_executor(pool='thread', workers=None):
+    """创建计算执行器"""
+    if pool not in POOLS:
+        raise ValueError(f"未知执行器类型: {pool}")
+    if pool == 'process':
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def _take(iterator, count):
+    return list(itertools.islice(iterator, count))
+
+
+def _map(func, items):
+    return [func(item) for item in items]
+
+
+def _map_pairs(func, pairs):
+    return [func(item, payload) for item, payload in pairs]
+
+
+async def run_pipeline(items, read, compute, collect=None, write=None, lookup=None,
+                       in_flight=DEFAULT_IN_FLIGHT, batch_size=DEFAULT_BATCH_SIZE,
+                       executor=None, workers=None):
+    """流式处理 items，返回统计字典
+
+    read(item) -> payload          在I/O线程中执行，返回 None 时跳过该项
+    lookup(item, payload) -> 结果  在事件循环中执行(例如查询结果缓存)，返回 None 时需要计算
+    compute(item, payload) -> 结果 在 executor 中执行(进程池时需要可序列化)
+    collect(records)                在事件循环中按输入顺序执行，records 为 [(item, payload, result)]
+    write(records)                  在I/O线程中按输入顺序执行(写结果文件)
+    """
+    loop = asyncio.get_running_loop()
+    in_flight = max(1, in_flight)
+    batch_size = max(1, min(batch_size, in_flight))
+    slots = asyncio.Semaphore(max(1, in_flight // batch_size))
+    workers = workers or os.cpu_count() or 1
+    queue = asyncio.Queue(maxsize=workers)
+    done = {}                   # 批次序号 -> 记录列表，等待按序写出
+    ready = asyncio.Event()
+    iterator = iter(items)
+    stats = {'items': 0, 'computed': 0, 'cached': 0, 'skipped': 0,
+             'batches': 0, 'backpressure_waits': 0, 'max_in_flight': 0}
+    state = {'in_flight': 0, 'total_batches': None}
+
+    async def reader():
+        seq = 0
+        while True:
+            names = await loop.run_in_executor(None, _take, iterator, batch_size)
+            if not names:
+                break
+            if slots.locked():
+                stats['backpressure_waits'] += 1
+            await slots.acquire()
+            state['in_flight'] += len(names)
+            stats['max_in_flight'] = max(stats['max_in_flight'], state['in_flight'])
+            payloads = await loop.run_in_executor(None, _map, read, names)
+            if queue.full():
+                stats['backpressure_waits'] += 1
+            await queue.put((seq, len(names), list(zip(names, payloads))))
+            seq += 1
+        state['total_batches'] = seq
+        for _ in range(workers):
+            await queue.put(None)
+        ready.set()
+
+    async def worker():
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            seq, size, pairs = job
+            stats['skipped'] += sum(1 for _, payload in pairs if payload is None)
+            pairs = [(item, payload) for item, payload in pairs if payload is not None]
+            results = {}
+            pending = []
+            for index, (item, payload) in enumerate(pairs):
+                cached = lookup(item, payload) if lookup else None
+                if cached is None:
+                    pending.append(index)
+                else:
+                    results[index] = cached
+            if pending:
+                computed = await loop.run_in_executor(
+                    executor, _map_pairs, compute, [pairs[i] for i in pending])
+                results.update(zip(pending, computed))
+            stats['computed'] += len(pending)
+            stats['cached'] += len(pairs) - len(pending)
+            done[seq] = (size, [(item, payload, results[i]) for i, (item, payload) in enumerate(pairs)])
+            ready.set()
+
+    async def writer():
+        seq = 0
+        while state['total_batches'] is None or seq < state['total_batches']:
+            if seq not in done:
+                ready.clear()
+                await ready.wait()
+                continue
+            size, records = done.pop(seq)
+            if collect is not None:
+                collect(records)
+            if write is not None:
+                await loop.run_in_executor(None, write, records)
+            stats['items'] += len(records)
+            stats['batches'] += 1
+            state['in_flight'] -= size
+            slots.release()
+            seq += 1
+
+    start = time.perf_counter()
+    tasks = [asyncio.ensure_future(reader()), asyncio.ensure_future(writer())]
+    tasks.extend(asyncio.ensure_future(worker()) for _ in range(workers))
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    stats['elapsed_s'] = time.perf_counter() - start
+    return stats
+
+
+def run(items, read, compute, **kwargs):
+    """同步入口：在新的事件循环中运行 run_pipeline"""
+    return asyncio.run(run_pipeline(items, read, compute, **kwargs))
+
+
+def format_stats(stats):
+    """统计信息的单行摘要"""
+    rate = stats['items'] / stats['elapsed_s'] if stats['elapsed_s'] else 0.0
+    return (f"流水线: {stats['items']} 个用例 ({stats['computed']} 计算, {stats['cached']} 缓存, "
+            f"{stats['skipped']} 跳过), {stats['elapsed_s']:.2f}s, {rate:.0f} 用例/秒, "
+            f"最大在途 {stats['max_in_flight']}, 背压等待 {stats['backpressure_waits']} 次")
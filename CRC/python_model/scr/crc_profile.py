@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+轻量性能剖析与热点插桩
+验证脚本在加载、计算、参考计算、写结果和比较等位置调用 span(名称)(阶段)
+或 timed(名称, 函数, 参数...)(逐用例的热点)记录计时区间，
+调用 count(名称, 值) 记录处理字节数、缓存命中/未命中和后端选择等计数器；
+启用后可选 tracemalloc 内存快照和对 compute 区间的 cProfile 采集，
+结果保存为JSON摘要或 Chrome trace-event 格式(chrome://tracing、Perfetto)。
+未启用时 span() 返回共享的空上下文，timed() 直接调用函数，count() 只做一次全局变量判断，开销接近于零；
+本模块被 crc_config 等常用模块导入，threading、json、cProfile 等在启用或保存时才导入
+"""
+import os
+import time
+
+# 保存的单个计时事件上限，超过后只累计汇总统计
+MAX_EVENTS = 200000
+
+# 内存快照中保留的分配位置数量
+SNAPSHOT_TOP = 10
+
+# cProfile 报告中保留的函数数量
+CPROFILE_TOP = 30
+
+FORMATS = ('json', 'chrome')
+
+# 当前启用的剖析器，未启用时为 None
+_profiler = None
+
+
+class _NullSpan:
+    """未启用剖析时使用的空上下文"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'args', 'start', 'profiled')
+
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.profiled = self.profiler.profile_enter(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        if self.profiled:
+            self.profiler.profile_exit()
+        self.profiler.record(self.name, self.start, end, self.args)
+        return False
+
+
+def span(name, **args):
+    """计时区间上下文：with span('compute'): ...；args 作为事件参数保存到 trace 中"""
+    if _profiler is None:
+        return _NULL_SPAN
+    return _Span(_profiler, name, args)
+
+
+def timed(name, func, *args):
+    """在计时区间中调用 func(*args)；用于逐用例的热点，未启用时比 with span() 开销更小"""
+    if _profiler is None:
+        return func(*args)
+    with _Span(_profiler, name, {}):
+        return func(*args)
+
+
+def record(name, start, end, tid=None, **args):
+    """记录在其他位置测得的计时区间(start/end 为 time.perf_counter() 的值)；
+    用于进程池工作进程中的热点：同一台机器上各进程的 perf_counter 可比，
+    工作进程返回计时，由主进程记录，tid 可设为工作进程ID"""
+    if _profiler is not None:
+        _profiler.record(name, start, end, args, tid)
+
+
+def count(name, value=1):
+    """累加计数器"""
+    if _profiler is not None:
+        _profiler.count(name, value)
+
+
+def snapshot(label):
+    """记录一次内存快照(需要启用 memory)"""
+    if _profiler is not None:
+        _profiler.snapshot(label)
+
+
+def enabled():
+    return _profiler is not None
+
+
+def enable(memory=False, cprofile=()):
+    """启用剖析并返回 Profiler；cprofile 为需要用 cProfile 采集的区间名称"""
+    global _profiler
+    if _profiler is not None:
+        raise RuntimeError("性能剖析已经启用")
+    _profiler = Profiler(memory, cprofile)
+    return _profiler
+
+
+def disable():
+    """停止剖析并返回 Profiler(未启用时返回 None)"""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+class Profiler:
+    """收集计时区间、计数器、内存快照和 cProfile 数据"""
+
+    def __init__(self, memory=False, cprofile=()):
+        import threading
+        self._threading = threading
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.events = []            # (名称, 开始秒, 持续秒, 线程ID, 参数)
+        self.dropped = 0
+        self.spans = {}             # 名称 -> [次数, 总秒数, 最大秒数]
+        self.counters = {}
+        self.snapshots = []
+        self.lock = threading.Lock()
+        self.memory = memory
+        self._tracemalloc_started = False
+        if memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracemalloc_started = True
+        self.cprofile_names = frozenset(cprofile)
+        self.cprofile = None
+        self._cprofile_depth = 0
+        if self.cprofile_names:
+            import cProfile
+            self.cprofile = cProfile.Profile()
+        self.elapsed = None
+
+    def record(self, name, start, end, args, tid=None):
+        duration = end - start
+        with self.lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                self.spans[name] = [1, duration, duration]
+            else:
+                stats[0] += 1
+                stats[1] += duration
+                if duration > stats[2]:
+                    stats[2] = duration
+            if len(self.events) < MAX_EVENTS:
+                self.events.append((name, start - self.origin, duration,
+                                    self._threading.get_ident() if tid is None else tid, args))
+            else:
+                self.dropped += 1
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def profile_enter(self, name):
+        """进入需要 cProfile 采集的区间；cProfile 只能在一个线程中启用，只采集主线程"""
+        threading = self._threading
+        if name not in self.cprofile_names or threading.current_thread() is not threading.main_thread():
+            return False
+        if self._cprofile_depth == 0:
+            self.cprofile.enable()
+        self._cprofile_depth += 1
+        return True
+
+    def profile_exit(self):
+        self._cprofile_depth -= 1
+        if self._cprofile_depth == 0:
+            self.cprofile.disable()
+
+    def snapshot(self, label):
+        if not self.memory:
+            return
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics('lineno')[:SNAPSHOT_TOP]
+        self.snapshots.append({
+            'label': label,
+            'time_s': time.perf_counter() - self.origin,
+            'current_kb': current / 1024,
+            'peak_kb': peak / 1024,
+            'top': [{'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                     'size_kb': stat.size / 1024, 'count': stat.count} for stat in top],
+        })
+
+    def stop(self):
+        self.elapsed = time.perf_counter() - self.origin
+        if self.memory:
+            self.snapshot('end')
+            if self._tracemalloc_started:
+                import tracemalloc
+                tracemalloc.stop()
+
+    def cprofile_rows(self):
+        """cProfile 结果中累计耗时最高的函数"""
+        if self.cprofile is None:
+            return []
+        import pstats
+        self.cprofile.create_stats()
+        if not self.cprofile.stats:
+            # compute 区间没有在主线程中执行(全部命中缓存或使用进程池)
+            return []
+        stats = pstats.Stats(self.cprofile)
+        rows = []
+        for (filename, lineno, func), (cc, nc, tt, ct, _) in stats.stats.items():
+            rows.append({'function': f"{os.path.basename(filename)}:{lineno}({func})",
+                         'calls': nc, 'tottime_s': tt, 'cumtime_s': ct})
+        rows.sort(key=lambda row: row['cumtime_s'], reverse=True)
+        return rows[:CPROFILE_TOP]
+
+    def summary(self):
+        """JSON摘要：区间汇总、计数器、内存快照和 cProfile 热点"""
+        return {
+            'elapsed_s': self.elapsed if self.elapsed is not None else time.perf_counter() - self.origin,
+            'spans': {name: {'count': n, 'total_s': total, 'mean_us': total / n * 1e6, 'max_us': peak * 1e6}
+                      for name, (n, total, peak) in sorted(self.spans.items(), key=lambda item: -item[1][1])},
+            'counters': dict(sorted(self.counters.items())),
+            'memory': self.snapshots,
+            'cprofile': self.cprofile_rows(),
+            'events': len(self.events),
+            'dropped_events': self.dropped,
+        }
+
+    def chrome_trace(self):
+        """Chrome trace-event 格式：区间为完整事件(X)，内存和计数器为计数事件(C)"""
+        events = [{'name': name, 'cat': 'crc', 'ph': 'X', 'ts': start * 1e6, 'dur': duration * 1e6,
+                   'pid': self.pid, 'tid': tid, 'args': args}
+                  for name, start, duration, tid, args in self.events]
+        end = (self.elapsed or 0.0) * 1e6
+        for snap in self.snapshots:
+            events.append({'name': 'memory', 'ph': 'C', 'ts': snap['time_s'] * 1e6, 'pid': self.pid,
+                           'args': {'current_kb': snap['current_kb'], 'peak_kb': snap['peak_kb']}})
+        if self.counters:
+            events.append({'name': 'counters', 'ph': 'C', 'ts': end, 'pid': self.pid,
+                           'args': dict(self.counters)})
+        summary = self.summary()
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'spans': summary['spans'], 'dropped_events': self.dropped}}
+
+    def dump(self, path, fmt='json'):
+        """保存剖析结果；启用 cProfile 时同时保存 <path>.prof 供 pstats/snakeviz 查看"""
+        import json
+        if fmt not in FORMATS:
+            raise ValueError(f"未知剖析输出格式: {fmt}")
+        data = self.chrome_trace() if fmt == 'chrome' else self.summary()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=None if fmt == 'chrome' else 2, ensure_ascii=False)
+        if self.cprofile is not None:
+            self.cprofile.dump_stats(f"{path}.prof")
+
+
+def add_arguments(parser):
+    """为脚本添加 --profile 系列参数"""
+    parser.add_argument('--profile', type=str, default=None, help='启用性能剖析并保存到该文件')
+    parser.add_argument('--profile-format', choices=FORMATS, default='json',
+                        help='剖析输出格式: json 摘要或 chrome trace-event')
+    parser.add_argument('--profile-memory', action='store_true', help='用 tracemalloc 记录各阶段的内存快照')
+    parser.add_argument('--profile-cprofile', action='store_true', help='用 cProfile 采集 compute 区间')
+
+
+def start(args):
+    """按命令行参数启用剖析"""
+    if args.profile:
+        enable(memory=args.profile_memory, cprofile=('compute',) if args.profile_cprofile else ())
+
+
+def finish(args):
+    """按命令行参数停止剖析并保存结果"""
+    profiler = disable()
+    if profiler is None or not args.profile:
+        return
+    profiler.dump(args.profile, args.profile_format)
+    print(f"性能剖析结果已保存到: {args.profile}")
+    if profiler.cprofile is not None:
+        print(f"cProfile 数据已保存到: {args.profile}.prof")
@@ -0,0 +1,175 @@
+"""
+CRC结果缓存
+以 (规范化配置, 测试向量字节, 实现版本) 的哈希为键持久保存模型CRC和参考CRC，
+重复验证时只计算新增或变化的用例；缓存条目数超过上限时按最近使用时间淘汰
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+# 缓存格式版本，修改键或存储格式时递增
+CACHE_FORMAT = 1
+
+# 软件模型和参考适配(crc_model_validator.reference_crc_function)的源码参与实现版本计算，
+# 模型代码或参考适配变化后旧缓存自动失效
+_MODEL_SOURCES = ['CRC.py', 'crc_config.py', 'crc_model_validator.py']
+
+# 参考实现所在的包，其版本参与实现版本计算，升级后缓存中的参考CRC自动失效
+_REFERENCE_PACKAGES = ['crcmod']
+
+
+def reference_versions():
+    """参考实现的包名和版本；从包元数据读取，不导入包本身"""
+    from importlib import metadata
+    versions = {}
+    for name in _REFERENCE_PACKAGES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def implementation_version():
+    """根据软件模型源码和参考实现版本计算实现版本"""
+    digest = hashlib.sha256(f"format={CACHE_FORMAT}".encode())
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in _MODEL_SOURCES:
+        with open(os.path.join(script_dir, name), 'rb') as f:
+            digest.update(f.read())
+    for name, version in reference_versions().items():
+        digest.update(f"{name}={version}".encode())
+    return digest.hexdigest()[:16]
+
+
+def normalize_config(config):
+    """将 CrcModel、JSON配置(rev)或RTL配置(十六进制字符串)统一为整数参数字典"""
+    if hasattr(config, 'params'):
+        return config.params()
+
+    def as_int(value):
+        return int(value, 16) if isinstance(value, str) else int(value)
+
+    width = int(config['width'])
+    mask = (1 << width) - 1
+    refin = config['refin'] if 'refin' in config else config['rev']
+    refout = config['refout'] if 'refout' in config else config['rev']
+    return {
+        'width': width,
+        'poly': as_int(config['poly']) & mask,
+        'init': as_int(config['init']) & mask,
+        'refin': bool(refin),
+        'refout': bool(refout),
+        'xorout': as_int(config['xorout']) & mask,
+    }
+
+
+def write_if_changed(path, content):
+    """内容不变时跳过写入，返回是否实际写入"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+class ResultCache:
+    """基于SQLite的CRC结果缓存"""
+
+    def __init__(self, path, max_entries=1000000):
+        self.path = path
+        self.max_entries = max_entries
+        self.version = implementation_version()
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}
+        self._touched = []
+        self._config_keys = {}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, model TEXT, reference TEXT, last_used INTEGER)")
+
+    def key(self, config, data):
+        """计算缓存键：规范化配置 + 测试向量字节 + 实现版本"""
+        config_id = id(config)
+        prefix = self._config_keys.get(config_id)
+        if prefix is None or prefix[0] is not config:
+            normalized = json.dumps(normalize_config(config), sort_keys=True).encode()
+            prefix = (config, normalized + b'\0' + self.version.encode() + b'\0')
+            self._config_keys[config_id] = prefix
+        return hashlib.sha256(prefix[1] + bytes(data)).hexdigest()
+
+    def get(self, key):
+        """查询缓存，返回 {'model': int, 'reference': int或None} 或 None"""
+        if key in self._pending:
+            self.hits += 1
+            return self._pending[key]
+        row = self._db.execute(
+            "SELECT model, reference FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched.append(key)
+        return {
+            'model': int(row[0], 16),
+            'reference': int(row[1], 16) if row[1] is not None else None,
+        }
+
+    def put(self, key, model, reference=None):
+        """记录新的计算结果，close() 时批量写入"""
+        previous = self._pending.get(key)
+        if reference is None and previous is not None:
+            reference = previous['reference']
+        self._pending[key] = {'model': model, 'reference': reference}
+
+    def flush(self):
+        """把新结果和使用时间写入数据库，流式处理时定期调用以限制内存占用"""
+        with self._db:
+            self._write_pending()
+        self._pending.clear()
+        self._touched.clear()
+
+    def _write_pending(self):
+        now = time.time_ns()
+        self._db.executemany(
+            "UPDATE cache SET last_used = ? WHERE key = ?",
+            ((now, key) for key in self._touched))
+        # 只有模型结果的条目不覆盖已有的参考结果
+        self._db.executemany(
+            "INSERT INTO cache (key, model, reference, last_used) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET model = excluded.model, "
+            "reference = COALESCE(excluded.reference, cache.reference), "
+            "last_used = excluded.last_used",
+            ((key, f"{v['model']:x}",
+              f"{v['reference']:x}" if v['reference'] is not None else None, now)
+             for key, v in self._pending.items()))
+
+    def close(self):
+        """批量写入新结果，更新使用时间并按容量上限淘汰旧条目"""
+        with self._db:
+            self._write_pending()
+            count = self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            if count > self.max_entries:
+                self._db.execute(
+                    "DELETE FROM cache WHERE key IN ("
+                    "SELECT key FROM cache ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,))
+        self._db.close()
+        self._pending.clear()
+        self._touched.clear()
+
+    def stats(self):
+        """返回命中统计字符串"""
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"缓存命中 {self.hits}/{total} ({rate:.1f}%)"
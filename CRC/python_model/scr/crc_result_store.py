@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+CRC验证结果库
+将验证结果在一个批量事务中写入单个SQLite数据库(也可分批追加后一次提交)，代替大量小结果文件；
+支持按索引查询不匹配用例，并可按需导出为原有的逐文件目录布局
+"""
+import os
+import sys
+import time
+import sqlite3
+import argparse
+
+# 结果套件：algorithm 对应 crc_model_validator，model 对应 crc_rtl_validator
+SUITES = ('algorithm', 'model')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    suite TEXT NOT NULL,
+    created REAL NOT NULL,
+    total INTEGER NOT NULL,
+    mismatches INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    config_id INTEGER NOT NULL,
+    test_id INTEGER NOT NULL,
+    length INTEGER,
+    model_crc TEXT,
+    reference_crc TEXT,
+    rtl_crc TEXT,
+    match INTEGER NOT NULL,
+    elapsed_us REAL
+);
+CREATE INDEX IF NOT EXISTS idx_results_case ON results (run_id, config_id, test_id);
+CREATE INDEX IF NOT EXISTS idx_results_mismatch ON results (match, run_id);
+"""
+
+_COLUMNS = ('config_id', 'test_id', 'length', 'model_crc', 'reference_crc',
+            'rtl_crc', 'match', 'elapsed_us')
+
+
+def _as_id(value):
+    """将 '1'、'c1'、't1' 等编号统一为整数"""
+    if isinstance(value, str):
+        value = value.lstrip('ct')
+    return int(value)
+
+
+def _as_hex(value):
+    """CRC可能超过64位，统一以十六进制文本保存"""
+    return None if value is None else f"{value:x}"
+
+
+def _from_hex(value):
+    return None if value is None else int(value, 16)
+
+
+class ResultStore:
+    """基于SQLite的验证结果库"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def write_run(self, suite, rows):
+        """在一个事务中写入一次验证的全部结果，返回运行编号
+
+        rows 中每项为字典，键包括 config_id、test_id、length、model_crc、
+        reference_crc、rtl_crc、match、elapsed_us，缺少的键记为空
+        """
+        run_id = self.start_run(suite)
+        self.add_results(run_id, rows)
+        self.finish_run(run_id)
+        return run_id
+
+    def start_run(self, suite):
+        """开始一次分批写入的运行，返回运行编号；finish_run() 之前不提交"""
+        if suite not in SUITES:
+            raise ValueError(f"未知结果套件: {suite}")
+        cursor = self._db.execute(
+            "INSERT INTO runs (suite, created, total, mismatches) VALUES (?, ?, 0, 0)",
+            (suite, time.time()))
+        return cursor.lastrowid
+
+    def add_results(self, run_id, rows):
+        """向运行追加一批结果(格式同 write_run)"""
+        self._db.executemany(
+            f"INSERT INTO results (run_id, {', '.join(_COLUMNS)}) "
+            f"VALUES (?, {', '.join('?' * len(_COLUMNS))})",
+            ((run_id,
+              _as_id(row['config_id']),
+              _as_id(row['test_id']),
+              row.get('length'),
+              _as_hex(row.get('model_crc')),
+              _as_hex(row.get('reference_crc')),
+              _as_hex(row.get('rtl_crc')),
+              1 if row['match'] else 0,
+              row.get('elapsed_us')) for row in rows))
+
+    def finish_run(self, run_id):
+        """统计运行的总数和不匹配数并提交"""
+        self._db.execute(
+            "UPDATE runs SET total = (SELECT COUNT(*) FROM results WHERE run_id = ?), "
+            "mismatches = (SELECT COUNT(*) FROM results WHERE run_id = ? AND match = 0) "
+            "WHERE run_id = ?", (run_id, run_id, run_id))
+        self._db.commit()
+
+    def latest_run(self, suite):
+        """返回某套件最近一次运行的编号"""
+        row = self._db.execute(
+            "SELECT MAX(run_id) FROM runs WHERE suite = ?", (suite,)).fetchone()
+        return row[0]
+
+    def runs(self):
+        """列出全部运行记录"""
+        cursor = self._db.execute(
+            "SELECT run_id, suite, created, total, mismatches FROM runs ORDER BY run_id")
+        return [dict(zip(('run_id', 'suite', 'created', 'total', 'mismatches'), row))
+                for row in cursor]
+
+    def results(self, run_id, mismatches_only=False):
+        """按配置和测试编号顺序返回某次运行的结果"""
+        query = f"SELECT {', '.join(_COLUMNS)} FROM results WHERE "
+        query += "match = 0 AND run_id = ?" if mismatches_only else "run_id = ?"
+        query += " ORDER BY config_id, test_id"
+        rows = []
+        for row in self._db.execute(query, (run_id,)):
+            row = dict(zip(_COLUMNS, row))
+            for name in ('model_crc', 'reference_crc', 'rtl_crc'):
+                row[name] = _from_hex(row[name])
+            row['match'] = bool(row['match'])
+            rows.append(row)
+        return rows
+
+    def mismatches(self, run_id):
+        """查询某次运行中的不匹配用例（使用 match 索引）"""
+        return self.results(run_id, mismatches_only=True)
+
+    def export(self, suite, output_dir, run_id=None):
+        """按原有逐文件布局导出某次运行的结果，返回导出的用例数量"""
+        if run_id is None:
+            run_id = self.latest_run(suite)
+        if run_id is None:
+            return 0
+        rows = self.results(run_id)
+        os.makedirs(output_dir, exist_ok=True)
+        if suite == 'algorithm':
+            # 与 crc_model_validator.save_results 相同的结果文件和总结报告
+            from crc_model_validator import save_results
+            save_results([{
+                'config_id': row['config_id'],
+                'test_id': row['test_id'],
+                'custom': row['model_crc'],
+                'official': row['reference_crc'],
+                'match': row['match'],
+            } for row in rows], output_dir)
+        else:
+            # 与 crc_rtl_validator.run_software_model 相同的模型输出文件
+            for row in rows:
+                if row['model_crc'] is None:
+                    continue
+                filename = f"test_data_c{row['config_id']}_t{row['test_id']}_output.dat"
+                with open(os.path.join(output_dir, filename), 'w') as f:
+                    f.write(f"{row['model_crc']:x}")
+        return len(rows)
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='CRC验证结果库工具')
+    parser.add_argument('--db', type=str, default='./dataset/results.sqlite', help='结果数据库')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('runs', help='列出运行记录')
+
+    mismatch_parser = sub.add_parser('mismatches', help='查询不匹配用例')
+    mismatch_parser.add_argument('--suite', choices=SUITES, default='algorithm')
+    mismatch_parser.add_argument('--run', type=int, default=None, help='运行编号(默认最近一次)')
+
+    export_parser = sub.add_parser('export', help='导出为逐文件布局')
+    export_parser.add_argument('--suite', choices=SUITES, default='algorithm')
+    export_parser.add_argument('--run', type=int, default=None, help='运行编号(默认最近一次)')
+    export_parser.add_argument('--output-dir', type=str, required=True, help='导出目录')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    store = ResultStore(args.db)
+    try:
+        if args.command == 'runs':
+            for run in store.runs():
+                created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['created']))
+                print(f"#{run['run_id']} {run['suite']:<9} {created} "
+                      f"总数 {run['total']} 不匹配 {run['mismatches']}")
+        elif args.command == 'mismatches':
+            run_id = args.run or store.latest_run(args.suite)
+            if run_id is None:
+                print(f"错误: 没有 {args.suite} 的运行记录")
+                return 1
+            rows = store.mismatches(run_id)
+            print(f"运行 #{run_id}: {len(rows)} 个不匹配用例")
+            other = 'reference_crc' if args.suite == 'algorithm' else 'rtl_crc'
+            for row in rows:
+                model = 'None' if row['model_crc'] is None else f"0x{row['model_crc']:X}"
+                ref = 'None' if row[other] is None else f"0x{row[other]:X}"
+                print(f"  配置 #{row['config_id']} 测试 #{row['test_id']}: 模型 {model} 对比 {ref}")
+        else:
+            count = store.export(args.suite, args.output_dir, args.run)
+            print(f"已导出 {count} 个用例到: {args.output_dir}")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+由样本报文逆向求解CRC参数
+CRC对输入是仿射的：等长报文两两异或后 init 和 xorout 的影响相互抵消，
+差值多项式都能被生成多项式整除，对它们求 GF(2) 上的最大公因式即可得到多项式；
+多项式确定后 init 和 xorout 由线性方程组直接求解，四种反转模式逐一尝试
+"""
+import os
+import sys
+import json
+import argparse
+from CRC import reverse_bits
+from crc_gf2 import solve_linear, rank, poly_mulmod, poly_xpow_mod, poly_divmod, poly_gcd
+from crc_config import CrcModel, CATALOGUE, MAX_WIDTH
+from crc_coverage import REFLECTION_MODES
+
+# 最大公因式比位宽多出的次数不超过该值时，枚举其中所有 width 次因式
+MAX_EXTRA_DEGREE = 16
+
+_REFLECT8 = [reverse_bits(b, 8) for b in range(256)]
+
+
+def parse_sample(text):
+    """解析 "报文十六进制:CRC十六进制" 或 "报文十六进制 CRC十六进制" 形式的样本"""
+    text = text.strip()
+    if ':' in text:
+        message, crc = text.rsplit(':', 1)
+    else:
+        message, crc = text.rsplit(None, 1)
+    return bytes.fromhex(message.replace(' ', '')), int(crc, 16)
+
+
+def load_samples(path):
+    """读取样本文件，每行一个样本，忽略空行和 # 注释"""
+    samples = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                samples.append(parse_sample(line))
+    return samples
+
+
+def _message_poly(message, refin):
+    """报文对应的多项式(首字节为最高次项)；refin 时每个字节先反转"""
+    if refin:
+        message = bytes(_REFLECT8[b] for b in message)
+    return int.from_bytes(message, 'big')
+
+
+def find_polys(samples, width, refin, refout):
+    """求解生成多项式，返回候选多项式列表(不含隐式最高位)"""
+    by_length = {}
+    for message, crc in samples:
+        by_length.setdefault(len(message), []).append((message, crc))
+
+    # 输出先换回正常位序，异或后 init 和 xorout 的贡献抵消:
+    # (M1 ^ M2)·x^width ≡ crc1 ^ crc2 (mod P)
+    g = 0
+    for group in by_length.values():
+        first_message, first_crc = group[0]
+        first_poly = _message_poly(first_message, refin)
+        first_crc = reverse_bits(first_crc, width) if refout else first_crc
+        for message, crc in group[1:]:
+            crc = reverse_bits(crc, width) if refout else crc
+            diff = ((_message_poly(message, refin) ^ first_poly) << width) ^ crc ^ first_crc
+            if diff:
+                g = poly_gcd(g, diff) if g else diff
+
+    degree = g.bit_length() - 1
+    if degree < width:
+        return []
+    if degree == width:
+        return [g ^ (1 << width)] if g & 1 else []
+    extra = degree - width
+    if extra > MAX_EXTRA_DEGREE:
+        return []
+    # 公因式中还含有其他因子，枚举 extra 次的余因式
+    polys = []
+    for cofactor in range(1 << extra, 1 << (extra + 1)):
+        quotient, remainder = poly_divmod(g, cofactor)
+        # 生成多项式必须含常数项，否则只是低位宽CRC的移位形式
+        if not remainder and quotient & 1:
+            polys.append(quotient ^ (1 << width))
+    return polys
+
+
+def solve_init_xorout(samples, width, poly, refin, refout):
+    """求解 init 和 xorout，返回 ([(init, xorout), ...], 是否唯一)"""
+    mask = (1 << width) - 1
+    zero_model = CrcModel(width, poly, 0, refin, False, 0)
+    # 每个样本得到 width 个方程: init·x^(8n) ^ X = crc' ^ S，
+    # 其中 S 为零初始值的CRC，X 为(正常位序的) xorout；各样本的方程按 width 位拼接
+    columns = [0] * (2 * width)
+    target = 0
+    for k, (message, crc) in enumerate(samples):
+        offset = k * width
+        shift = poly_xpow_mod(8 * len(message), poly, width)
+        for bit in range(width):
+            columns[bit] |= poly_mulmod(1 << bit, shift, poly, width) << offset
+            columns[width + bit] |= (1 << bit) << offset
+        crc = reverse_bits(crc, width) if refout else crc
+        target |= (crc ^ zero_model.compute(message)) << offset
+
+    solution = solve_linear(columns, target)
+    if solution is None:
+        return [], True
+    unique = rank(columns) == 2 * width
+
+    def unpack(x):
+        init, xorout = x & mask, x >> width
+        return init, reverse_bits(xorout, width) if refout else xorout
+
+    if unique:
+        return [unpack(solution)], True
+    # 样本不足以唯一确定时，优先选择常见的全0/全1取值
+    candidates = [(init, xorout) for init in (0, mask) for xorout in (0, mask)]
+    matches = [c for c in candidates
+               if verify(CrcModel(width, poly, c[0], refin, refout, c[1]), samples)]
+    return matches or [unpack(solution)], False
+
+
+def verify(model, samples):
+    """检查模型能否复现全部样本"""
+    return all(model.compute(message) == crc for message, crc in samples)
+
+
+def catalogue_name(model):
+    """返回与模型参数一致的标准模型名称"""
+    for name, entry in CATALOGUE.items():
+        if entry[:6] == model.key():
+            return name
+    return None
+
+
+def reverse_engineer(samples, widths=None, modes=None):
+    """逆向求解CRC参数，返回 [(模型, 参数是否唯一确定), ...]
+
+    结果按位宽从小到大排列，同一位宽中标准模型在前；样本较少时差值的公因式中可能含有额外因子，
+    更宽的位宽也能复现全部样本，最小位宽的结果最可能是真实参数(见 underdetermined)
+    """
+    if not samples:
+        raise ValueError("至少需要一个样本")
+    if widths is None:
+        low = max(8, max(crc for _, crc in samples).bit_length())
+        widths = range(low, MAX_WIDTH + 1)
+    modes = modes or list(REFLECTION_MODES)
+
+    results = []
+    for width in widths:
+        for refin, refout in modes:
+            for poly in find_polys(samples, width, refin, refout):
+                params, unique = solve_init_xorout(samples, width, poly, refin, refout)
+                for init, xorout in params:
+                    model = CrcModel(width, poly, init, refin, refout, xorout)
+                    if verify(model, samples):
+                        model = CrcModel(width, poly, init, refin, refout, xorout,
+                                         name=catalogue_name(model))
+                        results.append((model, unique))
+    results.sort(key=lambda result: (result[0].width, result[0].name is None))
+    return results
+
+
+def underdetermined(results):
+    """结果是否不能由样本唯一确定：有多个匹配模型，或 init/xorout 不唯一"""
+    return len(results) > 1 or any(not unique for _, unique in results)
+
+
+def save_json_config(model, config_id, output_dir):
+    """保存软件配置(JSON)，输入输出反转方式相同时沿用单个 rev 参数"""
+    config = {'width': model.width, 'poly': model.poly, 'init': model.init}
+    if model.refin == model.refout:
+        config['rev'] = model.refin
+    else:
+        config['refin'] = model.refin
+        config['refout'] = model.refout
+    config['xorout'] = model.xorout
+    path = os.path.join(output_dir, f"crc_config_{config_id}.json")
+    with open(path, 'w') as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def save_configs(models, output_dir, first_id=1):
+    """为每个模型保存 .json 和 .vh 配置，返回保存的文件路径列表"""
+    from crc_rtl_generator import save_rtl_config
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for config_id, model in enumerate(models, first_id):
+        rtl_config = model.params()
+        rtl_config['type_name'] = REFLECTION_MODES[(model.refin, model.refout)]
+        paths.append(save_json_config(model, config_id, output_dir))
+        paths.append(save_rtl_config(rtl_config, config_id, output_dir))
+    return paths
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='由 (报文, CRC) 样本逆向求解CRC参数')
+    parser.add_argument('samples', nargs='*', help='样本 "报文十六进制:CRC十六进制"')
+    parser.add_argument('--samples-file', type=str, help='样本文件(每行 "报文十六进制 CRC十六进制")')
+    parser.add_argument('--width', type=int, nargs='+', help=f'CRC位宽(默认尝试 8-{MAX_WIDTH} 中所有可能的位宽)')
+    parser.add_argument('--output-dir', type=str, help='保存匹配配置(.json/.vh)的目录')
+    parser.add_argument('--config-id', type=int, default=1, help='保存配置的起始编号')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    samples = [parse_sample(s) for s in args.samples]
+    if args.samples_file:
+        samples.extend(load_samples(args.samples_file))
+    if not samples:
+        print("错误: 未提供样本")
+        return 1
+
+    lengths = [len(message) for message, _ in samples]
+    if all(lengths.count(n) < 2 for n in lengths):
+        print("错误: 至少需要两个等长报文的样本才能求解多项式")
+        return 1
+
+    print(f"使用 {len(samples)} 个样本求解...")
+    results = reverse_engineer(samples, args.width)
+    if not results:
+        print("未找到匹配的CRC参数(样本数量不足或不是标准CRC)")
+        return 1
+    for model, unique in results:
+        note = "" if unique else "  (样本不足以唯一确定 init/xorout，按常用取值选择)"
+        print(f"✓ {model}{note}")
+    if len(results) > 1:
+        print(f"注意: 样本不足以唯一确定参数，共 {len(results)} 个匹配，按位宽从小到大排列，"
+              f"最可能的是第一个 (位宽 {results[0][0].width})；请增加更多等长或不同长度的样本")
+    elif underdetermined(results):
+        print("注意: 样本不足以唯一确定 init/xorout，请增加不同长度的样本")
+    if args.output_dir:
+        for path in save_configs([model for model, _ in results], args.output_dir, args.config_id):
+            print(f"配置已保存: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+滑动窗口(滚动)CRC与帧边界搜索
+窗口每向后滑动一个字节只需 O(1) 运算：新字节按查找表进入寄存器，
+离开窗口的字节用预先计算的"移出表"抵消，移出表由 x^(8L) mod P 得到；
+扫描器在原始数据流中查找CRC与尾部校验字段一致或码字余数正确的帧
+"""
+import sys
+import argparse
+from collections import deque
+from CRC import reverse_bits
+from crc_gf2 import poly_mulmod, poly_xpow_mod
+
+# 扫描模式：field 为窗口后紧跟CRC字段，residue 为整帧(含CRC)的余数检查
+SCAN_MODES = ('field', 'residue')
+
+
+class RollingCrc:
+    """长度为 window 字节的滑动窗口CRC"""
+
+    def __init__(self, model, window):
+        if window < 1:
+            raise ValueError(f"窗口长度必须大于0: {window}")
+        self.model = model
+        self.window = window
+        width, poly = model.width, model.poly
+        # 字节后接 window 个零字节时对寄存器的贡献：R(b)·x^(8L) mod P
+        shift = poly_xpow_mod(8 * window, poly, width)
+        if model.refin:
+            # 反转寄存器：先换回正常位序相乘，再反转回来
+            self.out_table = tuple(
+                reverse_bits(poly_mulmod(reverse_bits(t, width), shift, poly, width), width)
+                for t in model.table)
+            self.init_term = reverse_bits(poly_mulmod(model.init, shift, poly, width), width)
+        else:
+            self.out_table = tuple(poly_mulmod(t, shift, poly, width) for t in model.table)
+            self.init_term = poly_mulmod(model.init, shift, poly, width)
+        self.reset()
+
+    def reset(self):
+        """清空窗口"""
+        self.register = 0           # 窗口内字节从零初始值处理后的寄存器
+        self.bytes = deque()
+
+    def _step(self, byte):
+        m = self.model
+        if m.refin:
+            self.register = (self.register >> 8) ^ m.table[(self.register ^ byte) & 0xFF]
+        else:
+            shift = m.width - 8
+            self.register = ((self.register << 8) & m.mask) ^ m.table[((self.register >> shift) ^ byte) & 0xFF]
+
+    def update(self, byte):
+        """滑入一个字节；窗口已满时返回窗口的CRC，否则返回 None"""
+        self._step(byte)
+        self.bytes.append(byte)
+        if len(self.bytes) > self.window:
+            self.register ^= self.out_table[self.bytes.popleft()]
+        return self.crc() if len(self.bytes) == self.window else None
+
+    def finalize(self, register):
+        """由(零初始值)寄存器得到窗口的CRC结果"""
+        m = self.model
+        crc = register ^ self.init_term
+        if m.refin != m.refout:
+            crc = reverse_bits(crc, m.width)
+        return crc ^ m.xorout
+
+    def crc(self):
+        """当前窗口的CRC，与 model.compute(窗口数据) 相同"""
+        return self.finalize(self.register)
+
+
+def scan(stream, model, length, mode='field', chunk_size=1 << 20):
+    """流式读取 stream，逐个产生满足条件的帧起始偏移
+
+    field 模式: 帧为 length 字节数据加 width/8 字节CRC字段(refout 时小端，否则大端)，
+               数据的CRC等于字段值时匹配；
+    residue 模式: 帧为 length 字节(已包含CRC字段)，CRC异或 xorout 后等于模型余数时匹配
+    """
+    if mode not in SCAN_MODES:
+        raise ValueError(f"不支持的扫描模式: {mode}")
+    if mode == 'field':
+        if model.width % 8:
+            raise ValueError("field 模式要求CRC位宽为整字节")
+        field_bytes = model.width // 8
+    else:
+        if model.residue is None:
+            raise ValueError("该模型没有固定余数，无法使用 residue 模式")
+        field_bytes = 0
+    roller = RollingCrc(model, length)
+    frame = length + field_bytes
+
+    # 循环体内只使用局部变量
+    table, out_table = model.table, roller.out_table
+    refin, mask, shift = model.refin, model.mask, model.width - 8
+    finalize = roller.finalize
+    little = model.refout
+    field_mask = (1 << (8 * field_bytes)) - 1
+    top_shift = 8 * (field_bytes - 1)
+    target = None if mode == 'field' else model.residue ^ model.xorout
+
+    register = 0
+    field = 0
+    history = bytearray()   # 最近 frame 个字节
+    position = 0            # 已读取的字节数
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        history += chunk
+        start = len(history) - len(chunk)
+        for index in range(start, len(history)):
+            byte = history[index]
+            position += 1
+            if field_bytes:
+                # CRC字段移位寄存器，payload 窗口落后 field_bytes 个字节
+                if little:
+                    field = (field >> 8) | (byte << top_shift)
+                else:
+                    field = ((field << 8) | byte) & field_mask
+                if position <= field_bytes:
+                    continue
+                byte = history[index - field_bytes]
+            if refin:
+                register = (register >> 8) ^ table[(register ^ byte) & 0xFF]
+            else:
+                register = ((register << 8) & mask) ^ table[((register >> shift) ^ byte) & 0xFF]
+            if position > frame:
+                register ^= out_table[history[index - frame]]
+            if position >= frame:
+                crc = finalize(register)
+                if crc == (field if target is None else target):
+                    yield position - frame
+        # 只保留下一块需要回看的字节
+        del history[:max(0, len(history) - frame)]
+
+
+def scan_file(path, model, length, mode='field', chunk_size=1 << 20):
+    """扫描文件，返回匹配的帧起始偏移列表"""
+    with open(path, 'rb') as f:
+        return list(scan(f, model, length, mode, chunk_size))
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='在原始数据流中搜索CRC校验正确的定长帧')
+    parser.add_argument('file', help='原始数据文件')
+    parser.add_argument('--config', required=True, help='配置文件路径或标准模型名称')
+    parser.add_argument('--length', type=int, required=True,
+                        help='帧长度(field 模式不含CRC字段，residue 模式含CRC字段)')
+    parser.add_argument('--mode', choices=SCAN_MODES, default='field', help='匹配方式')
+    parser.add_argument('--limit', type=int, default=0, help='最多输出的匹配数(0为不限)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from crc_config import get_model
+    args = parse_args(argv)
+    model = get_model(args.config)
+    count = 0
+    with open(args.file, 'rb') as f:
+        for offset in scan(f, model, args.length, args.mode):
+            print(f"0x{offset:08X} ({offset})")
+            count += 1
+            if args.limit and count >= args.limit:
+                break
+    print(f"共找到 {count} 个匹配的帧")
+    return 0 if count else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,12 +2,15 @@
 RTL硬件CRC配置和测试数据生成器
 """
 import os
+import sys
 import random
 import argparse
 import json
 from pathlib import Path
+from crc_config import MAX_WIDTH, load_config
+from crc_vector_engine import generate_vectors, sharing_vectors
 
-def parse_args():
+def parse_args(argv=None):
     """解析命令行参数"""
     parser = argparse.ArgumentParser(description='生成硬件RTL CRC配置和测试数据')
     parser.add_argument('--n-configs', type=int, default=1, 
@@ -18,11 +21,25 @@ def parse_args():
                       help='测试数据最小长度(字节)')
     parser.add_argument('--max-length', type=int, default=20, 
                       help='测试数据最大长度(字节)')
+    parser.add_argument('--widths', type=int, nargs='+', default=[8, 16, 32],
+                      help='随机选择的CRC位宽(8-128)')
+    parser.add_argument('--channels', type=int, default=0, 
+                      help='同时生成多通道时分复用CRC模块 rtl_model/src/crc_multi.v 的通道数(0为不生成)')
     parser.add_argument('--seed', type=int, default=None, 
-                      help='随机数种子(可选)')
+                      help='随机数种子(可选，未指定时随机选取并打印)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, 
+                      help='生成测试数据的并行进程数')
+    parser.add_argument('--shard-size', type=int, default=1000, 
+                      help='每个生成分片的测试数量')
     parser.add_argument('--output-dir', type=str, default='./dataset/Test_Model/input', 
                       help='输出目录')
-    return parser.parse_args()
+    parser.add_argument('--config-dir', type=str, default=None, 
+                      help='RTL配置输出目录(默认 rtl_model/settings)')
+    args = parser.parse_args(argv)
+    invalid = [w for w in args.widths if not 8 <= w <= MAX_WIDTH]
+    if invalid:
+        parser.error(f"不支持的CRC位宽 {invalid}，位宽范围为 8-{MAX_WIDTH}")
+    return args
 
 def generate_polynomial(width):
     """生成随机CRC多项式"""
@@ -36,10 +53,9 @@ def generate_polynomial(width):
     
     return poly
 
-def generate_hardware_config(config_type):
+def generate_hardware_config(config_type, widths=(8, 16, 32)):
     """生成特定类型的硬件CRC配置"""
-    common_widths = [8, 16, 32]
-    width = random.choice(common_widths)
+    width = random.choice(widths)
     
     polynomial = generate_polynomial(width)
     
@@ -77,39 +93,30 @@ def generate_hardware_config(config_type):
 def save_rtl_config(config, config_id, rtl_dir):
     """保存RTL配置为Verilog头文件"""
     rtl_path = os.path.join(rtl_dir, f"crc_config_{config_id}.vh")
+    width = config['width']
+    mask = (1 << width) - 1
     with open(rtl_path, 'w') as f:
         f.write("// 自动生成的CRC配置文件\n")
         f.write(f"// 配置类型: {config['type_name']}\n\n")
-        f.write(f"`define CRC_WIDTH 'd{config['width']}\n")
-        f.write(f"`define CRC_POLY 'h{config['poly']:x}\n")
-        f.write(f"`define CRC_INIT 'h{config['init']:x}\n")
+        f.write(f"`define CRC_WIDTH 'd{width}\n")
+        # 使用带位宽的常量：未指定位宽的常量在部分工具中只有32位，宽CRC会被截断；
+        # 多项式的隐式最高位不写入
+        f.write(f"`define CRC_POLY {width}'h{config['poly'] & mask:x}\n")
+        f.write(f"`define CRC_INIT {width}'h{config['init'] & mask:x}\n")
         f.write(f"`define CRC_REFIN 'd{1 if config['refin'] else 0}\n")
         f.write(f"`define CRC_REFOUT 'd{1 if config['refout'] else 0}\n")
-        f.write(f"`define CRC_XOROUT 'h{config['xorout']:x}\n")
+        f.write(f"`define CRC_XOROUT {width}'h{config['xorout'] & mask:x}\n")
     
     return rtl_path
 
-def generate_test_data(min_length, max_length):
-    """生成随机测试数据"""
-    length = random.randint(min_length, max_length)
-    data = [random.randint(0, 255) for _ in range(length)]
-    return data
-
-def save_test_data(data, config_id, test_id, input_dir):
-    """保存测试数据为16进制格式"""
-    output_path = os.path.join(input_dir, f"test_data_c{config_id}_t{test_id}_input.dat")
-    # 先写入数据长度，然后是16进制数据
-    hex_data = ' '.join([f"{byte:02X}" for byte in data])
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(f"{len(data)}\n{hex_data}")
-    return output_path
-
-def main():
-    args = parse_args()
+def main(argv=None):
+    args = parse_args(argv)
     
-    if args.seed is not None:
-        random.seed(args.seed)
-        print(f"使用随机种子: {args.seed}")
+    # 测试向量由种子确定性派生，未指定种子时随机选取一个，保证结果可以复现
+    if args.seed is None:
+        args.seed = random.randrange(2**32)
+    random.seed(args.seed)
+    print(f"使用随机种子: {args.seed}")
     
     # 获取脚本所在根目录
     script_dir = Path(__file__).parent.parent.parent.absolute()
@@ -117,7 +124,7 @@ def main():
     # 确保输出目录存在
     dirs = {
         "input": os.path.join(args.output_dir),
-        "rtl_config": os.path.join(script_dir, "rtl_model", "settings")
+        "rtl_config": args.config_dir or os.path.join(script_dir, "rtl_model", "settings")
     }
     
     print(f"配置文件将保存到: {dirs['rtl_config']}")
@@ -143,13 +150,17 @@ def main():
             print(f"\n生成硬件CRC配置 #{config_id} (类型: {config_type})...")
             
             # 生成指定类型的硬件CRC配置
-            config = generate_hardware_config(config_type)
+            config = generate_hardware_config(config_type, args.widths)
             
             # 保存配置
             rtl_path = save_rtl_config(
                 config, config_id,
                 dirs["rtl_config"]
             )
+            # crc flow 共享生成结果时在这里解析一次，load_config 按路径和修改时间缓存模型，
+            # 同一进程的RTL比较步骤直接使用
+            if sharing_vectors():
+                load_config(rtl_path)
             
             # 显示配置信息
             print(f"  多项式: CRC-{config['width']} = 0x{config['poly']:x}")
@@ -167,27 +178,27 @@ def main():
                 "rtl_config": os.path.basename(rtl_path)
             }
             
-            # 为配置生成测试数据
-            print(f"  生成测试数据...")
-            for test_id in range(1, args.n_tests + 1):
-                data = generate_test_data(args.min_length, args.max_length)
-                data_path = save_test_data(data, config_id, test_id, dirs["input"])
-                
-                tests.append({
-                    "config_id": config_id,
-                    "config_type": "hardware",
-                    "reflection_type": config["type_name"],
-                    "test_id": test_id,
-                    "length": len(data),
-                    "file": os.path.basename(data_path)
-                })
-                
-                print(f"    测试 #{test_id}: {len(data)} 字节 -> {os.path.basename(data_path)}")
-            
             # 增加配置ID
             config_id += 1
             total_configs += 1
     
+    # 按 (配置, 测试区间) 分片并行生成全部测试数据
+    print(f"\n生成测试数据 ({args.workers} 个进程)...")
+    records = generate_vectors(list(configs), args.n_tests, args.min_length, args.max_length,
+                               args.seed, dirs["input"], layout='model',
+                               workers=args.workers, shard_size=args.shard_size)
+    for cid, test_id, length, filename in records:
+        tests.append({
+            "config_id": cid,
+            "config_type": "hardware",
+            "reflection_type": configs[cid]["reflection_type"],
+            "test_id": test_id,
+            "length": length,
+            "file": filename
+        })
+        
+        print(f"  配置 #{cid} 测试 #{test_id}: {length} 字节 -> {filename}")
+    
     # 保存摘要
     summary = {
         "configs": configs,
@@ -210,6 +221,12 @@ def main():
     print(f"摘要已保存至: {summary_path}")
     print(f"配置文件保存在: {dirs['rtl_config']}")
     print(f"测试数据保存在: {dirs['input']}")
+    
+    # 多通道变体：共用一个字节处理数据通路，每个通道的状态保存在状态RAM中
+    if args.channels:
+        from crc_multichannel import write_rtl
+        print(f"多通道CRC模块({args.channels} 通道)保存在: {write_rtl(args.channels)}")
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -7,16 +7,21 @@ CRC RTL与软件模型比较工具
 import os
 import json
 import glob
+import time
 import argparse
 import importlib.util
 from pathlib import Path
-from CRC import calculate_crc
+from crc_config import CrcModel, load_config
+from crc_result_cache import ResultCache, write_if_changed
+from crc_vector_engine import shared_vector
+from crc_profile import span, timed, count, record, snapshot
+import crc_profile
 import sys
 
 # 获取项目根目录（脚本的上上级目录）
 ROOT_DIR = Path(__file__).parent.parent.parent.absolute()
 
-def parse_arguments():
+def parse_arguments(argv=None):
     """解析命令行参数"""
     parser = argparse.ArgumentParser(description="CRC RTL与软件模型比较工具")
     parser.add_argument('--rtl-setting-dir', type=str, 
@@ -31,92 +36,45 @@ def parse_arguments():
     parser.add_argument('--model-output-dir', type=str, 
                       default=str(ROOT_DIR / 'dataset' / 'Test_Model' / 'model_data'), 
                       help="软件模型结果输出目录")
+    parser.add_argument('--cache', type=str, 
+                      default=str(ROOT_DIR / 'dataset' / '.cache' / 'result_cache.sqlite'), 
+                      help="结果缓存文件")
+    parser.add_argument('--cache-size', type=int, default=1000000, 
+                      help="结果缓存最大条目数")
+    parser.add_argument('--no-cache', action='store_true', 
+                      help="不使用结果缓存")
+    parser.add_argument('--results-db', type=str, default=None, 
+                      help="将结果写入SQLite结果库(不再逐用例写文件)")
+    parser.add_argument('--export-files', action='store_true', 
+                      help="使用结果库时仍写出逐用例模型结果文件")
+    parser.add_argument('--stream', action='store_true', 
+                        help="流式比较(读取、计算和写出重叠进行，内存占用有界)")
+    parser.add_argument('--in-flight', type=int, default=4096, 
+                        help="流式比较时在途用例数上限")
+    parser.add_argument('--workers', type=int, default=None, 
+                        help="流式比较的计算线程/进程数")
+    parser.add_argument('--pool', choices=('thread', 'process'), default='thread', 
+                        help="流式比较的计算执行器")
     parser.add_argument('--verbose', action='store_true', 
                         help="显示详细信息")
-    return parser.parse_args()
+    crc_profile.add_arguments(parser)
+    return parser.parse_args(argv)
 
 def load_rtl_config(config_file):
-    """从RTL配置文件加载CRC参数"""
-    config = {}
+    """从RTL配置文件加载CRC模型（解析结果按路径和修改时间缓存）"""
     try:
-        print(f"读取配置文件: {config_file}")
-        with open(config_file, 'r') as f:
-            lines = f.readlines()
-        
-        for line in lines:
-            line = line.strip()
-            # 跳过注释和空行
-            if not line or line.startswith('//'):
-                continue
-                
-            if '`define' in line:
-                # 将行按空格分割
-                parts = line.split()
-                if len(parts) < 3:
-                    continue
-                    
-                # 提取关键部分：名称和值
-                define_keyword = parts[0]  # 应该是 `define
-                param_name = parts[1]      # 例如 `CRC_WIDTH
-                param_value = parts[2]     # 例如 'd16 或 'h10c21
-                
-                # 移除名称中的反引号
-                param_name = param_name.replace('`', '')
-                
-                # 处理Verilog数值格式
-                if "'" in param_value:
-                    # 检查'd或'h格式
-                    if param_value.startswith("'d"):
-                        # 十进制值
-                        actual_value = int(param_value[2:], 10)
-                    elif param_value.startswith("'h"):
-                        # 十六进制值
-                        actual_value = int(param_value[2:], 16)
-                    else:
-                        # 其他格式，保持原样
-                        actual_value = param_value
-                else:
-                    # 没有特殊格式，尝试直接转换
-                    try:
-                        actual_value = int(param_value)
-                    except ValueError:
-                        actual_value = param_value
-                
-                # 保存到配置
-                if param_name == "CRC_WIDTH":
-                    config['width'] = actual_value
-                elif param_name == "CRC_POLY":
-                    config['poly'] = hex(actual_value) if isinstance(actual_value, int) else actual_value
-                elif param_name == "CRC_INIT":
-                    config['init'] = hex(actual_value) if isinstance(actual_value, int) else actual_value
-                elif param_name == "CRC_REFIN":
-                    config['refin'] = actual_value == 1 if isinstance(actual_value, int) else (actual_value == '1')
-                elif param_name == "CRC_REFOUT":
-                    config['refout'] = actual_value == 1 if isinstance(actual_value, int) else (actual_value == '1')
-                elif param_name == "CRC_XOROUT":
-                    config['xorout'] = hex(actual_value) if isinstance(actual_value, int) else actual_value
-                
-                print(f"  解析参数: {param_name} = {param_value} -> {config.get(param_name.lower().replace('crc_', ''))}")
-        
-        # 检查是否获取了所有必要参数
-        required_params = ['width', 'poly', 'init', 'refin', 'refout', 'xorout']
-        missing_params = [p for p in required_params if p not in config]
-        
-        if missing_params:
-            print(f"  警告: 缺少必要参数: {', '.join(missing_params)}")
-            return None
-            
-        print(f"  成功加载配置: {config}")
-        return config
-        
+        model = load_config(config_file)
     except Exception as e:
         print(f"错误：读取配置文件失败 {config_file}: {e}")
-        import traceback
-        traceback.print_exc()
         return None
+    print(f"  成功加载配置: {model}")
+    return model
 
 def load_test_data(input_file):
-    """从测试数据文件加载数据"""
+    """从测试数据文件加载数据；crc flow 中由生成步骤共享且文件未修改时直接使用内存中的数据"""
+    data = shared_vector(input_file)
+    if data is not None:
+        return data
     try:
         with open(input_file, 'r') as f:
             lines = f.readlines()
@@ -179,9 +137,15 @@ def load_rtl_results(rtl_output_dir):
     
     return rtl_results
 
-def run_software_model(input_dir, configs, model_output_dir):
-    """运行软件模型并保存结果"""
-    os.makedirs(model_output_dir, exist_ok=True)
+def run_software_model(input_dir, configs, model_output_dir, cache=None,
+                       write_files=True, details=None, verbose=False):
+    """运行软件模型并保存结果
+
+    write_files 为 False 时不写逐用例输出文件；details 字典用于收集
+    每个用例的数据长度和计算耗时(微秒)；verbose 时打印每个用例的结果
+    """
+    if write_files:
+        os.makedirs(model_output_dir, exist_ok=True)
     model_results = {}
     
     # 遍历所有输入文件
@@ -210,33 +174,41 @@ def run_software_model(input_dir, configs, model_output_dir):
             config = configs[config_file]
             
             # 加载测试数据
-            data = load_test_data(input_file)
+            data = timed('load', load_test_data, input_file)
             if data is None:
                 continue
                 
-            # 计算CRC
-            width = config['width']
-            poly = int(config['poly'], 16)
-            init = int(config['init'], 16)
-            refin = config['refin']
-            refout = config['refout']
-            xorout = int(config['xorout'], 16)
+            # 先查询结果缓存，未命中时计算CRC
+            start = time.perf_counter()
+            cached = None
+            if cache is not None:
+                cache_key = cache.key(config, data)
+                cached = cache.get(cache_key)
             
-            crc_value = calculate_crc(data, width, poly, init, refin, refout, xorout)
+            count('bytes', len(data))
+            if cached is not None:
+                crc_value = cached['model']
+            else:
+                count('backend.model.table')
+                crc_value = timed('compute', config.compute, data)
+                if cache is not None:
+                    cache.put(cache_key, crc_value)
             
             # 保存到模型结果
             key = (parts[2], test_id)  # 保留原始配置ID格式(c1)用于匹配
             model_results[key] = crc_value
+            if details is not None:
+                details[key] = (len(data), (time.perf_counter() - start) * 1e6)
             
             # 保存结果到输出文件
-            output_filename = filename.replace('_input.dat', '_output.dat')
-            output_path = os.path.join(model_output_dir, output_filename)
-            
-            with open(output_path, 'w') as f:
-                # 输出十六进制结果
-                f.write(f"{crc_value:x}")
+            if write_files:
+                output_filename = filename.replace('_input.dat', '_output.dat')
+                output_path = os.path.join(model_output_dir, output_filename)
                 
-            if args.verbose:
+                # 输出十六进制结果（内容未变化时不重写）
+                timed('write', write_if_changed, output_path, f"{crc_value:x}")
+                
+            if verbose:
                 print(f"计算完成: {filename} -> CRC = 0x{crc_value:x}")
                 
         except Exception as e:
@@ -291,85 +263,289 @@ def compare_results(model_results, rtl_results, verbose=False):
     
     return comparison
 
-def main():
-    global args
-    # 解析命令行参数
-    args = parse_arguments()
+# 流式比较时每处理该数量的用例把结果缓存写入数据库
+CACHE_FLUSH_INTERVAL = 10000
+
+def read_stream_case(configs, rtl_output_dir, input_file):
+    """流水线读取阶段：读取输入数据和对应的RTL结果，无法处理时返回 None"""
+    filename = os.path.basename(input_file)
+    parts = filename.replace('_input.dat', '').split('_')
+    if len(parts) < 4:
+        print(f"警告：无法解析输入文件名：{filename}")
+        return None
+    config_file = f"crc_config_{parts[2].replace('c', '')}.vh"
+    if config_file not in configs:
+        print(f"警告：无法找到配置 {config_file} 对应的输入 {filename}")
+        return None
+    data = timed('load', load_test_data, input_file)
+    if data is None:
+        return None
+    rtl_crc = None
+    output_filename = filename.replace('_input.dat', '_output.dat')
+    rtl_path = os.path.join(rtl_output_dir, output_filename)
+    if os.path.exists(rtl_path):
+        try:
+            with open(rtl_path, 'r') as f:
+                rtl_crc = int(f.read().strip(), 16)
+        except Exception as e:
+            print(f"错误：处理RTL结果文件时出错 {rtl_path}: {e}")
+    return {
+        'key': (parts[2], parts[3]),
+        'config_file': config_file,
+        'data': data,
+        'rtl_crc': rtl_crc,
+        'output_filename': output_filename,
+    }
+
+# 工作进程中的模型缓存：参数元组 -> CrcModel；流水线每批只传递参数元组，
+# 查找表在每个工作进程中只构建一次
+_worker_models = {}
+
+def compute_stream_case(keys, profile, input_file, case):
+    """流水线计算阶段：返回 (模型CRC, 耗时微秒, 计时)
+    
+    keys 为 配置文件名 -> 模型参数元组；工作进程中的计数器和计时区间不会回到主进程，
+    profile 为真时计时为 (进程ID, 开始, 结束)，由主进程的 collect 记录，否则为 None
+    """
+    start = time.perf_counter()
+    key = keys[case['config_file']]
+    model = _worker_models.get(key)
+    if model is None:
+        model = _worker_models[key] = CrcModel(*key)
+    crc_value = model.compute(case['data'])
+    end = time.perf_counter()
+    return crc_value, (end - start) * 1e6, (os.getpid(), start, end) if profile else None
+
+def stream_compare(args, configs):
+    """用 crc_pipeline 流式运行软件模型并与RTL结果逐个比较，只保留计数和不匹配的用例"""
+    from functools import partial
+    from crc_pipeline import iter_files, make_executor, run, format_stats
+    
+    keys = {config_file: model.key() for config_file, model in configs.items()}
+    write_files = not args.results_db or args.export_files
+    if write_files:
+        os.makedirs(args.model_output_dir, exist_ok=True)
+    cache = None if args.no_cache else ResultCache(args.cache, args.cache_size)
+    store = run_id = None
+    if args.results_db:
+        from crc_result_store import ResultStore
+        store = ResultStore(args.results_db)
+        run_id = store.start_run('model')
+    counts = {'total': 0, 'matches': 0, 'missing': 0, 'unflushed': 0}
+    mismatch_rows = []
+    
+    def lookup(input_file, case):
+        if cache is None:
+            return None
+        case['cache_key'] = cache.key(configs[case['config_file']], case['data'])
+        cached = cache.get(case['cache_key'])
+        return None if cached is None else (cached['model'], None, None)
+    
+    def collect(records):
+        rows = []
+        for input_file, case, (model_crc, elapsed_us, timing) in records:
+            config_id, test_id = case['key']
+            rtl_crc = case['rtl_crc']
+            if rtl_crc is None:
+                match, status = False, "缺少结果"
+                counts['missing'] += 1
+            else:
+                match = model_crc == rtl_crc
+                status = "匹配" if match else "不匹配"
+            row = {'config_id': config_id, 'test_id': test_id, 'model_crc': model_crc,
+                   'rtl_crc': rtl_crc, 'match': match, 'status': status}
+            counts['total'] += 1
+            counts['matches'] += match
+            if status == "不匹配":
+                mismatch_rows.append(row)
+            if args.verbose:
+                print(f"测试 c{config_id}_t{test_id}: {status}")
+            if elapsed_us is not None:
+                count('bytes', len(case['data']))
+                count('backend.model.table')
+                if timing is not None:
+                    record('compute', timing[1], timing[2], timing[0])
+                if cache is not None:
+                    cache.put(case['cache_key'], model_crc)
+            if store is not None:
+                rows.append(dict(row, length=len(case['data']), elapsed_us=elapsed_us))
+        if store is not None:
+            store.add_results(run_id, rows)
+        counts['unflushed'] += len(records)
+        if cache is not None and counts['unflushed'] >= CACHE_FLUSH_INTERVAL:
+            cache.flush()
+            counts['unflushed'] = 0
+    
+    def write(records):
+        with span('write', files=len(records)):
+            for input_file, case, (model_crc, _, _) in records:
+                write_if_changed(os.path.join(args.model_output_dir, case['output_filename']),
+                                 f"{model_crc:x}")
     
+    print(f"流式比较 (在途上限 {args.in_flight}, {args.pool} 执行器)...")
+    executor = make_executor(args.pool, args.workers)
+    try:
+        stats = run(iter_files(args.input_dir, '*_input.dat'),
+                    partial(read_stream_case, configs, args.rtl_output_dir),
+                    partial(compute_stream_case, keys, crc_profile.enabled()),
+                    lookup=lookup, collect=collect, write=write if write_files else None,
+                    in_flight=args.in_flight, executor=executor, workers=args.workers)
+    finally:
+        executor.shutdown()
+    print(format_stats(stats))
+    
+    # 没有对应输入(或配置未参与比较)的RTL结果记为缺少模型结果
+    for rtl_file in iter_files(args.rtl_output_dir, '*_output.dat'):
+        filename = os.path.basename(rtl_file)
+        parts = filename.replace('_output.dat', '').split('_')
+        if len(parts) < 4:
+            continue
+        input_file = os.path.join(args.input_dir, filename.replace('_output.dat', '_input.dat'))
+        if f"crc_config_{parts[2][1:]}.vh" not in configs or not os.path.exists(input_file):
+            counts['total'] += 1
+            counts['missing'] += 1
+            if args.verbose:
+                print(f"测试 c{parts[2]}_t{parts[3]}: 缺少结果")
+    
+    if cache is not None:
+        cache.close()
+        count('result_cache.hit', cache.hits)
+        count('result_cache.miss', cache.misses)
+        print(cache.stats())
+    if store is not None:
+        store.finish_run(run_id)
+        store.close()
+        print(f"结果已写入结果库: {args.results_db} (运行 #{run_id})")
+    
+    print_summary(counts['total'], counts['matches'], counts['missing'], mismatch_rows)
+    return 0 if counts['total'] and counts['matches'] == counts['total'] else 1
+
+def main(argv=None):
+    # 解析命令行参数
+    args = parse_arguments(argv)
+    crc_profile.start(args)
+    try:
+        return validate(args)
+    finally:
+        crc_profile.finish(args)
+
+def validate(args):
+    """运行软件模型并与RTL结果比较，返回退出码"""
     # 加载RTL配置
     configs = {}
     config_files = glob.glob(os.path.join(args.rtl_setting_dir, '*.vh'))
-    for config_file in config_files:
-        config = load_rtl_config(config_file)
-        if config:
-            filename = os.path.basename(config_file)
-            configs[filename] = config
+    with span('load', what='configs'):
+        for config_file in config_files:
+            config = load_rtl_config(config_file)
+            if config:
+                filename = os.path.basename(config_file)
+                configs[filename] = config
     
     if not configs:
         print("错误：未找到有效的RTL CRC配置")
-        return
+        return 1
     
     print(f"加载了 {len(configs)} 个RTL配置")
     
-    # 检查RTL结果目录中的文件模式，确定当前激活的配置
-    rtl_files = glob.glob(os.path.join(args.rtl_output_dir, '*.dat'))
-    active_config = None
-    
-    # 检测是哪个配置被启用了
+    # 检查RTL结果目录中的文件模式，确定已有仿真结果的配置
+    # （crc_sim_runner.py 会一次汇总多个配置的结果）
+    if args.stream:
+        from crc_pipeline import iter_files
+        rtl_files = iter_files(args.rtl_output_dir, '*_output.dat')
+    else:
+        rtl_files = glob.glob(os.path.join(args.rtl_output_dir, '*_output.dat'))
+    mode_names = {
+        '1': "标准模式 (Crc_Standard)",
+        '2': "混合模式一 (Crc_Mixed1)",
+        '3': "混合模式二 (Crc_Mixed2)",
+        '4': "反转模式 (Crc_Reverse)",
+    }
+    active_configs = set()
     for file_path in rtl_files:
-        filename = os.path.basename(file_path)
-        # 分析文件名确定配置ID
-        if '_c1_' in filename:
-            active_config = '1'
-            print("检测到启用的是标准模式 (Crc_Standard)")
-            break
-        elif '_c2_' in filename:
-            active_config = '2'
-            print("检测到启用的是混合模式一 (Crc_Mixed1)")
-            break
-        elif '_c3_' in filename:
-            active_config = '3'
-            print("检测到启用的是混合模式二 (Crc_Mixed2)")
-            break
-        elif '_c4_' in filename:
-            active_config = '4'
-            print("检测到启用的是反转模式 (Crc_Reverse)")
-            break
-    
-    if active_config is None:
+        parts = os.path.basename(file_path).split('_')
+        if len(parts) >= 4 and parts[2].startswith('c'):
+            active_configs.add(parts[2][1:])
+    
+    for config_id in sorted(active_configs):
+        if config_id in mode_names:
+            print(f"检测到启用的是{mode_names[config_id]}")
+    
+    if not active_configs:
         print("警告：无法确定当前激活的CRC配置，将测试所有配置")
     else:
-        print(f"只处理配置 {active_config} 的测试数据")
+        print(f"只处理配置 {', '.join(sorted(active_configs))} 的测试数据")
     
     # 运行软件模型
     print("运行软件模型计算CRC...")
     filtered_configs = configs
     
-    # 如果确定了激活的配置，只处理该配置
-    if active_config:
-        config_file = f"crc_config_{active_config}.vh"
-        if config_file in configs:
-            filtered_configs = {config_file: configs[config_file]}
+    # 如果确定了激活的配置，只处理这些配置
+    if active_configs:
+        selected = {f"crc_config_{c}.vh": configs[f"crc_config_{c}.vh"]
+                    for c in active_configs if f"crc_config_{c}.vh" in configs}
+        if selected:
+            filtered_configs = selected
         else:
-            print(f"警告：找不到配置文件 {config_file}，将使用所有可用配置")
+            print("警告：找不到对应的配置文件，将使用所有可用配置")
+    
+    # 流式比较：边读取边计算边写出，内存占用与用例数无关
+    if args.stream:
+        with span('stream'):
+            return stream_compare(args, filtered_configs)
     
     # 使用筛选后的配置运行软件模型
-    model_results = run_software_model(args.input_dir, filtered_configs, args.model_output_dir)
+    cache = None if args.no_cache else ResultCache(args.cache, args.cache_size)
+    details = {}
+    with span('software_model'):
+        model_results = run_software_model(args.input_dir, filtered_configs, args.model_output_dir, cache,
+                                           write_files=not args.results_db or args.export_files,
+                                           details=details, verbose=args.verbose)
+    snapshot('software_model')
+    if cache is not None:
+        cache.close()
+        count('result_cache.hit', cache.hits)
+        count('result_cache.miss', cache.misses)
+        print(cache.stats())
     
     # 加载RTL结果
     print("加载RTL仿真结果...")
-    rtl_results = load_rtl_results(args.rtl_output_dir)
+    with span('load', what='rtl_results'):
+        rtl_results = load_rtl_results(args.rtl_output_dir)
     
     # 比较结果
     print("比较结果...")
-    comparison = compare_results(model_results, rtl_results, args.verbose)
+    with span('compare'):
+        comparison = compare_results(model_results, rtl_results, args.verbose)
+    snapshot('compare')
+    
+    # 写入结果库
+    if args.results_db:
+        from crc_result_store import ResultStore
+        store = ResultStore(args.results_db)
+        run_id = store.write_run('model', [{
+            'config_id': r['config_id'],
+            'test_id': r['test_id'],
+            'length': details.get((r['config_id'], r['test_id']), (None, None))[0],
+            'model_crc': r['model_crc'],
+            'rtl_crc': r['rtl_crc'],
+            'match': r['match'],
+            'elapsed_us': details.get((r['config_id'], r['test_id']), (None, None))[1],
+        } for r in comparison])
+        store.close()
+        print(f"结果已写入结果库: {args.results_db} (运行 #{run_id})")
     
     # 打印总结
     total = len(comparison)
     matches = sum(1 for r in comparison if r['match'])
-    mismatches = sum(1 for r in comparison if not r['match'] and r['status'] == "不匹配")
     missing = sum(1 for r in comparison if r['status'] == "缺少结果")
+    print_summary(total, matches, missing,
+                  [r for r in comparison if not r['match'] and r['status'] == "不匹配"])
     
+    return 0 if total and matches == total else 1
+
+def print_summary(total, matches, missing, mismatch_rows):
+    """打印比较总结和不匹配的测试"""
+    mismatches = len(mismatch_rows)
     print(f"\nCRC RTL与软件模型比较完成:")
     print(f"  总测试数: {total}")
     print(f"  匹配: {matches}")
@@ -382,17 +558,16 @@ def main():
     # 输出不匹配的测试详情
     if mismatches > 0:
         print("\n不匹配的测试:")
-        for result in comparison:
-            if not result['match'] and result['status'] == "不匹配":
-                config_id = result['config_id']
-                test_id = result['test_id']
-                model_crc = result['model_crc']
-                rtl_crc = result['rtl_crc']
-                
-                print(f"  配置: c{config_id}_t{test_id}")
-                print(f"  模型CRC: 0x{model_crc:x}")
-                print(f"  RTL CRC: 0x{rtl_crc:x}")
-                print()
+        for result in mismatch_rows:
+            config_id = result['config_id']
+            test_id = result['test_id']
+            model_crc = result['model_crc']
+            rtl_crc = result['rtl_crc']
+            
+            print(f"  配置: c{config_id}_t{test_id}")
+            print(f"  模型CRC: 0x{model_crc:x}")
+            print(f"  RTL CRC: 0x{rtl_crc:x}")
+            print()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
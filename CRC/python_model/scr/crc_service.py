@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+常驻的本地CRC计算服务
+测试平台每次单独启动Python进程都要付出解释器启动、导入和建表的开销；
+服务进程常驻并保持配置、查找表和特化内核，通过Unix域套接字(Windows上为本机TCP)接收请求。
+协议为紧凑的二进制帧：4字节小端长度 + 消息体，消息体首字节为操作码，
+单个请求为 "配置ID + 数据"，批量请求一次携带多组；大数据量的请求交给线程池或进程池计算，
+连接处理使用 asyncio
+"""
+import os
+import sys
+import glob
+import json
+import time
+import socket
+import struct
+import asyncio
+import argparse
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# 帧头：消息体长度(小端 uint32)
+FRAME = struct.Struct('<I')
+MAX_FRAME = 64 << 20
+
+# 操作码
+OP_COMPUTE = 1      # <H 配置ID> + 数据
+OP_BATCH = 2        # <I 项数> + 每项 <H 配置ID><I 长度> + 数据
+OP_REGISTER = 3     # 配置文件路径或标准模型名称(UTF-8)，返回 <H 配置ID>
+OP_STATS = 4        # 返回统计信息(JSON)
+OP_SHUTDOWN = 5     # 停止服务
+
+# 响应首字节
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+CONFIG_ID = struct.Struct('<H')
+BATCH_COUNT = struct.Struct('<I')
+BATCH_ITEM = struct.Struct('<HI')
+
+# 结果统一编码为16字节小端整数(最大支持128位CRC)
+CRC_BYTES = 16
+
+# 数据总量达到该字节数的请求交给执行器，避免阻塞事件循环
+HEAVY_BYTES = 64 * 1024
+
+# 保留最近的延迟样本用于统计分位数
+LATENCY_SAMPLES = 10000
+
+# 停止服务时等待连接处理任务结束的秒数
+CLOSE_TIMEOUT = 5.0
+
+DEFAULT_TCP_ADDRESS = '127.0.0.1:7396'
+DEFAULT_SETTINGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'settings')
+
+
+def default_address():
+    """默认服务地址：环境变量 CRC_SERVICE_ADDRESS，否则为临时目录下的套接字(不支持时用本机TCP)"""
+    address = os.environ.get('CRC_SERVICE_ADDRESS')
+    if address:
+        return address
+    if hasattr(socket, 'AF_UNIX') and sys.platform != 'win32':
+        return os.path.join(tempfile.gettempdir(), 'crc_service.sock')
+    return DEFAULT_TCP_ADDRESS
+
+
+def parse_address(address):
+    """'主机:端口' 为TCP地址，返回 (host, port)；否则为Unix套接字路径，返回 (path, None)"""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and os.sep not in address:
+        return host or '127.0.0.1', int(port)
+    return address, None
+
+
+class ServiceError(Exception):
+    """服务返回的错误"""
+
+
+# 执行器中使用的内核缓存(进程池的每个工作进程各自一份，线程池与服务共享)
+_worker_kernels = {}
+
+
+def compute_items(items, unroll=8):
+    """计算 [(配置参数元组, 数据), ...] 的CRC列表；参数元组即 CrcModel.key()"""
+    from crc_config import CrcModel
+    from crc_kernel import get_kernel
+    results = []
+    for key, data in items:
+        kernel = _worker_kernels.get(key)
+        if kernel is None:
+            kernel = _worker_kernels[key] = get_kernel(CrcModel(*key), unroll)
+        results.append(kernel(data))
+    return results
+
+
+def encode_results(crcs):
+    return bytes([STATUS_OK]) + b''.join(crc.to_bytes(CRC_BYTES, 'little') for crc in crcs)
+
+
+def encode_error(message):
+    return bytes([STATUS_ERROR]) + str(message).encode('utf-8')
+
+
+def parse_batch(body):
+    """解析批量请求体(不含操作码)，返回 [(配置ID, 数据), ...]"""
+    (count,) = BATCH_COUNT.unpack_from(body, 0)
+    offset = BATCH_COUNT.size
+    items = []
+    for _ in range(count):
+        config_id, length = BATCH_ITEM.unpack_from(body, offset)
+        offset += BATCH_ITEM.size
+        if offset + length > len(body):
+            raise ValueError("批量请求长度不正确")
+        items.append((config_id, body[offset:offset + length]))
+        offset += length
+    if offset != len(body):
+        raise ValueError("批量请求长度不正确")
+    return items
+
+
+def encode_batch(items):
+    """编码批量请求 [(配置ID, 数据), ...]"""
+    parts = [bytes([OP_BATCH]), BATCH_COUNT.pack(len(items))]
+    for config_id, data in items:
+        parts.append(BATCH_ITEM.pack(config_id, len(data)))
+        parts.append(bytes(data))
+    return b''.join(parts)
+
+
+class CrcService:
+    """CRC计算服务：配置注册表、请求分发和统计"""
+
+    def __init__(self, settings_dir=None, workers=None, pool='thread',
+                 heavy_bytes=HEAVY_BYTES, unroll=8):
+        self.configs = {}           # 配置ID -> CrcModel
+        self._ids = {}              # 配置参数 -> 配置ID
+        self.unroll = unroll
+        self.heavy_bytes = heavy_bytes
+        executor_class = ProcessPoolExecutor if pool == 'process' else ThreadPoolExecutor
+        self.executor = executor_class(max_workers=workers)
+        self.pool = pool
+        self._stopping = None
+        self._clients = {}          # 连接处理任务 -> writer，停止服务时关闭
+        self.started = time.time()
+        self.counters = {'connections': 0, 'active_connections': 0, 'requests': 0,
+                         'items': 0, 'bytes': 0, 'errors': 0, 'offloaded': 0}
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        if settings_dir:
+            self.load_settings(settings_dir)
+
+    def load_settings(self, settings_dir):
+        """按文件名中的编号注册 crc_config_<ID>.json 配置"""
+        from crc_config import get_model
+        for path in sorted(glob.glob(os.path.join(settings_dir, 'crc_config_*.json'))):
+            suffix = os.path.basename(path)[len('crc_config_'):-len('.json')]
+            if suffix.isdigit():
+                self._add(int(suffix), get_model(path))
+
+    def _add(self, config_id, model):
+        self.configs[config_id] = model
+        self._ids.setdefault(model.key(), config_id)
+        compute_items([(model.key(), b'')], self.unroll)     # 预先生成内核
+        return config_id
+
+    def _prepare(self, spec):
+        """解析配置并预先生成内核(在线程中执行)"""
+        from crc_config import get_model
+        model = get_model(spec)
+        compute_items([(model.key(), b'')], self.unroll)
+        return model
+
+    async def register_async(self, spec):
+        """服务运行时注册配置：解析配置和生成、导入内核在线程中完成，不阻塞其他连接；
+        之后小数据量请求在事件循环中计算时内核已在缓存中"""
+        loop = asyncio.get_running_loop()
+        model = await loop.run_in_executor(None, self._prepare, spec)
+        return self.register(model)
+
+    def register(self, spec):
+        """注册配置文件或标准模型，相同参数的配置返回已有ID"""
+        from crc_config import get_model
+        model = get_model(spec)
+        config_id = self._ids.get(model.key())
+        if config_id is not None:
+            return config_id
+        config_id = max(self.configs, default=0) + 1
+        if config_id > 0xFFFF:
+            raise ValueError("配置数量超过上限")
+        return self._add(config_id, model)
+
+    def _keyed(self, items):
+        keyed = []
+        for config_id, data in items:
+            model = self.configs.get(config_id)
+            if model is None:
+                raise ValueError(f"未知配置ID: {config_id}")
+            keyed.append((model.key(), data))
+        return keyed
+
+    async def _compute(self, items):
+        keyed = self._keyed(items)
+        self.counters['items'] += len(keyed)
+        total = sum(len(data) for _, data in keyed)
+        self.counters['bytes'] += total
+        if total < self.heavy_bytes:
+            return compute_items(keyed, self.unroll)
+        self.counters['offloaded'] += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, compute_items, keyed, self.unroll)
+
+    async def dispatch(self, body):
+        """处理一个请求体，返回响应体"""
+        if not body:
+            raise ValueError("空请求")
+        op, payload = body[0], body[1:]
+        if op == OP_COMPUTE:
+            (config_id,) = CONFIG_ID.unpack_from(payload, 0)
+            return encode_results(await self._compute([(config_id, payload[CONFIG_ID.size:])]))
+        if op == OP_BATCH:
+            return encode_results(await self._compute(parse_batch(payload)))
+        if op == OP_REGISTER:
+            return bytes([STATUS_OK]) + CONFIG_ID.pack(await self.register_async(payload.decode('utf-8')))
+        if op == OP_STATS:
+            return bytes([STATUS_OK]) + json.dumps(self.stats(), ensure_ascii=False).encode('utf-8')
+        if op == OP_SHUTDOWN:
+            self._stopping.set()
+            return bytes([STATUS_OK])
+        raise ValueError(f"未知操作码: {op}")
+
+    async def _handle(self, reader, writer):
+        self.counters['connections'] += 1
+        self.counters['active_connections'] += 1
+        self._clients[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(FRAME.size)
+                except asyncio.IncompleteReadError:
+                    break
+                (length,) = FRAME.unpack(header)
+                if length > MAX_FRAME:
+                    writer.write(self._frame(encode_error(f"请求过大: {length} 字节")))
+                    break
+                body = await reader.readexactly(length)
+                start = time.perf_counter()
+                self.counters['requests'] += 1
+                try:
+                    response = await self.dispatch(body)
+                except Exception as e:
+                    self.counters['errors'] += 1
+                    response = encode_error(e)
+                self.latencies.append(time.perf_counter() - start)
+                writer.write(self._frame(response))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # 客户端断开，或服务停止时 _close_clients 关闭了连接
+            pass
+        finally:
+            # 被取消(停止服务时超过 CLOSE_TIMEOUT 仍未结束)时同样清理后继续传播取消
+            self._clients.pop(asyncio.current_task(), None)
+            self.counters['active_connections'] -= 1
+            writer.close()
+
+    async def _close_clients(self):
+        """关闭所有客户端连接(已排队的响应会先发送完)，并等待连接处理任务结束"""
+        for writer in list(self._clients.values()):
+            writer.close()
+        tasks = list(self._clients)
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=CLOSE_TIMEOUT)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    @staticmethod
+    def _frame(body):
+        return FRAME.pack(len(body)) + body
+
+    def stats(self):
+        """运行统计：请求数、吞吐量和延迟分位数(微秒)"""
+        uptime = time.time() - self.started
+        stats = dict(self.counters)
+        stats.update({
+            'uptime_s': round(uptime, 3),
+            'configs': len(self.configs),
+            'pool': self.pool,
+            'requests_per_s': round(self.counters['requests'] / uptime, 1) if uptime else 0.0,
+            'mb_per_s': round(self.counters['bytes'] / uptime / 1e6, 3) if uptime else 0.0,
+        })
+        samples = sorted(self.latencies)
+        if samples:
+            for label, q in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+                stats[f'latency_{label}_us'] = round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1e6, 1)
+            stats['latency_max_us'] = round(samples[-1] * 1e6, 1)
+        return stats
+
+    async def serve(self, address):
+        """在 address 上提供服务，直到收到停止请求"""
+        self._stopping = asyncio.Event()
+        target, port = parse_address(address)
+        if port is None:
+            if os.path.exists(target):
+                os.unlink(target)       # 上次未正常退出留下的套接字文件
+            server = await asyncio.start_unix_server(self._handle, path=target)
+        else:
+            server = await asyncio.start_server(self._handle, target, port)
+        print(f"CRC服务已启动: {address} (配置 {len(self.configs)} 个, {self.pool} 池)")
+        try:
+            async with server:
+                await self._stopping.wait()
+                server.close()
+                await self._close_clients()
+        finally:
+            self.executor.shutdown(wait=False)
+            if port is None and os.path.exists(target):
+                os.unlink(target)
+        print("CRC服务已停止")
+
+
+class CrcClient:
+    """同步客户端"""
+
+    def __init__(self, address=None, timeout=30.0):
+        self.address = address or default_address()
+        target, port = parse_address(self.address)
+        if port is None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(target)
+        else:
+            self.sock = socket.create_connection((target, port), timeout=timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.sock.close()
+
+    def _recv_exact(self, size):
+        buffer = bytearray()
+        while len(buffer) < size:
+            chunk = self.sock.recv(size - len(buffer))
+            if not chunk:
+                raise ConnectionError("服务已断开连接")
+            buffer += chunk
+        return bytes(buffer)
+
+    def request(self, body):
+        """发送请求体并返回成功响应的内容(不含状态字节)"""
+        self.sock.sendall(FRAME.pack(len(body)) + body)
+        (length,) = FRAME.unpack(self._recv_exact(FRAME.size))
+        response = self._recv_exact(length)
+        if response[0] != STATUS_OK:
+            raise ServiceError(response[1:].decode('utf-8', 'replace'))
+        return response[1:]
+
+    @staticmethod
+    def _decode_results(payload):
+        return [int.from_bytes(payload[i:i + CRC_BYTES], 'little')
+                for i in range(0, len(payload), CRC_BYTES)]
+
+    def register(self, spec):
+        """注册配置文件路径或标准模型名称，返回配置ID；本地存在的路径转换为绝对路径，
+        服务进程的工作目录可能不同"""
+        spec = str(spec)
+        if os.path.exists(spec):
+            spec = os.path.abspath(spec)
+        return CONFIG_ID.unpack(self.request(bytes([OP_REGISTER]) + spec.encode('utf-8')))[0]
+
+    def compute(self, config_id, data):
+        payload = self.request(bytes([OP_COMPUTE]) + CONFIG_ID.pack(config_id) + bytes(data))
+        return self._decode_results(payload)[0]
+
+    def batch(self, items):
+        """批量计算 [(配置ID, 数据), ...]，返回CRC列表"""
+        return self._decode_results(self.request(encode_batch(items)))
+
+    def stats(self):
+        return json.loads(self.request(bytes([OP_STATS])).decode('utf-8'))
+
+    def shutdown(self):
+        self.request(bytes([OP_SHUTDOWN]))
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='常驻的本地CRC计算服务')
+    parser.add_argument('--address', type=str, default=None,
+                        help='Unix套接字路径或 主机:端口 (默认使用环境变量 CRC_SERVICE_ADDRESS)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('serve', help='启动服务')
+    p.add_argument('--settings', type=str, default=DEFAULT_SETTINGS_DIR, help='预先注册的配置目录')
+    p.add_argument('--pool', choices=('thread', 'process'), default='thread', help='大数据量请求使用的执行器')
+    p.add_argument('--workers', type=int, default=None, help='执行器的工作线程/进程数')
+    p.add_argument('--heavy-bytes', type=int, default=HEAVY_BYTES, help='交给执行器处理的请求数据量阈值')
+    p = sub.add_parser('compute', help='通过服务计算CRC')
+    p.add_argument('--config', required=True, help='配置ID、配置文件路径或标准模型名称')
+    p.add_argument('data', nargs='*', help='十六进制数据')
+    p.add_argument('--file', nargs='+', default=[], help='数据文件')
+    sub.add_parser('stats', help='显示服务统计信息')
+    sub.add_parser('stop', help='停止服务')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    address = args.address or default_address()
+    if args.command == 'serve':
+        service = CrcService(args.settings, args.workers, args.pool, args.heavy_bytes)
+        try:
+            asyncio.run(service.serve(address))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    try:
+        client = CrcClient(address)
+    except OSError as e:
+        print(f"错误: 无法连接CRC服务 {address}: {e}")
+        return 1
+    with client:
+        if args.command == 'stats':
+            for key, value in client.stats().items():
+                print(f"{key}: {value}")
+        elif args.command == 'stop':
+            client.shutdown()
+            print("已请求停止服务")
+        else:
+            config_id = int(args.config) if args.config.isdigit() else client.register(args.config)
+            labels = list(args.data) + list(args.file)
+            payloads = [bytes.fromhex(text) for text in args.data]
+            for path in args.file:
+                with open(path, 'rb') as f:
+                    payloads.append(f.read())
+            try:
+                crcs = client.batch([(config_id, data) for data in payloads])
+            except ServiceError as e:
+                print(f"错误: {e}")
+                return 1
+            for label, crc in zip(labels, crcs):
+                print(f"0x{crc:X}  {label}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+CRC RTL并行仿真调度工具
+为每个配置/测试分片创建独立工作目录，每个配置只编译一次，
+在有界工作池中并发运行仿真，并将结果汇总到 dataset/Test_Model/rtl_data
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import shlex
+import shutil
+import argparse
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# 获取项目根目录（脚本的上上级目录）
+ROOT_DIR = Path(__file__).parent.parent.parent.absolute()
+SCRIPT_DIR = Path(__file__).parent.absolute()
+
+# 预置的仿真器命令模板，占位符在拆分参数后逐项替换，路径中可以包含空格
+SIMULATORS = {
+    "iverilog": {
+        "compile": "iverilog -DCRC_SHARD -I{config_dir} -I{src_dir} -o {binary} {tb}",
+        "run": "vvp {binary} +CONFIG_ID={config_id} +TEST_FIRST={test_first} +TEST_LAST={test_last}",
+    },
+    "stub": {
+        "compile": "{python} {stub} compile --config {config_dir}/crc_config.vh -o {binary}",
+        "run": "{python} {stub} run {binary} +CONFIG_ID={config_id} +TEST_FIRST={test_first} +TEST_LAST={test_last}",
+    },
+}
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="CRC RTL并行仿真调度工具")
+    parser.add_argument('--rtl-setting-dir', type=str,
+                        default=str(ROOT_DIR / 'rtl_model' / 'settings'),
+                        help="RTL CRC配置目录")
+    parser.add_argument('--input-dir', type=str,
+                        default=str(ROOT_DIR / 'dataset' / 'Test_Model' / 'input'),
+                        help="测试数据输入目录")
+    parser.add_argument('--rtl-output-dir', type=str,
+                        default=str(ROOT_DIR / 'dataset' / 'Test_Model' / 'rtl_data'),
+                        help="RTL仿真结果汇总目录")
+    parser.add_argument('--work-dir', type=str,
+                        default=str(ROOT_DIR / 'rtl_model' / 'sim' / 'work'),
+                        help="分片工作目录根路径")
+    parser.add_argument('--configs', type=str, default=None,
+                        help="只仿真指定配置，例如 1,3 (默认全部)")
+    parser.add_argument('--shard-size', type=int, default=4,
+                        help="每个仿真分片包含的测试数量")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help="并发工作进程数量上限")
+    parser.add_argument('--simulator', choices=sorted(SIMULATORS), default='iverilog',
+                        help="预置仿真器命令")
+    parser.add_argument('--compile-cmd', type=str, default=None,
+                        help="自定义编译命令模板(为空字符串时跳过编译)")
+    parser.add_argument('--sim-cmd', type=str, default=None,
+                        help="自定义仿真命令模板")
+    parser.add_argument('--timeout', type=float, default=None,
+                        help="单个编译/仿真任务超时时间(秒)")
+    parser.add_argument('--keep-work', action='store_true',
+                        help="保留分片工作目录")
+    parser.add_argument('--verbose', action='store_true',
+                        help="显示详细信息")
+    return parser.parse_args(argv)
+
+
+def discover_configs(setting_dir, selected=None):
+    """查找RTL配置文件，返回 {配置ID: 配置文件路径}"""
+    configs = {}
+    for config_file in glob.glob(os.path.join(setting_dir, 'crc_config_*.vh')):
+        config_id = os.path.basename(config_file)[len('crc_config_'):-len('.vh')]
+        if not config_id.isdigit():
+            continue
+        if selected and config_id not in selected:
+            continue
+        configs[int(config_id)] = config_file
+    return dict(sorted(configs.items()))
+
+
+def discover_tests(input_dir, config_id):
+    """查找某个配置的全部测试编号"""
+    test_ids = []
+    pattern = os.path.join(input_dir, f'test_data_c{config_id}_t*_input.dat')
+    for input_file in glob.glob(pattern):
+        test_id = os.path.basename(input_file).split('_')[3][1:]
+        if test_id.isdigit():
+            test_ids.append(int(test_id))
+    return sorted(test_ids)
+
+
+def make_shards(test_ids, shard_size):
+    """将测试编号按连续区间切分为分片，返回 [(起始编号, 结束编号, [编号...])]"""
+    shards = []
+    for start in range(0, len(test_ids), shard_size):
+        chunk = test_ids[start:start + shard_size]
+        shards.append((chunk[0], chunk[-1], chunk))
+    return shards
+
+
+def render_command(template, values):
+    """将命令模板拆分为参数列表并替换占位符"""
+    return [token.format(**values) for token in shlex.split(template)]
+
+
+def run_command(cmd, cwd, log_path, timeout=None):
+    """运行单个命令，记录日志、退出码和耗时"""
+    start = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8', errors='replace') as log:
+        log.write(' '.join(cmd) + '\n\n')
+        log.flush()
+        try:
+            returncode = subprocess.run(cmd, cwd=cwd, stdout=log, stderr=subprocess.STDOUT,
+                                        timeout=timeout).returncode
+        except FileNotFoundError as e:
+            log.write(f"无法启动仿真器: {e}\n")
+            returncode = 127
+        except subprocess.TimeoutExpired:
+            log.write(f"任务超时 ({timeout}秒)\n")
+            returncode = -1
+    return returncode, time.perf_counter() - start
+
+
+def prepare_config_dir(work_dir, config_id, config_file):
+    """创建配置工作目录，并将配置复制为测试平台固定引用的 crc_config.vh"""
+    config_dir = os.path.join(work_dir, f'c{config_id}')
+    os.makedirs(config_dir, exist_ok=True)
+    shutil.copyfile(config_file, os.path.join(config_dir, 'crc_config.vh'))
+    return config_dir
+
+
+def prepare_shard_dir(config_dir, input_dir, config_id, shard):
+    """创建分片工作目录，复制该分片的输入文件，仿真输出写入分片内的 rtl_data"""
+    first, last, test_ids = shard
+    shard_dir = os.path.join(config_dir, f't{first}_{last}')
+    os.makedirs(os.path.join(shard_dir, 'input'), exist_ok=True)
+    os.makedirs(os.path.join(shard_dir, 'rtl_data'), exist_ok=True)
+    for test_id in test_ids:
+        filename = f'test_data_c{config_id}_t{test_id}_input.dat'
+        shutil.copyfile(os.path.join(input_dir, filename),
+                        os.path.join(shard_dir, 'input', filename))
+    return shard_dir
+
+
+def collect_outputs(shard_dir, rtl_output_dir):
+    """将分片输出复制到RTL结果汇总目录，返回复制的文件数量"""
+    outputs = glob.glob(os.path.join(shard_dir, 'rtl_data', '*_output.dat'))
+    for output_file in outputs:
+        shutil.copyfile(output_file, os.path.join(rtl_output_dir, os.path.basename(output_file)))
+    return len(outputs)
+
+
+def run_simulations(args):
+    """调度全部编译和仿真任务，返回任务记录列表"""
+    selected = set(args.configs.split(',')) if args.configs else None
+    configs = discover_configs(args.rtl_setting_dir, selected)
+    if not configs:
+        print("错误：未找到有效的RTL CRC配置")
+        return []
+
+    simulator = SIMULATORS[args.simulator]
+    compile_cmd = simulator['compile'] if args.compile_cmd is None else args.compile_cmd
+    sim_cmd = simulator['run'] if args.sim_cmd is None else args.sim_cmd
+
+    work_dir = os.path.abspath(args.work_dir)
+    if os.path.isdir(work_dir):
+        shutil.rmtree(work_dir)
+    os.makedirs(work_dir)
+    os.makedirs(args.rtl_output_dir, exist_ok=True)
+
+    base_values = {
+        'python': sys.executable,
+        'stub': str(SCRIPT_DIR / 'crc_sim_stub.py'),
+        'tb': str(ROOT_DIR / 'rtl_model' / 'sim' / 'crc_tb.v'),
+        'src_dir': str(ROOT_DIR / 'rtl_model' / 'src'),
+        'settings_dir': os.path.abspath(args.rtl_setting_dir),
+    }
+
+    # 每个配置的分片计划
+    plans = {}
+    for config_id, config_file in configs.items():
+        test_ids = discover_tests(args.input_dir, config_id)
+        if not test_ids:
+            print(f"  警告: 配置 #{config_id} 没有对应的测试数据，跳过")
+            continue
+        config_dir = prepare_config_dir(work_dir, config_id, config_file)
+        plans[config_id] = {
+            'config_dir': config_dir,
+            'binary': os.path.join(config_dir, 'crc_sim.out'),
+            'shards': make_shards(test_ids, max(1, args.shard_size)),
+        }
+        print(f"配置 #{config_id}: {len(test_ids)} 个测试, {len(plans[config_id]['shards'])} 个分片")
+
+    records = []
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        pending = {}
+
+        def submit_shards(config_id):
+            plan = plans[config_id]
+            for shard in plan['shards']:
+                shard_dir = prepare_shard_dir(plan['config_dir'], args.input_dir, config_id, shard)
+                values = dict(base_values, config_dir=plan['config_dir'], binary=plan['binary'],
+                              workdir=shard_dir, config_id=config_id,
+                              test_first=shard[0], test_last=shard[1])
+                cmd = render_command(sim_cmd, values)
+                future = pool.submit(run_command, cmd, shard_dir,
+                                     os.path.join(shard_dir, 'sim.log'), args.timeout)
+                pending[future] = ('run', config_id, shard, shard_dir)
+
+        # 每个配置编译一次，编译完成后再提交该配置的仿真分片
+        for config_id, plan in plans.items():
+            if not compile_cmd.strip():
+                submit_shards(config_id)
+                continue
+            values = dict(base_values, config_dir=plan['config_dir'], binary=plan['binary'],
+                          workdir=plan['config_dir'], config_id=config_id)
+            cmd = render_command(compile_cmd, values)
+            # 编译在 sim 目录下进行，以便测试平台中的相对 `include 路径生效
+            future = pool.submit(run_command, cmd, str(ROOT_DIR / 'rtl_model' / 'sim'),
+                                 os.path.join(plan['config_dir'], 'compile.log'), args.timeout)
+            pending[future] = ('compile', config_id, None, plan['config_dir'])
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, config_id, shard, task_dir = pending.pop(future)
+                returncode, elapsed = future.result()
+                record = {
+                    'stage': stage,
+                    'config_id': config_id,
+                    'tests': None if shard is None else f"{shard[0]}-{shard[1]}",
+                    'returncode': returncode,
+                    'elapsed': round(elapsed, 4),
+                    'work_dir': task_dir,
+                }
+                if stage == 'compile':
+                    if returncode == 0:
+                        submit_shards(config_id)
+                    else:
+                        print(f"  配置 #{config_id} 编译失败 (退出码 {returncode})，"
+                              f"日志: {os.path.join(task_dir, 'compile.log')}")
+                else:
+                    record['outputs'] = collect_outputs(task_dir, args.rtl_output_dir)
+                    if returncode != 0:
+                        print(f"  配置 #{config_id} 测试 {record['tests']} 仿真失败 (退出码 {returncode})，"
+                              f"日志: {os.path.join(task_dir, 'sim.log')}")
+                if args.verbose:
+                    print(f"  [{stage}] 配置 #{config_id} {record['tests'] or ''} "
+                          f"退出码 {returncode}, 耗时 {elapsed:.3f}s")
+                records.append(record)
+    return records
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("CRC RTL并行仿真启动")
+    print(f"仿真器: {args.simulator}, 并发数: {args.jobs}, 分片大小: {args.shard_size}")
+
+    start = time.perf_counter()
+    records = run_simulations(args)
+    wall = time.perf_counter() - start
+
+    compiles = [r for r in records if r['stage'] == 'compile']
+    runs = [r for r in records if r['stage'] == 'run']
+    failed = [r for r in records if r['returncode'] != 0]
+    outputs = sum(r.get('outputs', 0) for r in runs)
+    busy = sum(r['elapsed'] for r in records)
+
+    summary = {
+        'simulator': args.simulator,
+        'jobs': args.jobs,
+        'shard_size': args.shard_size,
+        'wall_time': round(wall, 4),
+        'task_time': round(busy, 4),
+        'outputs': outputs,
+        'failed': len(failed),
+        'tasks': records,
+    }
+    os.makedirs(args.work_dir, exist_ok=True)
+    summary_path = os.path.join(args.work_dir, 'sim_summary.json')
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    print("\n" + "=" * 50)
+    print("RTL仿真完成!")
+    print(f"编译任务: {len(compiles)}, 仿真分片: {len(runs)}, 失败: {len(failed)}")
+    print(f"汇总结果文件: {outputs} -> {args.rtl_output_dir}")
+    print(f"总耗时: {wall:.3f}s (任务累计 {busy:.3f}s)")
+    print(f"任务记录已保存到: {summary_path}")
+    print("=" * 50)
+
+    if failed:
+        print("存在失败任务，已保留工作目录以便查看日志")
+    elif not args.keep_work:
+        # 只保留任务记录，删除分片工作目录
+        for entry in os.listdir(args.work_dir):
+            path = os.path.join(args.work_dir, entry)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+
+    return 1 if failed or not records else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+RTL仿真器替身
+在没有安装 Icarus Verilog 的环境中代替 iverilog/vvp，
+按照 crc_tb.v 分片模式的输入输出约定，用软件模型生成RTL结果文件
+"""
+
+import os
+import sys
+import json
+import argparse
+from CRC import calculate_crc
+from crc_config import from_params
+from crc_rtl_validator import load_rtl_config, load_test_data
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="RTL仿真器替身")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    compile_parser = sub.add_parser('compile', help="解析配置并生成仿真\"镜像\"")
+    compile_parser.add_argument('--config', required=True, help="RTL配置文件(.vh)")
+    compile_parser.add_argument('-o', '--output', required=True, help="输出镜像路径")
+
+    run_parser = sub.add_parser('run', help="运行仿真")
+    run_parser.add_argument('binary', help="compile 生成的镜像路径")
+    run_parser.add_argument('plusargs', nargs='*', help="与 vvp 相同的 +NAME=VALUE 参数")
+    return parser.parse_args(argv)
+
+
+def parse_plusargs(plusargs):
+    """解析 +NAME=VALUE 形式的参数"""
+    values = {}
+    for arg in plusargs:
+        if arg.startswith('+') and '=' in arg:
+            name, value = arg[1:].split('=', 1)
+            values[name] = value
+    return values
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.command == 'compile':
+        config = load_rtl_config(args.config)
+        if config is None:
+            return 1
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(config.params(), f)
+        return 0
+
+    with open(args.binary, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    plusargs = parse_plusargs(args.plusargs)
+    config_id = int(plusargs.get('CONFIG_ID', 1))
+    test_first = int(plusargs.get('TEST_FIRST', 1))
+    test_last = int(plusargs.get('TEST_LAST', 4))
+
+    model = from_params(config)
+    width = model.width
+    digits = (width + 3) // 4
+    for i in range(test_first, test_last + 1):
+        input_filename = f"input/test_data_c{config_id}_t{i}_input.dat"
+        if not os.path.exists(input_filename):
+            print(f"注意: 文件 {input_filename} 不存在或无法打开，跳过")
+            continue
+        data = load_test_data(input_filename)
+        if data is None:
+            return 1
+        crc_value = calculate_crc(data, width, model.poly, model.init,
+                                  model.refin, model.refout, model.xorout)
+        output_filename = f"rtl_data/test_data_c{config_id}_t{i}_output.dat"
+        with open(output_filename, 'w') as f:
+            # 与 $fdisplay("%h") 相同：按位宽补零并换行
+            f.write(f"{crc_value:0{digits}x}\n")
+        print(f"CRC结果: 0x{crc_value:0{digits}x}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
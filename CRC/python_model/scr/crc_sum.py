@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+批量文件CRC校验工具(类似 cksum)
+遍历目录树，在I/O线程中用可复用的大缓冲区 readinto 读取文件，在计算进程池中按所选配置计算CRC，
+结果按遍历顺序输出或写入清单(路径、大小、修改时间和每个配置的CRC)；
+verify 模式与之前的清单比较，大小和修改时间都没有变化的文件直接跳过，不再读取
+"""
+import os
+import sys
+import csv
+import argparse
+import threading
+from functools import partial
+from crc_config import CrcModel, get_model
+from crc_kernel import get_kernel
+from crc_pipeline import DEFAULT_IN_FLIGHT, make_executor, run, format_stats
+
+# 每个I/O线程的读缓冲区大小，更大的文件临时分配与文件大小相同的缓冲区
+BUFFER_SIZE = 1 << 20
+
+# 每个计算任务包含的文件数
+DEFAULT_BATCH_SIZE = 64
+
+# 清单格式版本，写在表头第一列
+MANIFEST_VERSION = 'crc_sum/1'
+
+# 清单中每个配置的CRC列名前缀
+CRC_COLUMN = 'crc:'
+
+_local = threading.local()
+
+# 计算进程中的内核缓存：参数元组 -> 特化内核(生成失败时为 model.compute)；
+# 整棵目录树共用，生成和导入开销均摊后小文件也比通用模型快
+_kernels = {}
+
+
+def walk_files(root, exclude=()):
+    """按路径排序递归遍历目录，产生 (相对路径, 绝对路径, 大小, 修改时间ns)；相对路径使用 / 分隔，
+    exclude 中的文件(清单本身)不计入"""
+    exclude = {os.path.abspath(path) for path in exclude}
+    stack = [('', root)]
+    while stack:
+        prefix, directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError as e:
+            print(f"警告: 无法读取目录 {directory}: {e}", file=sys.stderr)
+            continue
+        subdirs = []
+        for entry in entries:
+            relpath = prefix + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append((relpath + '/', entry.path))
+            elif entry.is_file() and os.path.abspath(entry.path) not in exclude:
+                stat = entry.stat()
+                yield relpath, entry.path, stat.st_size, stat.st_mtime_ns
+        # 逆序压栈，出栈时按名称顺序处理子目录
+        stack.extend(reversed(subdirs))
+
+
+def read_file(item):
+    """在I/O线程中读取文件内容；使用线程内复用的缓冲区 readinto，减少分配"""
+    _, path, size, _ = item
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is None:
+        buffer = _local.buffer = bytearray(BUFFER_SIZE)
+    if size > len(buffer):
+        buffer = bytearray(size)
+    view = memoryview(buffer)
+    total = 0
+    try:
+        with open(path, 'rb', buffering=0) as f:
+            while True:
+                n = f.readinto(view[total:])
+                if not n:
+                    break
+                total += n
+                if total == len(buffer):
+                    # 文件在遍历后变大：扩展缓冲区继续读取
+                    buffer = buffer + bytearray(len(buffer))
+                    view = memoryview(buffer)
+    except OSError as e:
+        print(f"警告: 无法读取 {path}: {e}", file=sys.stderr)
+        return None
+    return bytes(view[:total])
+
+
+def _kernel(params):
+    kernel = _kernels.get(params)
+    if kernel is None:
+        model = CrcModel(*params)
+        try:
+            kernel = get_kernel(model, 8)
+        except Exception as e:
+            # 内核生成或查找表存储出错时退回通用查表模型，不中断整个目录的计算
+            print(f"警告: 无法生成配置 {params} 的特化内核，使用通用模型计算: {e}", file=sys.stderr)
+            kernel = model.compute
+        _kernels[params] = kernel
+    return kernel
+
+
+def compute_file(params_list, item, data):
+    """在计算进程中按各配置计算文件的CRC，返回 (实际大小, [CRC...])"""
+    return len(data), [_kernel(params)(data) for params in params_list]
+
+
+def load_manifest(path):
+    """读取清单，返回 (配置列表, {相对路径: (大小, 修改时间ns, [CRC...])})"""
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header or header[0] != MANIFEST_VERSION or header[1:3] != ['size', 'mtime_ns']:
+            raise ValueError(f"不是有效的清单文件: {path}")
+        configs = [column[len(CRC_COLUMN):] for column in header[3:]]
+        entries = {}
+        for row in reader:
+            entries[row[0]] = (int(row[1]), int(row[2]), [int(value, 16) for value in row[3:]])
+    return configs, entries
+
+
+def format_crc(model, crc):
+    return f"{crc:0{(model.width + 3) // 4}x}"
+
+
+def checksum_tree(args, models, items, on_result, write=None):
+    """用 crc_pipeline 计算 items 中所有文件的CRC，按遍历顺序调用 on_result(item, 大小, [CRC...])；
+    返回 (流水线统计, 无法读取的相对路径列表)"""
+    params_list = [model.key() for model in models]
+    unreadable = []
+
+    def read(item):
+        # 流水线会跳过读取失败(返回 None)的项，不会交给 on_result，这里单独记录
+        data = read_file(item)
+        if data is None:
+            unreadable.append(item[0])
+        return data
+
+    def collect(records):
+        for item, _, (size, crcs) in records:
+            on_result(item, size, crcs)
+
+    executor = make_executor(args.pool, args.workers)
+    try:
+        stats = run(items, read, partial(compute_file, params_list), collect=collect, write=write,
+                    in_flight=args.in_flight, batch_size=args.batch_size, executor=executor,
+                    workers=args.workers)
+    finally:
+        executor.shutdown()
+    return stats, sorted(unreadable)
+
+
+def create(args, models):
+    """计算目录树中所有文件的CRC，写入清单或按 cksum 格式打印"""
+    counts = {'files': 0, 'bytes': 0}
+    manifest = writer = None
+    if args.manifest:
+        manifest = open(args.manifest, 'w', newline='', encoding='utf-8')
+        writer = csv.writer(manifest)
+        writer.writerow([MANIFEST_VERSION, 'size', 'mtime_ns'] + [CRC_COLUMN + spec for spec in args.config])
+
+    def on_result(item, size, crcs):
+        counts['files'] += 1
+        counts['bytes'] += size
+        if writer is None:
+            print(' '.join(format_crc(m, c) for m, c in zip(models, crcs)) + f" {size} {item[0]}")
+
+    def write_rows(records):
+        writer.writerows([item[0], size, item[3]] + [format_crc(m, c) for m, c in zip(models, crcs)]
+                         for item, _, (size, crcs) in records)
+
+    items = walk_files(args.root, [args.manifest] if args.manifest else ())
+    try:
+        stats, unreadable = checksum_tree(args, models, items, on_result,
+                                          write_rows if writer is not None else None)
+    finally:
+        if manifest is not None:
+            manifest.close()
+    for path in unreadable:
+        print(f"无法读取: {path}", file=sys.stderr)
+    print(f"{counts['files']} 个文件, {counts['bytes']} 字节", file=sys.stderr)
+    print(format_stats(stats), file=sys.stderr)
+    if args.manifest:
+        print(f"清单已保存到: {args.manifest}", file=sys.stderr)
+    if unreadable:
+        print(f"✗ {len(unreadable)} 个文件无法读取，未计入结果", file=sys.stderr)
+        return 1
+    return 0
+
+
+def verify(args):
+    """与清单比较；大小和修改时间未变化的文件跳过，其余文件重新计算并比较CRC"""
+    try:
+        configs, entries = load_manifest(args.verify)
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}")
+        return 1
+    models = [get_model(spec) for spec in configs]
+    counts = {'checked': 0, 'skipped': 0, 'ok': 0, 'touched': 0}
+    changed, added = [], []
+    seen = set()
+
+    def pending():
+        for item in walk_files(args.root, [args.verify]):
+            seen.add(item[0])
+            entry = entries.get(item[0])
+            if entry is not None and not args.full and entry[0] == item[2] and entry[1] == item[3]:
+                counts['skipped'] += 1
+                continue
+            yield item
+
+    def on_result(item, size, crcs):
+        counts['checked'] += 1
+        entry = entries.get(item[0])
+        if entry is None:
+            added.append(item[0])
+        elif entry[2] != crcs or entry[0] != size:
+            changed.append(item[0])
+        elif entry[1] != item[3]:
+            counts['touched'] += 1      # 修改时间变化但内容未变
+        else:
+            counts['ok'] += 1
+
+    stats, unreadable = checksum_tree(args, models, pending(), on_result)
+    missing = sorted(set(entries) - seen)
+    for label, paths in (("已修改", changed), ("新增", added), ("缺失", missing), ("无法读取", unreadable)):
+        for path in paths:
+            print(f"{label}: {path}")
+    print(format_stats(stats), file=sys.stderr)
+    print(f"\n校验 {counts['checked']} 个文件 (跳过未变化的 {counts['skipped']} 个): "
+          f"一致 {counts['ok']}, 仅修改时间变化 {counts['touched']}, 已修改 {len(changed)}, "
+          f"新增 {len(added)}, 缺失 {len(missing)}, 无法读取 {len(unreadable)}")
+    if changed or added or missing or unreadable:
+        print("✗ 目录与清单不一致")
+        return 1
+    print("✓ 目录与清单一致")
+    return 0
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='批量计算目录树中文件的CRC(类似 cksum)')
+    parser.add_argument('root', help='要遍历的目录')
+    parser.add_argument('--config', action='append', default=None,
+                        help='配置文件路径或标准模型名称，可重复指定(默认 CRC-32)')
+    parser.add_argument('--manifest', type=str, default=None, help='将结果写入清单文件(CSV)，不打印逐文件结果')
+    parser.add_argument('--verify', type=str, default=None, help='与之前生成的清单比较')
+    parser.add_argument('--full', action='store_true', help='verify 时不跳过大小和修改时间未变化的文件')
+    parser.add_argument('--workers', type=int, default=None, help='计算进程/线程数')
+    parser.add_argument('--pool', choices=('thread', 'process'), default='process', help='计算执行器')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='每个计算任务的文件数')
+    parser.add_argument('--in-flight', type=int, default=DEFAULT_IN_FLIGHT, help='已读取但尚未输出的文件数上限')
+    args = parser.parse_args(argv)
+    if args.verify and (args.config or args.manifest):
+        parser.error("--verify 使用清单中的配置，不能与 --config 或 --manifest 同时使用")
+    if not os.path.isdir(args.root):
+        parser.error(f"目录不存在: {args.root}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.verify:
+        return verify(args)
+    args.config = args.config or ['CRC-32']
+    return create(args, [get_model(spec) for spec in args.config])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+持久化的内存映射CRC查找表存储
+切片查找表(slicing-by-N)按 (位宽, 多项式, 输入反转, 表数) 写入固定二进制格式的文件，
+用 mmap 只读打开，多个工作进程共享同一组物理页，不再各自重建或序列化查找表；
+文件先写临时文件再原子重命名，头部保存负载的SHA-256校验和
+"""
+import os
+import sys
+import mmap
+import glob
+import struct
+import hashlib
+import argparse
+from array import array
+from pathlib import Path
+import crc_profile
+
+# 文件格式：128字节头部 + 负载(count 张表 × 256 项 × limbs 个小端 uint64)
+MAGIC = b'CRCTBL\x00\x01'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sIIIII16s32s')
+HEADER_SIZE = 128
+
+# 默认存储目录，可用环境变量 CRC_TABLE_STORE 覆盖
+DEFAULT_STORE_DIR = Path(__file__).parent.parent.absolute() / '.table_store'
+
+LIMB_MASK = (1 << 64) - 1
+
+
+def build_tables(width, poly, refin, count):
+    """计算 count 张切片查找表：第 k 张表为单字节后接 k 个零字节时的寄存器值"""
+    from crc_config import build_table
+    mask = (1 << width) - 1
+    base = list(build_table(width, poly, refin))
+    tables = [base]
+    for _ in range(count - 1):
+        prev = tables[-1]
+        if refin:
+            tables.append([(v >> 8) ^ base[v & 0xFF] for v in prev])
+        else:
+            shift = width - 8
+            tables.append([((v << 8) & mask) ^ base[v >> shift] for v in prev])
+    return tables
+
+
+def _limbs(width):
+    return 1 if width <= 64 else 2
+
+
+def encode_tables(width, poly, refin, tables):
+    """按固定格式编码为字节串"""
+    limbs = _limbs(width)
+    words = array('Q')
+    for table in tables:
+        for value in table:
+            words.append(value & LIMB_MASK)
+            if limbs == 2:
+                words.append(value >> 64)
+    if sys.byteorder == 'big':
+        words.byteswap()
+    payload = words.tobytes()
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, width, int(refin), len(tables), limbs,
+                         poly.to_bytes(16, 'little'), hashlib.sha256(payload).digest())
+    return header.ljust(HEADER_SIZE, b'\x00') + payload
+
+
+class StoreError(Exception):
+    """表文件损坏或格式不符"""
+
+
+class _WideView:
+    """两段 uint64 组成的宽表视图，按下标取值时合成整数"""
+
+    __slots__ = ('words', 'base')
+
+    def __init__(self, words, base):
+        self.words = words
+        self.base = base
+
+    def __len__(self):
+        return 256
+
+    def __getitem__(self, index):
+        i = self.base + 2 * index
+        return self.words[i] | (self.words[i + 1] << 64)
+
+    def __iter__(self):
+        return (self[i] for i in range(256))
+
+
+class MappedTables:
+    """以只读 mmap 打开的切片查找表；序列化时只传递文件路径"""
+
+    def __init__(self, path, verify=True):
+        self.path = str(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = HEADER.unpack_from(self._mmap, 0)
+        magic, version, width, refin, count, limbs, poly, digest = header
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise StoreError(f"不是有效的CRC表文件: {self.path}")
+        self.width, self.refin, self.count, self.limbs = width, bool(refin), count, limbs
+        self.poly = int.from_bytes(poly, 'little')
+        size = count * 256 * limbs * 8
+        if len(self._mmap) != HEADER_SIZE + size:
+            self.close()
+            raise StoreError(f"表文件长度不正确: {self.path}")
+        payload = memoryview(self._mmap)[HEADER_SIZE:]
+        if verify and hashlib.sha256(payload).digest() != digest:
+            payload.release()
+            self.close()
+            raise StoreError(f"表文件校验和不一致: {self.path}")
+        if sys.byteorder == 'little':
+            # 直接在映射的页面上按 uint64 访问，不复制
+            self._words = payload.cast('Q')
+        else:
+            self._words = array('Q', payload.tobytes())
+            self._words.byteswap()
+            payload.release()
+        if limbs == 1:
+            self.tables = [self._words[k * 256:(k + 1) * 256] for k in range(count)]
+        else:
+            self.tables = [_WideView(self._words, k * 512) for k in range(count)]
+
+    def __reduce__(self):
+        # 传给其他进程时只传路径，子进程重新映射同一文件(父进程已校验)
+        return (MappedTables, (self.path, False))
+
+    def close(self):
+        if getattr(self, 'tables', None) is not None:
+            self.tables = None
+            if isinstance(self._words, memoryview):
+                self._words.release()
+        self._mmap.close()
+
+
+class TableStore:
+    """按配置参数索引的表文件目录"""
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or os.environ.get('CRC_TABLE_STORE') or DEFAULT_STORE_DIR)
+        self._opened = {}
+
+    def path_for(self, width, poly, refin, count):
+        digits = (width + 3) // 4
+        return self.directory / f"w{width}_p{poly:0{digits}x}_{'r' if refin else 'n'}_s{count}.tbl"
+
+    def get(self, model, count=8):
+        """返回模型的 count 张切片查找表(MappedTables)，不存在时创建"""
+        key = (model.width, model.poly, model.refin, count)
+        tables = self._opened.get(key)
+        if tables is not None:
+            crc_profile.count('table_store.hit')
+            return tables
+        path = self.path_for(*key)
+        if path.exists():
+            crc_profile.count('table_store.mapped')
+        else:
+            crc_profile.count('table_store.miss')
+            self._create(path, *key)
+        try:
+            tables = MappedTables(path)
+        except StoreError as e:
+            # 文件损坏时重新生成
+            print(f"警告: {e}，重新生成")
+            self._create(path, *key)
+            tables = MappedTables(path)
+        self._opened[key] = tables
+        return tables
+
+    def _create(self, path, width, poly, refin, count):
+        """写临时文件并原子重命名，多个进程同时创建时只有完整的文件可见"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        content = encode_tables(width, poly, refin, build_tables(width, poly, refin, count))
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def verify(self):
+        """检查目录中全部表文件，返回 {文件名: 错误信息或None}"""
+        results = {}
+        for path in sorted(glob.glob(str(self.directory / '*.tbl'))):
+            try:
+                MappedTables(path).close()
+                results[os.path.basename(path)] = None
+            except (StoreError, struct.error, ValueError) as e:
+                results[os.path.basename(path)] = str(e)
+        return results
+
+
+_default_store = None
+
+
+def default_store():
+    """进程内共享的默认存储"""
+    global _default_store
+    if _default_store is None:
+        _default_store = TableStore()
+    return _default_store
+
+
+def slicing_compute(model, data, tables):
+    """用切片查找表每次处理 len(tables) 个字节计算CRC，结果与 model.compute 一致"""
+    count = len(tables)
+    width, mask = model.width, model.mask
+    bits = 8 * count
+    t0 = tables[0]
+    data = bytes(data)
+    end = len(data) - len(data) % count
+    if model.refin:
+        crc = int(format(model.init, f'0{width}b')[::-1], 2)
+        for pos in range(0, end, count):
+            v = crc ^ int.from_bytes(data[pos:pos + count], 'little')
+            crc = v >> bits
+            for j in range(count):
+                crc ^= tables[count - 1 - j][(v >> (8 * j)) & 0xFF]
+        for byte in data[end:]:
+            crc = (crc >> 8) ^ t0[(crc ^ byte) & 0xFF]
+    else:
+        crc = model.init
+        shift = width - 8
+        for pos in range(0, end, count):
+            word = int.from_bytes(data[pos:pos + count], 'big')
+            if width > bits:
+                v = (crc >> (width - bits)) ^ word
+                crc = (crc << bits) & mask
+            else:
+                v = (crc << (bits - width)) ^ word
+                crc = 0
+            for j in range(count):
+                crc ^= tables[count - 1 - j][(v >> (bits - 8 - 8 * j)) & 0xFF]
+        for byte in data[end:]:
+            crc = ((crc << 8) & mask) ^ t0[(crc >> shift) ^ byte]
+    if model.refin != model.refout:
+        crc = int(format(crc, f'0{width}b')[::-1], 2)
+    return crc ^ model.xorout
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='持久化的内存映射CRC查找表存储')
+    parser.add_argument('--store-dir', type=str, default=None, help='表文件目录')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('build', help='为配置生成表文件')
+    p.add_argument('configs', nargs='+', help='配置文件路径或标准模型名称')
+    p.add_argument('--slices', type=int, default=16, help='切片查找表数量')
+    sub.add_parser('verify', help='检查全部表文件的校验和')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    store = TableStore(args.store_dir)
+    if args.command == 'build':
+        from crc_config import get_model
+        for spec in args.configs:
+            model = get_model(spec)
+            tables = store.get(model, args.slices)
+            ok = slicing_compute(model, b"123456789", tables.tables) == model.check
+            print(f"{'✓' if ok else '✗'} {model.name or spec}: {tables.path}")
+        return 0
+    results = store.verify()
+    for name, error in results.items():
+        print(f"{'✓' if error is None else '✗'} {name}" + (f": {error}" if error else ""))
+    print(f"共 {len(results)} 个表文件, 损坏 {sum(e is not None for e in results.values())} 个")
+    return 0 if all(e is None for e in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
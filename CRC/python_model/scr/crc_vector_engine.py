@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+高吞吐测试向量生成引擎
+每个测试向量的长度和字节都由 (种子, 配置ID, 测试ID) 经 SHAKE-256 派生，
+相当于以 (配置, 测试) 为计数器的可寻址随机数发生器：任意分片都可以单独重新生成，
+输出与分片数量、进程数量无关，只由 --seed 决定
+"""
+import os
+import sys
+import time
+import struct
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from crc_profile import count
+
+# 输出布局：algorithm 对应 Test_Algorithm (crc_model_generator)，
+# model 对应 Test_Model (crc_rtl_generator，首行为数据长度)
+LAYOUTS = ('algorithm', 'model')
+
+# 派生格式版本，修改派生方式时递增，避免与旧数据混淆
+_STREAM_VERSION = 1
+
+# 进程内共享的测试向量：绝对路径 -> (修改时间ns, 文件大小, 数据)，未启用时为 None；
+# crc flow 启用后，生成步骤写出的向量留在内存中，同一进程的验证步骤在文件未被修改时直接使用
+_shared = None
+
+
+def share_vectors(enabled=True):
+    """启用或停止进程内共享生成的测试向量；停止时释放已保留的数据"""
+    global _shared
+    _shared = {} if enabled else None
+
+
+def sharing_vectors():
+    return _shared is not None
+
+
+def shared_vector(path):
+    """返回本进程生成且之后未被修改的测试文件的数据，否则返回 None"""
+    if not _shared:
+        return None
+    path = os.path.abspath(path)
+    entry = _shared.get(path)
+    if entry is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if entry[0] != stat.st_mtime_ns or entry[1] != stat.st_size:
+        count('vector_cache.stale')
+        return None
+    count('vector_cache.hit')
+    return entry[2]
+
+
+def _stream(seed, config_id, test_id):
+    """返回 (配置, 测试) 对应的 SHAKE-256 随机流；种子按 2**64 取模，
+    负数种子和小于 2**63 的种子与按有符号64位打包时的字节相同"""
+    return hashlib.shake_256(struct.pack('<IQQQ', _STREAM_VERSION, seed % 2**64, config_id, test_id))
+
+
+def vector_bytes(seed, config_id, test_id, min_length, max_length):
+    """生成单个测试向量：前8字节决定长度，其后为数据字节"""
+    stream = _stream(seed, config_id, test_id)
+    head = int.from_bytes(stream.digest(8), 'little')
+    length = min_length + head % (max_length - min_length + 1)
+    return stream.digest(8 + length)[8:]
+
+
+def test_filename(config_id, test_id, layout):
+    """返回测试数据文件名"""
+    if layout == 'model':
+        return f"test_data_c{config_id}_t{test_id}_input.dat"
+    return f"test_data_c{config_id}_t{test_id}.dat"
+
+
+def format_vector(data, layout):
+    """按数据集格式输出16进制文本，与生成器中 save_test_data 的格式一致"""
+    hex_data = data.hex(' ').upper()
+    if layout == 'model':
+        return f"{len(data)}\n{hex_data}"
+    return hex_data
+
+
+def make_shards(config_ids, n_tests, shard_size):
+    """将 (配置, 测试区间) 切分为分片，返回 [(配置ID, 起始测试, 结束测试)]"""
+    shards = []
+    for config_id in config_ids:
+        for first in range(1, n_tests + 1, shard_size):
+            shards.append((config_id, first, min(first + shard_size - 1, n_tests)))
+    return shards
+
+
+def generate_shard(task):
+    """生成一个分片并直接写入磁盘，返回 ([(配置ID, 测试ID, 长度, 文件名)], 保留的向量)；
+    keep 为真时保留的向量为 [(绝对路径, 修改时间ns, 文件大小, 数据)]，否则为空列表"""
+    (config_id, first, last), seed, min_length, max_length, output_dir, layout, keep = task
+    records = []
+    vectors = []
+    for test_id in range(first, last + 1):
+        data = vector_bytes(seed, config_id, test_id, min_length, max_length)
+        filename = test_filename(config_id, test_id, layout)
+        path = os.path.join(output_dir, filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(format_vector(data, layout))
+        records.append((config_id, test_id, len(data), filename))
+        if keep:
+            stat = os.stat(path)
+            vectors.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size, data))
+    return records, vectors
+
+
+def generate_vectors(config_ids, n_tests, min_length, max_length, seed, output_dir,
+                     layout='algorithm', workers=1, shard_size=1000):
+    """并行生成全部测试向量，按 (配置, 测试) 顺序返回记录列表；
+    启用进程内共享时同时保留生成的数据，供 shared_vector 使用"""
+    if layout not in LAYOUTS:
+        raise ValueError(f"未知输出布局: {layout}")
+    if min_length > max_length:
+        raise ValueError("最小长度不能大于最大长度")
+    os.makedirs(output_dir, exist_ok=True)
+    keep = _shared is not None
+    tasks = [(shard, seed, min_length, max_length, output_dir, layout, keep)
+             for shard in make_shards(config_ids, n_tests, max(1, shard_size))]
+    if workers <= 1 or len(tasks) <= 1:
+        records = _collect_shards(map(generate_shard, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map 保持分片顺序，记录顺序与进程调度无关
+            records = _collect_shards(pool.map(generate_shard, tasks))
+    return records
+
+
+def _collect_shards(results):
+    records = []
+    for shard_records, vectors in results:
+        records.extend(shard_records)
+        if _shared is not None:
+            for path, mtime_ns, size, data in vectors:
+                _shared[path] = (mtime_ns, size, data)
+    return records
+
+
+def parse_range(text):
+    """解析 '1-4' 或 '1,3,5' 形式的编号列表"""
+    ids = []
+    for part in text.split(','):
+        if '-' in part:
+            start, end = part.split('-', 1)
+            ids.extend(range(int(start), int(end) + 1))
+        elif part:
+            ids.append(int(part))
+    return ids
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='高吞吐测试向量生成引擎')
+    parser.add_argument('--configs', type=str, default='1-4', help='配置编号，例如 1-4 或 1,3')
+    parser.add_argument('--n-tests', type=int, default=5, help='每个配置的测试数量')
+    parser.add_argument('--min-length', type=int, default=3, help='测试数据最小长度(字节)')
+    parser.add_argument('--max-length', type=int, default=100, help='测试数据最大长度(字节)')
+    parser.add_argument('--seed', type=int, default=0, help='随机数种子')
+    parser.add_argument('--layout', choices=LAYOUTS, default='algorithm', help='输出文件布局')
+    parser.add_argument('--output-dir', type=str, default='./dataset/Test_Algorithm/input', help='输出目录')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='并行进程数')
+    parser.add_argument('--shard-size', type=int, default=1000, help='每个分片的测试数量')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config_ids = parse_range(args.configs)
+
+    start = time.perf_counter()
+    records = generate_vectors(config_ids, args.n_tests, args.min_length, args.max_length,
+                               args.seed, args.output_dir, args.layout,
+                               args.workers, args.shard_size)
+    elapsed = time.perf_counter() - start
+
+    total_bytes = sum(r[2] for r in records)
+    print(f"生成完成! 共 {len(records)} 个测试向量, {total_bytes} 字节")
+    print(f"种子: {args.seed}, 进程数: {args.workers}, 分片大小: {args.shard_size}")
+    print(f"耗时: {elapsed:.3f}s ({len(records) / elapsed if elapsed else 0:.0f} 向量/秒)")
+    print(f"测试数据保存在: {args.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
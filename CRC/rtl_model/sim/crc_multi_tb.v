@@ -0,0 +1,114 @@
+`timescale 1ns/1ns
+
+// 多通道时分复用CRC引擎测试平台
+// 由 crc_multichannel.py simulate 在工作目录中编译运行：
+// 配置文件 crc_config.vh 和 crc_multi.v 通过 -I 指定的目录提供，
+// 每个周期从 stimulus.dat 读取 "通道 start valid 字节 finalize"，
+// 每个输出结果以 "通道 CRC" 的格式写入 output.dat
+`include "crc_config.vh"
+`include "crc_multi.v"
+
+module crc_multi_tb;
+    // 信号声明
+    reg clk;
+    reg rst_n;
+    reg [`CRC_CHANNEL_BITS-1:0] channel_id;
+    reg start;
+    reg data_valid;
+    reg [7:0] data_in;
+    reg finalize;
+    wire crc_ready;
+    wire [`CRC_CHANNEL_BITS-1:0] crc_channel;
+    wire [`CRC_WIDTH-1:0] crc_out;
+
+    // 文件处理
+    integer stimulus_file; // 激励文件
+    integer output_file; // 输出文件
+    integer scan_result; // 扫描结果
+    integer ch, st, dv, bt, fin; // 当前周期的激励
+    integer cycles; // 周期计数
+
+    crc_multi #(
+        .bits(`CRC_WIDTH),
+        .poly(`CRC_POLY),
+        .init(`CRC_INIT),
+        .refin(`CRC_REFIN),
+        .refout(`CRC_REFOUT),
+        .xorout(`CRC_XOROUT),
+        .channels(`CRC_CHANNELS),
+        .channel_bits(`CRC_CHANNEL_BITS)
+    ) crc_inst (
+        .clk(clk),
+        .rst_n(rst_n),
+        .channel_id(channel_id),
+        .start(start),
+        .data_valid(data_valid),
+        .data_in(data_in),
+        .finalize(finalize),
+        .crc_ready(crc_ready),
+        .crc_channel(crc_channel),
+        .crc_out(crc_out)
+    );
+
+    // 时钟生成
+    initial begin
+        clk = 0;
+        forever #5 clk = ~clk; // 10ns周期时钟
+    end
+
+    // 记录每个输出结果
+    always @(posedge clk) begin
+        if (crc_ready)
+            $fdisplay(output_file, "%0d %h", crc_channel, crc_out);
+    end
+
+    // 测试过程
+    initial begin
+        $display("========= 多通道CRC仿真 =========");
+        $display("通道数: %0d, CRC宽度: %0d", `CRC_CHANNELS, `CRC_WIDTH);
+
+        stimulus_file = $fopen("stimulus.dat", "r");
+        output_file = $fopen("output.dat", "w");
+        if (stimulus_file == 0 || output_file == 0) begin
+            $display("错误: 无法打开 stimulus.dat 或 output.dat");
+            $finish;
+        end
+
+        // 复位
+        rst_n = 0;
+        channel_id = 0;
+        start = 0;
+        data_valid = 0;
+        data_in = 0;
+        finalize = 0;
+        cycles = 0;
+        #20 rst_n = 1;
+
+        // 输入在时钟下降沿更新，上升沿采样
+        while (!$feof(stimulus_file)) begin
+            scan_result = $fscanf(stimulus_file, "%d %d %d %h %d\n", ch, st, dv, bt, fin);
+            if (scan_result == 5) begin
+                @(negedge clk);
+                channel_id = ch;
+                start = st;
+                data_valid = dv;
+                data_in = bt;
+                finalize = fin;
+                cycles = cycles + 1;
+            end
+        end
+
+        // 撤销输入并等待最后一个结果写出
+        @(negedge clk);
+        start = 0;
+        data_valid = 0;
+        finalize = 0;
+        @(negedge clk);
+        @(negedge clk);
+
+        $display("共运行 %0d 个周期", cycles);
+        $fclose(stimulus_file);
+        $fclose(output_file);
+        $finish;
+    end
+endmodule
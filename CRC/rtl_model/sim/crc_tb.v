@@ -1,13 +1,18 @@
 `timescale 1ns/1ns
 
 // CRC配置选择
+// 由 crc_sim_runner.py 并行调度时以 -DCRC_SHARD 编译，配置文件由 -I 指定目录中的 crc_config.vh 提供
+`ifndef CRC_SHARD
 `define Crc_Standard 1
 // `define Crc_Mixed1 1
 // `define Crc_Mixed2 1
 // `define Crc_Reverse 1
+`endif
 
 // 根据选择包含对应配置文件
-`ifdef Crc_Standard
+`ifdef CRC_SHARD
+  `include "crc_config.vh"
+`elsif Crc_Standard
   `include "../settings/crc_config_1.vh"
 `elsif Crc_Mixed1
   `include "../settings/crc_config_2.vh"
@@ -41,6 +46,8 @@ module crc_tb;
     integer i; // 循环计数器
     integer j; // 数据读取循环计数器
     integer max_tests = 4; // 最大测试数量
+    integer test_first = 1; // 起始测试编号
+    integer config_id = 1; // 分片模式下的配置编号
     reg [8*100:1] input_filename; // 输入文件名
     reg [8*100:1] output_filename; // 输出文件名
     reg valid_test; // 测试有效标志
@@ -71,8 +78,10 @@ module crc_tb;
     
     // 波形文件设置
     initial begin
+        `ifndef CRC_SHARD
         $dumpfile("crc_test.vcd");
         $dumpvars(0, crc_tb);
+        `endif
     end
     
     // 测试过程
@@ -80,6 +89,14 @@ module crc_tb;
         // 确定当前使用的配置
         $display("========= CRC配置信息 =========");
         
+        // 分片模式：配置编号和测试范围由plusargs传入，输入/输出位于工作目录
+        `ifdef CRC_SHARD
+            if (!$value$plusargs("CONFIG_ID=%d", config_id)) config_id = 1;
+            if (!$value$plusargs("TEST_FIRST=%d", test_first)) test_first = 1;
+            if (!$value$plusargs("TEST_LAST=%d", max_tests)) max_tests = 4;
+            $display("当前使用: 分片模式 (配置 %0d, 测试 %0d-%0d)", config_id, test_first, max_tests);
+        `endif
+        
         // 简化的配置显示
         `ifdef Crc_Standard
             $display("当前使用: 标准模式");
@@ -106,11 +123,14 @@ module crc_tb;
         $display("===============================");
         
         // 循环处理每个测试文件
-        for (i = 1; i <= max_tests; i = i + 1) begin
+        for (i = test_first; i <= max_tests; i = i + 1) begin
             valid_test = 1; // 初始假设测试有效
             
             // 构建文件名
-            `ifdef Crc_Standard
+            `ifdef CRC_SHARD
+                $sformat(input_filename, "input/test_data_c%0d_t%0d_input.dat", config_id, i);
+                $sformat(output_filename, "rtl_data/test_data_c%0d_t%0d_output.dat", config_id, i);
+            `elsif Crc_Standard
                 $sformat(input_filename, "../../dataset/Test_Model/input/test_data_c1_t%0d_input.dat", i);
                 $sformat(output_filename, "../../dataset/Test_Model/rtl_data/test_data_c1_t%0d_output.dat", i);
             `elsif Crc_Mixed1
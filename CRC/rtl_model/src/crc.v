@@ -36,7 +36,7 @@ crc_process_byte #(.bits(bits),.poly(poly)) uut (
         begin
             reflect = 0;
             for (i = 0; i < bits; i = i + 1)
-                reflect = reflect|(data[i]<<(bits-1-i));
+                reflect[bits-1-i] = data[i];
         end
     endfunction
 
@@ -59,9 +59,9 @@ always @(posedge clk or negedge rst_n) begin
     end else if (data_processed && !data_valid && !crc_ready) begin
         // 数据处理完成：已经处理过数据，当前无更多数据，结果未就绪
         if(refout) begin
-            crc_out <= (reflect(crc_reg) ^ xorout) & ((1<<bits)-1);
+            crc_out <= (reflect(crc_reg) ^ xorout) & {bits{1'b1}};
         end else begin
-            crc_out <= (crc_reg ^ xorout) & ((1<<bits)-1);
+            crc_out <= (crc_reg ^ xorout) & {bits{1'b1}};
         end
         crc_ready <= 1;  // 结果就绪
     end
@@ -0,0 +1,80 @@
+// 自动生成的多通道时分复用CRC引擎 (4 通道)
+// 由 crc_rtl_generator.py --channels / crc_multichannel.py rtl 生成，请勿手工修改
+`define CRC_CHANNELS 4
+`define CRC_CHANNEL_BITS 2
+`include "crc_process_byte.v"
+module crc_multi #(
+    parameter bits =8,
+    parameter poly =8'h33,
+    parameter init =8'hff,
+    parameter [0:0]refin =1'b0,
+    parameter [0:0]refout =1'b0,
+    parameter xorout =8'h00,
+    parameter channels =4,
+    parameter channel_bits =2
+)(
+    input clk,
+    input rst_n,
+    input [channel_bits-1:0] channel_id,  // 本周期操作的通道
+    input start,                          // 该通道开始新的计算(寄存器置为init)
+    input data_valid,                     // data_in 有效
+    input [7:0] data_in,
+    input finalize,                       // 输出该通道的CRC(包含本周期的数据)
+    output reg crc_ready,
+    output reg [channel_bits-1:0] crc_channel,
+    output reg [bits-1:0] crc_out
+);
+
+// 每个通道的CRC寄存器(状态RAM)，通道使用前必须先 start
+reg  [bits-1:0] state [0:channels-1];
+wire [bits-1:0] crc_cur;
+wire [bits-1:0] crc_next;
+wire [bits-1:0] crc_upd;
+
+// start 与数据同一周期时从 init 开始处理该字节
+assign crc_cur = start ? init : state[channel_id];
+assign crc_upd = data_valid ? crc_next : crc_cur;
+
+// 所有通道共用的字节处理数据通路
+crc_process_byte #(.bits(bits),.poly(poly)) datapath (
+    .crc_in(crc_cur),
+    .byte_in(data_in),
+    .refin_in(refin),
+    .crc_out(crc_next)
+);
+
+// 位翻转函数实现
+    function [bits-1:0] reflect;
+        input [bits-1:0] data;
+        integer i;
+        begin
+            reflect = 0;
+            for (i = 0; i < bits; i = i + 1)
+                reflect[bits-1-i] = data[i];
+        end
+    endfunction
+
+// 状态RAM写端口(不复位，便于综合为RAM)
+always @(posedge clk) begin
+    if(start || data_valid)
+        state[channel_id] <= crc_upd;
+end
+
+always @(posedge clk or negedge rst_n) begin
+    if(!rst_n) begin
+        crc_ready <= 0;
+        crc_channel <= 0;
+        crc_out <= 0;
+    end else begin
+        crc_ready <= finalize;
+        if(finalize) begin
+            crc_channel <= channel_id;
+            if(refout)
+                crc_out <= (reflect(crc_upd) ^ xorout) & {bits{1'b1}};
+            else
+                crc_out <= (crc_upd ^ xorout) & {bits{1'b1}};
+        end
+    end
+end
+
+endmodule
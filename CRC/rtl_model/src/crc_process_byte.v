@@ -20,10 +20,10 @@ always@(*)begin
     crc_out =0;
     for(i=0;i<8;i=i+1)begin
         if(crc_reg[bits-1])begin
-            crc_reg=((crc_reg<<1)^poly)&((1<<bits)-1);
+            crc_reg=((crc_reg<<1)^poly)&{bits{1'b1}};
         end
         else begin
-            crc_reg=(crc_reg<<1)&((1<<bits)-1);
+            crc_reg=(crc_reg<<1)&{bits{1'b1}};
         end
     end
     crc_out =crc_reg;
@@ -37,7 +37,7 @@ end
         begin
             reflect = 0;
             for (i = 0; i < 8; i = i + 1)
-                reflect = reflect|(data[i]<<(7-i));
+                reflect[7-i] = data[i];
         end
     endfunction
 
@@ -8,7 +8,7 @@ integer i;
 always @(*) begin
     reversed_data=0;
     for (i=0;i<bits;i=i+1) begin
-        reversed_data = reversed_data|(data[i]<<(bits-1-i));
+        reversed_data[bits-1-i] = data[i];
     end
 end
 endmodule
\ No newline at end of file
@@ -0,0 +1,4 @@
+@echo off
+echo 运行多通道CRC生成、仿真与验证...
+python python_model/scr/crc_multichannel.py flow %*
+echo 多通道验证完成
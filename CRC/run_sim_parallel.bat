@@ -0,0 +1,4 @@
+@echo off
+echo 并行运行CRC RTL仿真...
+python python_model/scr/crc_sim_runner.py --jobs 8 --shard-size 4 %*
+echo RTL仿真完成